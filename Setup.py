@@ -51,7 +51,12 @@ setup(
     install_requires=requirements,
     entry_points={
         "console_scripts": [
-            "venus-sim=venus_atmospheric_simulation.main:main",
+            "venus-sim=venus_atmospheric_simulation.cli:main",
+            "venus-sim-server=venus_atmospheric_simulation.server:main",
+            "venus-sim-worker=venus_atmospheric_simulation.worker:main",
+        ],
+        "gui_scripts": [
+            "venus-sim-gui=venus_atmospheric_simulation.main:main",
         ],
     },
     include_package_data=True,
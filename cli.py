@@ -0,0 +1,144 @@
+"""
+Запуск расчетов из командной строки без графического интерфейса (venus-sim)
+
+Примеры:
+    venus-sim cases.json                    # все случаи файла, сводка в ./venus-sim-results
+    venus-sim cases.toml -j 4 -o results    # четыре процесса
+    venus-sim a.json b.json --metrics-only  # только итоги, без хранения траекторий
+    venus-sim big.json --listen 0.0.0.0:8766  # раздать случаи узлам venus-sim-worker
+
+Файлы случаев описаны в core/batch.py.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog='venus-sim',
+        description='Пакетный расчет входа в атмосферу Венеры без графического интерфейса'
+    )
+    parser.add_argument('cases', nargs='+', help='Файлы случаев (JSON или TOML)')
+    parser.add_argument('-o', '--output-dir', default='venus-sim-results',
+                        help='Каталог результатов (по умолчанию venus-sim-results)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Число процессов (по умолчанию - число ядер; 1 - в текущем процессе)')
+    parser.add_argument('--metrics-only', action='store_true',
+                        help='Расчет только итогов без хранения траекторий (SimulationSummary)')
+    parser.add_argument('--save-trajectories', action='store_true',
+                        help='Сохранить результат каждого случая в <имя>.vsim (столбцовый формат)')
+    parser.add_argument('--listen', metavar='[HOST:]PORT', default=None,
+                        help='Распределенный расчет: ждать узлы venus-sim-worker на этом адресе '
+                             '(HOST по умолчанию 127.0.0.1; 0.0.0.0 - все интерфейсы)')
+    parser.add_argument('--chunk-size', type=int, default=4,
+                        help='Число случаев в блоке для узлов (с --listen, по умолчанию 4)')
+    parser.add_argument('--timing', action='store_true',
+                        help='Вывести время запуска и расчета в stderr')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true', help='Не выводить таблицу итогов')
+    verbosity.add_argument('-v', '--verbose', action='store_true', help='Подробный журнал')
+    return parser
+
+
+def parse_address(text: str, default_host: str = '127.0.0.1'):
+    """Адрес '[HOST:]PORT' как (host, port)"""
+    host, _, port = text.rpartition(':')
+    try:
+        return host or default_host, int(port)
+    except ValueError:
+        raise ValueError(f"Некорректный адрес '{text}': ожидается [HOST:]PORT")
+
+
+def main(argv=None) -> int:
+    """
+    Точка входа venus-sim
+
+    Returns:
+        0 - все случаи рассчитаны, 1 - есть случаи с ошибкой, 2 - ошибка во входных файлах
+    """
+    started = time.perf_counter()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.save_trajectories and args.metrics_only:
+        parser.error('--save-trajectories несовместим с --metrics-only')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('-j должно быть не меньше 1')
+    if args.listen and args.save_trajectories:
+        parser.error('--save-trajectories несовместим с --listen: узлы возвращают только итоги')
+    if args.listen:
+        try:
+            listen_address = parse_address(args.listen)
+        except ValueError as e:
+            parser.error(str(e))
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s %(name)s %(levelname)s: %(message)s'
+    )
+
+    # Расчетные модули импортируются после разбора аргументов: --help и ошибки
+    # в аргументах не загружают numpy
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from core.batch import load_cases, safe_filename, summary_row, summary_values, write_summary, format_table
+    from core.sweep import run_cases
+
+    try:
+        cases = load_cases(args.cases)
+    except (OSError, ValueError) as e:
+        print(f"venus-sim: {e}", file=sys.stderr)
+        return 2
+    if not cases:
+        print("venus-sim: нет случаев для расчета", file=sys.stderr)
+        return 2
+    ready = time.perf_counter()
+
+    def progress(percent, message):
+        if not args.quiet:
+            print(f"\r{message} ({percent:.0f}%)", end='', file=sys.stderr, flush=True)
+
+    if args.listen:
+        from core.distributed import Coordinator
+        coordinator = Coordinator(cases, *listen_address, chunk_size=args.chunk_size,
+                                  metrics_only=args.metrics_only, progress_callback=progress)
+        host, port = coordinator.address
+        print(f"Waiting for workers on {host}:{port}", file=sys.stderr)
+        results = coordinator.run()
+    else:
+        # Без сохранения траекторий из рабочих процессов возвращаются только итоги
+        reducer = None if args.save_trajectories else summary_values
+        results = run_cases(cases, args.jobs, reducer, args.metrics_only, progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    finished = time.perf_counter()
+
+    output_dir = args.output_dir
+    if args.save_trajectories:
+        from core.output_io import save_output
+        os.makedirs(output_dir, exist_ok=True)
+        for result in results:
+            if result.ok:
+                name = safe_filename(result.parameters['name'])
+                save_output(result.output, os.path.join(output_dir, f"{name}.vsim"))
+
+    rows = [summary_row(result) for result in results]
+    write_summary(rows, output_dir)
+    if not args.quiet:
+        print(format_table(rows))
+        for row in rows:
+            if row['status'] != 'ok':
+                print(f"{row['name']}: {row['error']}", file=sys.stderr)
+
+    if args.timing:
+        print(f"startup {1000 * (ready - started):.0f} ms, "
+              f"simulation {finished - ready:.2f} s, "
+              f"total {time.perf_counter() - started:.2f} s", file=sys.stderr)
+    return 1 if any(row['status'] != 'ok' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
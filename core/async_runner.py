@@ -0,0 +1,393 @@
+"""
+Асинхронный интерфейс к SimulationEngine для кода на asyncio
+
+Расчет выполняется в пуле потоков или процессов, цикл событий не
+блокируется. Ход расчета доступен как асинхронный итератор
+(SimulationProgress), отмена задачи asyncio останавливает расчет на
+ближайшем шаге интегрирования (через CancellationToken), а число
+одновременных расчетов ограничено семафором.
+
+Пример:
+    async with AsyncSimulationRunner('process', max_concurrency=4) as runner:
+        progress = SimulationProgress()
+        task = asyncio.create_task(runner.run(SimulationInput(), progress=progress))
+        async for percent, message in progress:
+            print(f"{percent:.0f}% {message}")
+        output = await task
+
+        outputs = await runner.run_many([SimulationInput(entry_angle=a) for a in angles])
+
+Пул потоков не дает параллельного счета (расчет на Python держит GIL), но
+не требует передачи данных между процессами; для параллельного расчета
+многих случаев используется пул процессов.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .checkpoint import CancellationToken, SimulationCancelled
+from .shared_results import SharedOutputHandle, SharedResultTransport
+from .simulation import SimulationEngine, SimulationInput, SimulationOutput, SimulationSummary
+from .sweep import _get_worker_engine
+
+logger = logging.getLogger(__name__)
+
+# Результат отмененного расчета в процессе пула: само исключение
+# SimulationCancelled не восстанавливается при передаче между процессами
+_CANCELLED = '__cancelled__'
+
+
+class SimulationProgress:
+    """
+    Ход расчета как асинхронный итератор пар (percent, message)
+
+    Итерация заканчивается по завершении расчета (в том числе с ошибкой
+    или отменой); последние значения доступны в percent и message.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self.percent = 0.0
+        self.message = ''
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def _put(self, percent: float, message: str):
+        self.percent, self.message = percent, message
+        self._ensure_queue().put_nowait((percent, message))
+
+    def _close(self):
+        self._ensure_queue().put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[float, str]:
+        item = await self._ensure_queue().get()
+        if item is None:
+            # Повторная итерация после завершения тоже сразу заканчивается
+            self._queue.put_nowait(None)
+            raise StopAsyncIteration
+        return item
+
+
+class _PolledCancellationToken:
+    """
+    CancellationToken процесса пула: признак отмены в другом процессе
+    (Manager().Event) опрашивается не чаще раза в interval секунд, а не на
+    каждом шаге интегрирования
+    """
+
+    def __init__(self, event, interval: float = 0.1):
+        self._event = event
+        self._interval = interval
+        self._next_check = 0.0
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self._interval
+                self._cancelled = self._event.is_set()
+        return self._cancelled
+
+
+def _run_in_process(input_data: SimulationInput, metrics_only: bool, job_id: str,
+                    cancel_event, progress_queue, transport: Optional[SharedResultTransport]):
+    last_percent = -1.0
+
+    def progress(percent, message):
+        nonlocal last_percent
+        if percent - last_percent >= 1 or percent >= 100:
+            last_percent = percent
+            progress_queue.put((job_id, percent, message))
+
+    try:
+        output = _get_worker_engine().run(
+            input_data, progress if progress_queue is not None else None,
+            metrics_only=metrics_only, cancel_token=_PolledCancellationToken(cancel_event)
+        )
+    except SimulationCancelled:
+        return _CANCELLED
+    if transport is not None and isinstance(output, SimulationOutput):
+        return transport.export(output)
+    return output
+
+
+class AsyncSimulationRunner:
+    """
+    Выполнение SimulationEngine.run из сопрограмм с ограничением числа
+    одновременных расчетов
+    """
+
+    def __init__(self, executor: Union[str, Executor] = 'thread',
+                 max_concurrency: Optional[int] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            executor: 'thread', 'process' или готовый пул (ThreadPoolExecutor
+                      или ProcessPoolExecutor - тогда он не закрывается в close())
+            max_concurrency: Наибольшее число одновременных расчетов (по
+                             умолчанию - число процессов или потоков пула)
+            max_workers: Размер создаваемого пула (по умолчанию - число ядер)
+        """
+        workers = max_workers or os.cpu_count() or 1
+        self._own_executor = isinstance(executor, str)
+        if executor == 'thread':
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='venus-sim')
+        elif executor == 'process':
+            executor = ProcessPoolExecutor(max_workers=workers)
+        elif not isinstance(executor, Executor):
+            raise ValueError(f"Неизвестный тип пула: {executor}")
+        self.executor = executor
+        self.uses_processes = isinstance(executor, ProcessPoolExecutor)
+        if max_concurrency is None:
+            max_concurrency = getattr(executor, '_max_workers', workers)
+        self.max_concurrency = max_concurrency
+        # Семафор привязан к циклу событий - свой для каждого цикла
+        self._semaphores = weakref.WeakKeyDictionary()
+
+        # Потоки: свой движок в каждом потоке пула (кэш этапов не рассчитан на
+        # одновременный доступ). Процессы: движок процесса из sweep
+        self._local = threading.local()
+
+        # Процессы: признаки отмены и ход расчета через Manager, результаты -
+        # через общую память
+        self._manager = None
+        self._progress_queue = None
+        self._progress_sinks: Dict[str, Tuple[asyncio.AbstractEventLoop, SimulationProgress]] = {}
+        self._transport: Optional[SharedResultTransport] = None
+        self._lock = threading.Lock()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Семафор текущего цикла событий"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _engine(self) -> SimulationEngine:
+        engine = getattr(self._local, 'engine', None)
+        if engine is None:
+            engine = self._local.engine = SimulationEngine()
+        return engine
+
+    def _start_process_support(self):
+        with self._lock:
+            if self._manager is not None:
+                return
+            self._manager = multiprocessing.Manager()
+            self._progress_queue = self._manager.Queue()
+            self._transport = SharedResultTransport()
+            threading.Thread(target=self._pump_progress, daemon=True).start()
+
+    def _pump_progress(self):
+        """Поток пересылки хода расчета из процессов пула в циклы событий"""
+        queue = self._progress_queue
+        while True:
+            try:
+                item = queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, percent, message = item
+            sink = self._progress_sinks.get(job_id)
+            if sink is not None:
+                loop, progress = sink
+                loop.call_soon_threadsafe(progress._put, percent, message)
+
+    async def run(self, input_data: SimulationInput, metrics_only: bool = False,
+                  progress: Optional[SimulationProgress] = None) -> Union[SimulationOutput, SimulationSummary]:
+        """
+        Расчет одного случая
+
+        Args:
+            input_data: Входные данные
+            metrics_only: См. SimulationEngine.run
+            progress: Получатель хода расчета (закрывается по завершении)
+
+        Returns:
+            SimulationOutput или SimulationSummary
+
+        Raises:
+            asyncio.CancelledError: Задача отменена; к этому моменту расчет
+                                    уже остановлен и слот семафора освобожден
+        """
+        try:
+            async with self.semaphore:
+                if self.uses_processes:
+                    return await self._run_process(input_data, metrics_only, progress)
+                return await self._run_thread(input_data, metrics_only, progress)
+        finally:
+            if progress is not None:
+                progress._close()
+
+    async def _wait(self, future, cancel):
+        """Ожидание future пула; при отмене задачи расчет останавливается до выхода"""
+        waiter = asyncio.wrap_future(future)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Ожидающий в пуле расчет снимается (future.cancel() при отмене waiter),
+            # выполняемый - останавливается на ближайшем шаге
+            cancel()
+            stopped = asyncio.wrap_future(future)
+            await asyncio.wait({stopped})
+            # Результат или SimulationCancelled остановленного расчета не нужен
+            if not stopped.cancelled():
+                stopped.exception()
+            raise
+
+    async def _run_thread(self, input_data, metrics_only, progress):
+        loop = asyncio.get_running_loop()
+        token = CancellationToken()
+        callback = None
+        if progress is not None:
+            def callback(percent, message):
+                loop.call_soon_threadsafe(progress._put, percent, message)
+
+        def run():
+            return self._engine().run(input_data, callback, metrics_only=metrics_only, cancel_token=token)
+
+        return await self._wait(self.executor.submit(run), token.cancel)
+
+    async def _run_process(self, input_data, metrics_only, progress):
+        loop = asyncio.get_running_loop()
+        # Запуск Manager занимает десятки миллисекунд - не в цикле событий
+        await loop.run_in_executor(None, self._start_process_support)
+        job_id = uuid.uuid4().hex
+        cancel_event = await loop.run_in_executor(None, self._manager.Event)
+        if progress is not None:
+            self._progress_sinks[job_id] = (loop, progress)
+        try:
+            future = self.executor.submit(
+                _run_in_process, input_data, metrics_only, job_id, cancel_event,
+                self._progress_queue if progress is not None else None, self._transport
+            )
+            output = await self._wait(future, cancel_event.set)
+        finally:
+            self._progress_sinks.pop(job_id, None)
+        if isinstance(output, str) and output == _CANCELLED:
+            raise asyncio.CancelledError()
+        if isinstance(output, SharedOutputHandle):
+            output = self._transport.open(output)
+        return output
+
+    async def run_many(self, inputs: Sequence[SimulationInput], metrics_only: bool = False,
+                       return_exceptions: bool = False,
+                       progress: Optional[SimulationProgress] = None) -> List[Any]:
+        """
+        Расчет набора случаев; одновременно считается не больше max_concurrency
+
+        Args:
+            inputs: Входные данные случаев
+            metrics_only: См. SimulationEngine.run
+            return_exceptions: Возвращать исключения случаев в списке вместо
+                               отмены остальных расчетов и выброса первого
+            progress: Получатель хода по числу завершенных случаев
+
+        Returns:
+            Результаты в порядке inputs
+        """
+        total = len(inputs)
+        done = 0
+
+        async def one(input_data):
+            nonlocal done
+            cancelled = False
+            try:
+                return await self.run(input_data, metrics_only)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                # Отмененные случаи в ходе расчета не учитываются
+                if not cancelled:
+                    done += 1
+                    if progress is not None:
+                        progress._put(100 * done / total, f"Case {done}/{total}")
+
+        tasks = [asyncio.ensure_future(one(input_data)) for input_data in inputs]
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            # Ошибка одного случая или отмена run_many останавливает остальные
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if progress is not None:
+                progress._close()
+
+    def close(self):
+        """Закрывает созданный пул и вспомогательные процессы"""
+        if self._own_executor:
+            self.executor.shutdown(wait=True)
+        with self._lock:
+            if self._manager is not None:
+                try:
+                    self._progress_queue.put(None)
+                except (EOFError, OSError):
+                    pass
+                self._manager.shutdown()
+                self._transport.close()
+                self._manager = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+# Исполнитель по умолчанию для run_async и run_many_async
+_default_runner: Optional[AsyncSimulationRunner] = None
+
+
+def _get_default_runner() -> AsyncSimulationRunner:
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = AsyncSimulationRunner('thread')
+    return _default_runner
+
+
+async def run_async(input_data: SimulationInput, metrics_only: bool = False,
+                    progress: Optional[SimulationProgress] = None,
+                    runner: Optional[AsyncSimulationRunner] = None) -> Union[SimulationOutput, SimulationSummary]:
+    """
+    Сопрограмма SimulationEngine.run (см. AsyncSimulationRunner.run)
+
+    Args:
+        runner: Исполнитель; по умолчанию общий пул потоков
+    """
+    return await (runner or _get_default_runner()).run(input_data, metrics_only, progress)
+
+
+async def run_many_async(inputs: Sequence[SimulationInput], metrics_only: bool = False,
+                         executor: Union[str, Executor] = 'process',
+                         max_concurrency: Optional[int] = None,
+                         return_exceptions: bool = False,
+                         progress: Optional[SimulationProgress] = None) -> List[Any]:
+    """
+    Расчет набора случаев в отдельном пуле (см. AsyncSimulationRunner.run_many)
+
+    Args:
+        executor: 'process', 'thread' или готовый пул
+        max_concurrency: Наибольшее число одновременных расчетов
+    """
+    async with AsyncSimulationRunner(executor, max_concurrency) as runner:
+        return await runner.run_many(inputs, metrics_only, return_exceptions, progress)
@@ -0,0 +1,215 @@
+"""
+Пакетный расчет случаев из файла JSON или TOML (без графического интерфейса)
+
+Формат файла - один из вариантов:
+    - объект с полями SimulationInput - один случай;
+    - список таких объектов;
+    - объект {"defaults": {...}, "cases": [...], "grid": {...}}: defaults
+      дополняют каждый случай, grid (оси, как у SweepRunner) размножает
+      каждый случай по всем комбинациям значений.
+Вложенные ThermalProperties и ParachuteSystem задаются вложенными объектами
+(можно частично), имя случая - необязательное поле "name".
+
+Пример (JSON):
+    {
+        "defaults": {"integrator": "rk45", "parachute_system": {"use_parachutes": true}},
+        "cases": [
+            {"name": "venera13", "mass_specified": 760, "entry_angle": 19},
+            {"name": "airship", "mass_calculation_mode": "airship"}
+        ],
+        "grid": {"entry_speed": [7000, 7500]}
+    }
+"""
+import csv
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Union
+
+from .output_io import input_from_dict
+from .sweep import SweepCase, SweepResult, SweepRunner
+
+# Столбцы сводной таблицы
+SUMMARY_COLUMNS = (
+    'name', 'status', 'vehicle_mass', 'flight_time', 'flight_distance', 'arc_distance',
+    'final_velocity', 'final_height', 'landing_velocity', 'peak_deceleration',
+    'max_heat_flux', 'ablated_mass', 'surface_temperature', 'error'
+)
+# Столбцы краткой таблицы для вывода в консоль
+TABLE_COLUMNS = (
+    'name', 'status', 'vehicle_mass', 'flight_time', 'final_velocity',
+    'peak_deceleration', 'max_heat_flux', 'ablated_mass'
+)
+
+
+def _read_case_file(path: Path) -> Any:
+    if path.suffix.lower() == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("Для файлов TOML нужен Python 3.11+ или пакет tomli")
+        with open(path, 'rb') as fh:
+            return tomllib.load(fh)
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Объединение словарей; вложенные словари объединяются, а не заменяются"""
+    result = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def _format_value(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def cases_from_data(data: Any, source: str = '') -> List[SweepCase]:
+    """
+    Случаи из разобранного содержимого файла (см. описание формата в модуле)
+
+    Args:
+        data: Словарь или список
+        source: Имя источника для сообщений об ошибках
+
+    Returns:
+        Список SweepCase; parameters содержит 'name' и значения осей grid
+    """
+    prefix = f"{source}: " if source else ''
+    if isinstance(data, list):
+        data = {'cases': data}
+    if not isinstance(data, dict):
+        raise ValueError(f"{prefix}ожидается объект или список случаев")
+    if 'cases' not in data and 'grid' not in data:
+        data = {'cases': [data]}
+
+    defaults = data.get('defaults', {})
+    grid = data.get('grid', {})
+    entries = data.get('cases') or [{}]
+
+    cases = []
+    for number, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{prefix}случай {number} должен быть объектом")
+        entry = _merge(defaults, entry)
+        name = str(entry.pop('name', f"case_{number:03d}"))
+        try:
+            input_data = input_from_dict(entry)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{prefix}случай '{name}': {e}")
+
+        if not grid:
+            cases.append(SweepCase(len(cases), {'name': name}, input_data))
+            continue
+        for case in SweepRunner(input_data, grid).cases():
+            suffix = ','.join(f"{key}={_format_value(value)}" for key, value in case.parameters.items())
+            parameters = {'name': f"{name}[{suffix}]", **case.parameters}
+            cases.append(SweepCase(len(cases), parameters, case.input_data))
+    return cases
+
+
+def load_cases(paths: Union[str, Path, Sequence[Union[str, Path]]]) -> List[SweepCase]:
+    """
+    Читает случаи из одного или нескольких файлов JSON/TOML
+
+    Returns:
+        Список SweepCase с индексами по порядку всех файлов
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    cases = []
+    for path in paths:
+        path = Path(path)
+        for case in cases_from_data(_read_case_file(path), str(path)):
+            cases.append(SweepCase(len(cases), case.parameters, case.input_data))
+    names = [case.parameters['name'] for case in cases]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Повторяющиеся имена случаев: {', '.join(duplicates)}")
+    return cases
+
+
+def summary_values(output) -> Dict[str, Any]:
+    """
+    Скалярные итоги SimulationOutput или SimulationSummary для сводной таблицы.
+    Функция уровня модуля - годится как reducer для SweepRunner и run_cases.
+    """
+    return {
+        'vehicle_mass': output.vehicle_mass,
+        'flight_time': output.flight_time,
+        'flight_distance': output.flight_distance,
+        'arc_distance': output.arc_distance,
+        'final_velocity': output.final_velocity,
+        'final_height': output.final_height,
+        'landing_velocity': output.landing_velocity,
+        'peak_deceleration': output.peak_deceleration,
+        'max_heat_flux': output.max_heat_flux,
+        'ablated_mass': output.thermal_load.ablated_mass,
+        'surface_temperature': output.thermal_load.surface_temperature
+    }
+
+
+def summary_row(result: SweepResult) -> Dict[str, Any]:
+    """Строка сводной таблицы для результата случая"""
+    row = {column: None for column in SUMMARY_COLUMNS}
+    row['name'] = result.parameters.get('name', f"case_{result.index:03d}")
+    if not result.ok:
+        row['status'] = 'error'
+        # Последняя строка трассировки - тип и текст исключения
+        row['error'] = result.error.strip().splitlines()[-1]
+        return row
+    values = result.output if isinstance(result.output, dict) else summary_values(result.output)
+    row.update({key: (float(value) if value is not None else None) for key, value in values.items()})
+    row['status'] = 'ok'
+    return row
+
+
+def safe_filename(name: str) -> str:
+    """Имя случая, пригодное для имени файла"""
+    return re.sub(r'[^\w.=,\-\[\]]+', '_', name).strip('_') or 'case'
+
+
+def write_summary(rows: Sequence[Dict[str, Any]], directory: Union[str, Path]) -> List[Path]:
+    """
+    Записывает сводную таблицу в summary.csv и summary.json
+
+    Returns:
+        Пути к записанным файлам
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    csv_path = directory / 'summary.csv'
+    json_path = directory / 'summary.json'
+    with open(csv_path, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.DictWriter(fh, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(json_path, 'w', encoding='utf-8') as fh:
+        json.dump(list(rows), fh, ensure_ascii=False, indent=2)
+    return [csv_path, json_path]
+
+
+def format_table(rows: Sequence[Dict[str, Any]], columns: Sequence[str] = TABLE_COLUMNS) -> str:
+    """Текстовая таблица с выравниванием по столбцам"""
+    def cell(value):
+        if value is None:
+            return '-'
+        if isinstance(value, float):
+            return f"{value:.6g}"
+        return str(value)
+
+    cells = [list(columns)] + [[cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    lines = ['  '.join(text.ljust(width) if i == 0 else text.rjust(width)
+                       for i, (text, width) in enumerate(zip(line, widths)))
+             for line in cells]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
@@ -0,0 +1,86 @@
+"""
+Остановка и продолжение расчета
+
+CancellationToken проверяется в цикле интегрирования на каждом шаге: после
+cancel() расчет останавливается на ближайшем шаге с исключением
+SimulationCancelled, которое содержит контрольную точку. Контрольные точки
+можно также получать по ходу расчета (checkpoint_interval секунд модельного
+времени) и сохранять на диск; SimulationEngine.run(..., resume_from=checkpoint)
+продолжает расчет с той же точки и дает тот же результат, что и расчет без
+остановки.
+"""
+import pickle
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+
+class CancellationToken:
+    """Признак отмены расчета, безопасный для использования из другого потока"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class SimulationCancelled(Exception):
+    """Расчет остановлен через CancellationToken; checkpoint - состояние на момент остановки"""
+
+    def __init__(self, checkpoint: 'SimulationCheckpoint'):
+        super().__init__(f"Расчет остановлен при t = {checkpoint.time:.3f} с")
+        self.checkpoint = checkpoint
+
+
+@dataclass
+class SimulationCheckpoint:
+    """
+    Состояние интегрирования в начале шага
+
+    Содержит все, что нужно для продолжения: время и вектор состояния,
+    состояние интегратора, события парашютов, накопленные максимумы и
+    снимок записанной траектории (или накопленных итогов). Ссылки на модели
+    атмосферы и приемник траектории не сохраняются - их подставляет движок.
+    """
+    input_data: Any
+    # 'output' - полный результат, 'summary' - metrics_only, 'stream' - запись в приемник
+    kind: str
+    time: float
+    state: np.ndarray
+    solver_state: Dict[str, Any]
+    parachute_state: str
+    parachute_events: Dict[str, float]
+    pending_events: List[str]
+    peak_deceleration: float
+    step: int
+    is_event: bool
+    recorder: Any
+    # Позиция приемника после записи всех точек до контрольной (для kind='stream')
+    sink_position: Optional[int] = None
+    version: int = field(default=CHECKPOINT_VERSION)
+
+    def save(self, path: Union[str, Path]):
+        """Сохраняет контрольную точку в файл"""
+        with open(path, 'wb') as fh:
+            pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'SimulationCheckpoint':
+        """Загружает контрольную точку из файла (только из доверенного источника)"""
+        with open(path, 'rb') as fh:
+            checkpoint = pickle.load(fh)
+        if not isinstance(checkpoint, cls):
+            raise ValueError(f"{path}: не контрольная точка расчета")
+        if checkpoint.version > CHECKPOINT_VERSION:
+            raise ValueError(f"{path}: неподдерживаемая версия контрольной точки {checkpoint.version}")
+        return checkpoint
@@ -0,0 +1,459 @@
+"""
+Распределенный расчет набора случаев: координатор и рабочие узлы по TCP
+
+Координатор (Coordinator) делит случаи на блоки и раздает их подключенным
+рабочим узлам (SweepWorker); узел считает случаи блока в своем пуле процессов
+и возвращает только скалярные итоги (batch.summary_values). Узлы шлют
+сигналы присутствия; блоки узла, от которого давно ничего не приходило или
+соединение с которым разорвано, передаются другим узлам.
+
+Протокол: сообщения JSON, каждому предшествует длина ('<I'). Входные данные
+передаются словарями input_to_dict и проверяются на узле (input_from_dict),
+поэтому узлы не исполняют присланный код.
+    узел -> координатор: hello {worker, slots}, heartbeat, result {chunk, results}
+    координатор -> узел: chunk {chunk, metrics_only, cases: [[position, input], ...]}, done
+position - позиция случая в списке координатора; узел возвращает ее в results
+[[position, output, error], ...].
+
+Пример (на одной машине или на разных):
+    coordinator = Coordinator(cases, host='0.0.0.0', port=8766)
+    results = coordinator.run()             # ждет узлы и возвращает SweepResult
+
+    SweepWorker('coordinator-host', 8766, max_workers=8).run()
+"""
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .batch import summary_values
+from .output_io import input_from_dict, input_to_dict
+from .sweep import SweepCase, SweepResult, _run_case
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+# Наибольший размер одного сообщения (байт)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]):
+    """Отправляет сообщение JSON с префиксом длины"""
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(struct.pack('<I', len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        part = sock.recv(size - len(data))
+        if not part:
+            raise ConnectionError("Соединение закрыто")
+        data += part
+    return bytes(data)
+
+
+def recv_message(sock: socket.socket) -> Dict[str, Any]:
+    """Принимает сообщение, отправленное send_message"""
+    length, = struct.unpack('<I', _recv_exact(sock, 4))
+    if length > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"Слишком длинное сообщение: {length} байт")
+    return json.loads(_recv_exact(sock, length).decode('utf-8'))
+
+
+def _scalar_summary(output) -> Dict[str, Any]:
+    # Reducer узла: только скалярные итоги в виде чисел Python для JSON
+    return {key: (float(value) if value is not None else None)
+            for key, value in summary_values(output).items()}
+
+
+@dataclass
+class _Chunk:
+    id: int
+    # Позиции случаев блока в Coordinator.cases
+    positions: List[int]
+    attempts: int = 0
+
+
+@dataclass
+class _Connection:
+    sock: socket.socket
+    address: Any
+    name: str = ''
+    slots: int = 1
+    last_seen: float = field(default_factory=time.monotonic)
+    chunks: Dict[int, _Chunk] = field(default_factory=dict)
+    send_lock: threading.Lock = field(default_factory=threading.Lock)
+    closed: bool = False
+
+    def send(self, message: Dict[str, Any]):
+        with self.send_lock:
+            send_message(self.sock, message)
+
+
+class Coordinator:
+    """
+    Раздает случаи рабочим узлам и собирает результаты
+
+    Результат каждого случая - SweepResult, output которого - словарь
+    скалярных итогов (как у batch.summary_values) либо None с текстом ошибки.
+    """
+
+    def __init__(self, cases: Sequence[SweepCase], host: str = '127.0.0.1', port: int = 8766,
+                 chunk_size: int = 4, metrics_only: bool = False,
+                 heartbeat_timeout: float = 15.0, max_attempts: int = 3,
+                 progress_callback: Optional[Callable] = None):
+        """
+        Args:
+            cases: Случаи; index каждого - только метка, она переносится
+                   в SweepResult.index
+            host: Адрес для подключения узлов ('0.0.0.0' - все интерфейсы)
+            port: Порт; 0 - любой свободный (см. address)
+            chunk_size: Число случаев в блоке
+            metrics_only: Расчет только итогов (SimulationSummary) на узлах
+            heartbeat_timeout: Через сколько секунд без сообщений узел
+                               считается потерянным, а его блоки передаются другим
+            max_attempts: Сколько раз блок выдается узлам; после этого его
+                          случаи считаются неудачными (блок, роняющий узлы)
+            progress_callback: Функция progress_callback(percent, message)
+        """
+        if chunk_size < 1:
+            raise ValueError("Размер блока должен быть положительным")
+        self.cases = list(cases)
+        self.chunk_size = chunk_size
+        self.metrics_only = metrics_only
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.progress_callback = progress_callback
+
+        self._pending = deque(
+            _Chunk(number, list(range(start, min(start + chunk_size, len(self.cases)))))
+            for number, start in enumerate(range(0, len(self.cases), chunk_size))
+        )
+        self._total_chunks = len(self._pending)
+        self._results: List[Optional[SweepResult]] = [None] * len(self.cases)
+        self._completed: set = set()
+        self._connections: List[_Connection] = []
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+        self._listener = socket.create_server((host, port))
+        self._listener.settimeout(0.5)
+
+    @property
+    def address(self):
+        """Адрес (host, port), на котором координатор ждет узлы"""
+        return self._listener.getsockname()[:2]
+
+    def run(self, timeout: Optional[float] = None) -> List[SweepResult]:
+        """
+        Ждет узлы и раздает случаи до получения всех результатов
+
+        Args:
+            timeout: Наибольшее время ожидания (секунд)
+
+        Returns:
+            Список SweepResult в порядке случаев
+
+        Raises:
+            TimeoutError: Не все случаи рассчитаны за timeout
+        """
+        logger.info(f"Coordinator on {self.address}: {len(self.cases)} cases in {self._total_chunks} chunks")
+        if not self.cases:
+            self._listener.close()
+            return []
+        watchdog = threading.Thread(target=self._watchdog, daemon=True)
+        watchdog.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while not self._finished.is_set():
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Рассчитано {len(self._completed)} из {self._total_chunks} блоков")
+                try:
+                    sock, address = self._listener.accept()
+                except socket.timeout:
+                    continue
+                sock.settimeout(None)
+                connection = _Connection(sock, address)
+                threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+        finally:
+            self._finished.set()
+            self._listener.close()
+            with self._lock:
+                connections = list(self._connections)
+            # Узел закрывает соединение сам после done; если сразу закрыть сокет
+            # с непрочитанными сигналами присутствия, done может не дойти
+            for connection in connections:
+                try:
+                    connection.send({'type': 'done'})
+                    connection.sock.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+            deadline = time.monotonic() + 5.0
+            while time.monotonic() < deadline and not all(item.closed for item in connections):
+                time.sleep(0.05)
+            for connection in connections:
+                self._drop(connection, requeue=False)
+        logger.info("Distributed sweep completed")
+        return self._results
+
+    def _serve(self, connection: _Connection):
+        """Поток одного узла: прием сообщений и выдача блоков"""
+        try:
+            hello = recv_message(connection.sock)
+            if hello.get('type') != 'hello' or hello.get('version') != PROTOCOL_VERSION:
+                raise ConnectionError(f"Неподдерживаемое приветствие узла: {hello}")
+            connection.name = str(hello.get('worker', connection.address))
+            connection.slots = max(1, int(hello.get('slots', 1)))
+            with self._lock:
+                self._connections.append(connection)
+            logger.info(f"Worker {connection.name} connected from {connection.address}")
+            self._assign(connection)
+            while True:
+                message = recv_message(connection.sock)
+                connection.last_seen = time.monotonic()
+                if message.get('type') == 'result' and not self._finished.is_set():
+                    self._collect(connection, message)
+                    self._assign(connection)
+        except (OSError, ConnectionError, ValueError) as e:
+            if not connection.closed and not self._finished.is_set():
+                logger.warning(f"Worker {connection.name or connection.address} lost: {e}")
+        finally:
+            self._drop(connection, requeue=True)
+
+    def _assign(self, connection: _Connection):
+        while True:
+            with self._lock:
+                # Узлу выдается на блок больше, чем у него процессов, чтобы они
+                # не простаивали, пока результат идет к координатору
+                outstanding = sum(len(chunk.positions) for chunk in connection.chunks.values())
+                if connection.closed or not self._pending or outstanding >= connection.slots + self.chunk_size:
+                    return
+                chunk = self._pending.popleft()
+                chunk.attempts += 1
+                connection.chunks[chunk.id] = chunk
+            connection.send({
+                'type': 'chunk',
+                'chunk': chunk.id,
+                'metrics_only': self.metrics_only,
+                'cases': [[position, input_to_dict(self.cases[position].input_data)]
+                          for position in chunk.positions]
+            })
+
+    def _collect(self, connection: _Connection, message: Dict[str, Any]):
+        with self._lock:
+            chunk = connection.chunks.pop(message['chunk'], None)
+            # Повторный результат блока, уже полученного от другого узла, не учитывается
+            if chunk is None or chunk.id in self._completed:
+                return
+            for position, output, error in message['results']:
+                case = self.cases[position]
+                self._results[position] = SweepResult(case.index, case.parameters, output, error)
+                if error is not None:
+                    logger.warning(f"Case {case.index} failed on {connection.name}:\n{error}")
+            self._complete(chunk)
+
+    def _complete(self, chunk: _Chunk):
+        # Вызывается под self._lock
+        self._completed.add(chunk.id)
+        done = len(self._completed)
+        if self.progress_callback:
+            self.progress_callback(100 * done / self._total_chunks, f"Chunk {done}/{self._total_chunks}")
+        if done == self._total_chunks:
+            self._finished.set()
+
+    def _drop(self, connection: _Connection, requeue: bool):
+        """Закрывает соединение; невыполненные блоки узла возвращаются в очередь"""
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+            connection.closed = True
+            chunks = list(connection.chunks.values())
+            connection.chunks.clear()
+            requeue = requeue and not self._finished.is_set()
+            for chunk in chunks if requeue else ():
+                if chunk.id in self._completed:
+                    continue
+                if chunk.attempts >= self.max_attempts:
+                    error = f"Блок не рассчитан за {chunk.attempts} попыток (узлы потеряны)"
+                    for position in chunk.positions:
+                        case = self.cases[position]
+                        self._results[position] = SweepResult(case.index, case.parameters, None, error)
+                    logger.warning(f"Chunk {chunk.id} given up after {chunk.attempts} attempts")
+                    self._complete(chunk)
+                else:
+                    self._pending.appendleft(chunk)
+            others = list(self._connections)
+        try:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        connection.sock.close()
+        if chunks and requeue:
+            logger.info(f"Reassigning {len(chunks)} chunks of worker {connection.name}")
+            for other in others:
+                try:
+                    self._assign(other)
+                except OSError:
+                    pass
+
+    def _watchdog(self):
+        """Отключает узлы, от которых нет сообщений дольше heartbeat_timeout"""
+        while not self._finished.wait(min(1.0, self.heartbeat_timeout / 4)):
+            now = time.monotonic()
+            with self._lock:
+                lost = [item for item in self._connections if now - item.last_seen > self.heartbeat_timeout]
+            for connection in lost:
+                logger.warning(f"Worker {connection.name} missed heartbeats")
+                self._drop(connection, requeue=True)
+
+
+class SweepWorker:
+    """
+    Рабочий узел: получает блоки случаев от координатора и считает их
+    в локальном пуле процессов
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8766, max_workers: Optional[int] = None,
+                 heartbeat_interval: float = 3.0, connect_timeout: float = 30.0,
+                 name: Optional[str] = None):
+        """
+        Args:
+            host, port: Адрес координатора
+            max_workers: Число процессов (по умолчанию - число ядер)
+            heartbeat_interval: Период сигналов присутствия (секунд); должен
+                                быть заметно меньше heartbeat_timeout координатора
+            connect_timeout: Сколько секунд ждать запуска координатора
+            name: Имя узла в журнале координатора
+        """
+        self.address = (host, port)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.heartbeat_interval = heartbeat_interval
+        self.connect_timeout = connect_timeout
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._futures = set()
+
+    def _connect(self) -> socket.socket:
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return socket.create_connection(self.address, timeout=10)
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+    def _send(self, sock: socket.socket, message: Dict[str, Any]):
+        with self._send_lock:
+            send_message(sock, message)
+
+    def _heartbeat(self, sock: socket.socket):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self._send(sock, {'type': 'heartbeat'})
+            except OSError:
+                return
+
+    def run(self) -> int:
+        """
+        Считает блоки до сообщения done или разрыва соединения
+
+        Returns:
+            Число рассчитанных блоков
+        """
+        sock = self._connect()
+        sock.settimeout(None)
+        self._stop.clear()
+        completed = 0
+        lock = threading.Lock()
+        logger.info(f"Worker {self.name} connected to {self.address} with {self.max_workers} processes")
+        try:
+            self._send(sock, {'type': 'hello', 'version': PROTOCOL_VERSION,
+                              'worker': self.name, 'slots': self.max_workers})
+            threading.Thread(target=self._heartbeat, args=(sock,), daemon=True).start()
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                while True:
+                    try:
+                        message = recv_message(sock)
+                    except (OSError, ConnectionError):
+                        logger.warning("Connection to coordinator lost")
+                        break
+                    if message.get('type') == 'done':
+                        break
+                    if message.get('type') != 'chunk':
+                        continue
+                    try:
+                        self._start_chunk(executor, sock, message, lock)
+                    except BrokenProcessPool:
+                        break
+                    completed += 1
+                # Незавершенные случаи после разрыва не нужны: их пересчитают другие узлы
+                self._stop.set()
+                with lock:
+                    futures = list(self._futures)
+                for future in futures:
+                    future.cancel()
+        finally:
+            self._stop.set()
+            sock.close()
+        logger.info(f"Worker {self.name} finished")
+        return completed
+
+    def _start_chunk(self, executor, sock, message: Dict[str, Any], lock: threading.Lock):
+        chunk_id = message['chunk']
+        metrics_only = bool(message.get('metrics_only', False))
+        results = []
+        remaining = len(message['cases'])
+
+        def collect(result):
+            nonlocal remaining
+            with lock:
+                results.append(result)
+                remaining -= 1
+                last = remaining == 0
+            if last and not self._stop.is_set():
+                try:
+                    self._send(sock, {'type': 'result', 'chunk': chunk_id, 'results': results})
+                except OSError:
+                    pass
+
+        def done(future, index):
+            with lock:
+                self._futures.discard(future)
+            if future.cancelled():
+                return
+            try:
+                collect(list(future.result()))
+            except BrokenProcessPool:
+                # Рабочий процесс упал, пул непригоден: узел отключается, и
+                # координатор передает его блоки другим узлам
+                logger.error("Process pool is broken, disconnecting")
+                self._stop.set()
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            except Exception:
+                collect([index, None, traceback.format_exc()])
+
+        for index, input_dict in message['cases']:
+            try:
+                input_data = input_from_dict(input_dict)
+            except (TypeError, ValueError):
+                collect([index, None, traceback.format_exc()])
+                continue
+            future = executor.submit(_run_case, index, input_data, _scalar_summary, metrics_only)
+            with lock:
+                self._futures.add(future)
+            future.add_done_callback(lambda future, index=index: done(future, index))
@@ -0,0 +1,354 @@
+"""
+Ансамблевый интегратор: N траекторий продвигаются одновременно
+одним векторным шагом NumPy
+"""
+import numpy as np
+from typing import Callable, Dict, Optional, Sequence
+from dataclasses import dataclass, field, fields
+import logging
+
+from .materials import VenusAtmosphere, DragExponentModel
+from .thermal import ThermalCalculator, ThermalProperties, AblationTracker
+from .structure import calculate_airship_mass
+from .trajectory_buffer import PARACHUTE_STATE_CODES, PARACHUTE_STATE_NAMES
+
+logger = logging.getLogger(__name__)
+
+PARACHUTE_EVENT_NAMES = ('brake_deploy', 'main_deploy', 'brake_jettison')
+
+
+@dataclass
+class EnsembleInput:
+    """
+    Параметры ансамбля траекторий. Каждое поле - скаляр или массив,
+    приводимый к общей длине ансамбля. Поля thermal_properties также
+    могут быть массивами.
+    """
+    entry_speed: np.ndarray
+    entry_angle: np.ndarray
+    mass: np.ndarray
+    drag_coefficient: np.ndarray = 0.3
+    cross_section_area: np.ndarray = 1.5
+    entry_height: np.ndarray = 250000.0
+    simulation_time: np.ndarray = 400.0
+    use_parachutes: np.ndarray = False
+    brake_chute_area: np.ndarray = 4.0
+    main_chute_area: np.ndarray = 40.0
+    brake_chute_coeff: np.ndarray = 0.8
+    main_chute_coeff: np.ndarray = 1.2
+    brake_deploy_velocity: np.ndarray = 400.0
+    brake_jettison_velocity: np.ndarray = 50.0
+    main_deploy_velocity: np.ndarray = 50.0
+    thermal_properties: ThermalProperties = field(default_factory=ThermalProperties)
+    integration_step: float = 0.001
+
+    @property
+    def size(self) -> int:
+        arrays = [np.asarray(getattr(self, f.name)) for f in fields(self)
+                  if f.name not in ('thermal_properties', 'integration_step')]
+        return int(np.broadcast(*arrays).size) if arrays else 0
+
+    @classmethod
+    def from_simulation_inputs(cls, inputs: Sequence) -> 'EnsembleInput':
+        """
+        Собирает ансамбль из списка SimulationInput
+
+        Масса в режиме 'airship' рассчитывается так же, как в SimulationEngine.
+        Шаг интегрирования общий для ансамбля - берется наименьший.
+        """
+        def column(getter):
+            return np.array([getter(item) for item in inputs])
+
+        def vehicle_mass(item):
+            if item.mass_calculation_mode == 'airship':
+                return calculate_airship_mass(
+                    envelope_density=item.envelope_density,
+                    payload_mass=item.payload_mass,
+                    gas_lift=item.gas_lift,
+                    heat_shield_thickness=item.thermal_properties.thickness,
+                    heat_shield_density=item.thermal_properties.density,
+                    heat_shield_area=item.heat_shield_area
+                )['total_mass']
+            return item.mass_specified
+
+        thermal = ThermalProperties(**{
+            f.name: column(lambda item, name=f.name: getattr(item.thermal_properties, name))
+            for f in fields(ThermalProperties)
+        })
+
+        return cls(
+            entry_speed=column(lambda item: item.entry_speed),
+            entry_angle=column(lambda item: item.entry_angle),
+            mass=column(vehicle_mass),
+            drag_coefficient=column(lambda item: item.drag_coefficient),
+            cross_section_area=column(lambda item: item.cross_section_area),
+            entry_height=column(lambda item: item.entry_height),
+            simulation_time=column(lambda item: item.simulation_time),
+            use_parachutes=column(lambda item: item.parachute_system.use_parachutes),
+            brake_chute_area=column(lambda item: item.parachute_system.brake_chute_area),
+            main_chute_area=column(lambda item: item.parachute_system.main_chute_area),
+            brake_chute_coeff=column(lambda item: item.parachute_system.brake_chute_coeff),
+            main_chute_coeff=column(lambda item: item.parachute_system.main_chute_coeff),
+            brake_deploy_velocity=column(lambda item: item.parachute_system.brake_deploy_velocity),
+            brake_jettison_velocity=column(lambda item: item.parachute_system.brake_jettison_velocity),
+            main_deploy_velocity=column(lambda item: item.parachute_system.main_deploy_velocity),
+            thermal_properties=thermal,
+            integration_step=min(item.integration_step for item in inputs)
+        )
+
+
+@dataclass
+class EnsembleOutput:
+    """Итоговые скалярные характеристики каждой траектории ансамбля"""
+    flight_time: np.ndarray
+    final_velocity: np.ndarray
+    final_height: np.ndarray
+    landed: np.ndarray
+    landing_velocity: np.ndarray
+    peak_deceleration: np.ndarray
+    max_heat_flux: np.ndarray
+    energy_per_area: np.ndarray
+    surface_temperature: np.ndarray
+    ablated_mass: np.ndarray
+    ablated_fraction: np.ndarray
+    parachute_state: np.ndarray
+    parachute_events: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.flight_time)
+
+    def member(self, index: int) -> Dict[str, float]:
+        """Результаты одной траектории в виде словаря скаляров"""
+        result = {
+            f.name: getattr(self, f.name)[index].item()
+            for f in fields(self) if f.name not in ('parachute_state', 'parachute_events')
+        }
+        result['parachute_state'] = PARACHUTE_STATE_NAMES[int(self.parachute_state[index])]
+        result['parachute_events'] = {
+            key: values[index].item() for key, values in self.parachute_events.items()
+            if not np.isnan(values[index])
+        }
+        return result
+
+
+class EnsembleEngine:
+    """
+    Интегрирует ансамбль траекторий явным методом Эйлера с общим шагом.
+    Завершившиеся траектории маскируются и больше не изменяются.
+
+    События (парашюты, касание поверхности) обрабатываются как в
+    SimulationEngine: шаг траектории обрывается в точке события, и
+    следующий шаг начинается из нее с новым состоянием парашютов.
+    Результаты совпадают со скалярным расчетом методом Эйлера с тем же
+    шагом до ошибок округления.
+    """
+
+    def __init__(self,
+                 atmosphere: Optional[VenusAtmosphere] = None,
+                 drag_model: Optional[DragExponentModel] = None):
+        self.atmosphere = atmosphere or VenusAtmosphere()
+        self.drag_model = drag_model or DragExponentModel()
+        self.thermal = ThermalCalculator()
+
+    def run(self, ensemble: EnsembleInput,
+            progress_callback: Optional[Callable] = None) -> EnsembleOutput:
+        n = ensemble.size
+        logger.info(f"Starting ensemble simulation of {n} trajectories...")
+
+        def param(name):
+            return np.broadcast_to(np.asarray(getattr(ensemble, name), dtype=float), (n,)).copy()
+
+        mass = param('mass')
+        drag_area = param('drag_coefficient') * param('cross_section_area')
+        drag_coefficient = param('drag_coefficient')
+        brake_drag_area = param('brake_chute_coeff') * param('brake_chute_area')
+        main_drag_area = param('main_chute_coeff') * param('main_chute_area')
+        use_parachutes = param('use_parachutes').astype(bool)
+        thresholds = {
+            'brake_deploy': param('brake_deploy_velocity'),
+            'main_deploy': param('main_deploy_velocity'),
+            'brake_jettison': param('brake_jettison_velocity'),
+        }
+        t_end = param('simulation_time')
+        dt = ensemble.integration_step
+
+        angle = np.radians(param('entry_angle'))
+        speed = param('entry_speed')
+        vx = speed * np.cos(angle)
+        vy = -speed * np.sin(angle)
+        height = param('entry_height')
+        # Время у каждой траектории свое: после события шаг начинается из точки события
+        t = np.zeros(n)
+
+        active = np.ones(n, dtype=bool)
+        landed = np.zeros(n, dtype=bool)
+        flight_time = np.zeros(n)
+        landing_velocity = np.full(n, np.nan)
+        deployed = {name: np.zeros(n, dtype=bool) for name in PARACHUTE_EVENT_NAMES}
+        events = {
+            f'{name}_{quantity}': np.full(n, np.nan)
+            for name in PARACHUTE_EVENT_NAMES for quantity in ('time', 'velocity', 'height')
+        }
+
+        peak_deceleration = np.zeros(n)
+        max_heat_flux = np.zeros(n)
+        ablation = AblationTracker(ensemble.thermal_properties, (n,))
+        g_surface = self.atmosphere.constants.GRAVITY_SURFACE
+
+        def pending(name):
+            if name == 'brake_deploy':
+                return use_parachutes & ~deployed['brake_deploy']
+            return deployed['brake_deploy'] & ~deployed[name]
+
+        def record_event(name, mask):
+            events[f'{name}_time'][mask] = t[mask]
+            events[f'{name}_velocity'][mask] = np.hypot(vx, vy)[mask]
+            events[f'{name}_height'][mask] = height[mask]
+            deployed[name] |= mask
+
+        def fire_satisfied_events(mask):
+            # Срабатывают события, условие которых уже выполнено в текущей точке:
+            # например, при совпадающих порогах открытия основного и отстрела тормозного
+            v_now = np.hypot(vx, vy)
+            fired = True
+            while fired:
+                fired = False
+                for name in PARACHUTE_EVENT_NAMES:
+                    satisfied = mask & pending(name) & (v_now - thresholds[name] <= 0)
+                    if satisfied.any():
+                        record_event(name, satisfied)
+                        fired = True
+
+        def parachute_state():
+            brake = deployed['brake_deploy'] & ~deployed['brake_jettison']
+            main = deployed['main_deploy']
+            return (brake * PARACHUTE_STATE_CODES['brake'] + main * PARACHUTE_STATE_CODES['main']).astype(np.int8)
+
+        fire_satisfied_events(active)
+        state = parachute_state()
+
+        v = np.hypot(vx, vy)
+        rho = self.atmosphere.density(height)
+        q = self.thermal.calculate_heat_flux(v, rho, drag_coefficient)
+        max_heat_flux = np.maximum(max_heat_flux, q)
+
+        step = 0
+        n_steps_estimate = int(np.max(t_end) / dt) + 1
+
+        while True:
+            # Ускорения и перегрузка в текущей точке
+            n_exp = self.drag_model.n_values(v)
+            moving = v > 1e-3
+            body_drag = 0.5 * rho * drag_area * np.power(v, n_exp)
+            chute_area = np.where((state == 1) | (state == 3), brake_drag_area, 0.0) + \
+                np.where(state >= 2, main_drag_area, 0.0)
+            chute_drag = 0.5 * rho * chute_area * v * v
+            drag_accel = np.where(moving, (body_drag + chute_drag) / mass, 0.0)
+            v_safe = np.where(moving, v, 1.0)
+            ax = -drag_accel * vx / v_safe
+            ay = -drag_accel * vy / v_safe - self.atmosphere.gravity(height)
+            peak_deceleration = np.where(active, np.maximum(peak_deceleration, drag_accel / g_surface),
+                                         peak_deceleration)
+
+            finished = active & ((t >= t_end) | ((v < 1.0) & (height < 1000)))
+            flight_time[finished] = t[finished]
+            active &= ~finished
+            if not active.any():
+                break
+
+            # Шаг Эйлера; последний шаг укорачивается до simulation_time
+            h = np.minimum(dt, t_end - t)
+            t_old, vx_old, vy_old, h_old, v_old = t, vx, vy, height, v
+            t = np.where(active, np.where(t_end - (t + h) < 1e-3 * dt, t_end, t + h), t)
+            vx = np.where(active, vx + ax * h, vx)
+            vy = np.where(active, vy + ay * h, vy)
+            height = np.where(active, height + vy_old * h, height)
+            v = np.hypot(vx, vy)
+
+            # Самое раннее событие на шаге (касание поверхности или порог скорости).
+            # Решение Эйлера внутри шага линейно, поэтому доля шага до порога
+            # скорости - меньший корень квадратного уравнения |v_old + s*dv| = порог
+            event_fraction = np.full(n, np.inf)
+            event_index = np.full(n, -1)
+            crossed = active & (h_old > 0) & (height <= 0)
+            if crossed.any():
+                drop = np.where(crossed, h_old - height, 1.0)
+                event_fraction = np.where(crossed, np.where(height == 0, 1.0, h_old / drop), event_fraction)
+                event_index = np.where(crossed, 0, event_index)
+            for number, name in enumerate(PARACHUTE_EVENT_NAMES, start=1):
+                threshold = thresholds[name]
+                crossed = active & pending(name) & (v_old - threshold > 0) & (v - threshold <= 0)
+                if not crossed.any():
+                    continue
+                dvx, dvy = vx - vx_old, vy - vy_old
+                a = dvx * dvx + dvy * dvy
+                b = vx_old * dvx + vy_old * dvy
+                c = v_old * v_old - threshold * threshold
+                root = np.sqrt(np.maximum(b * b - a * c, 0.0))
+                denominator = np.where(crossed, root - b, 1.0)
+                fraction = np.where(v - threshold == 0, 1.0,
+                                    np.clip(c / np.where(denominator > 0, denominator, 1.0), 0.0, 1.0))
+                earlier = crossed & (fraction < event_fraction)
+                event_fraction = np.where(earlier, fraction, event_fraction)
+                event_index = np.where(earlier, number, event_index)
+
+            has_event = event_index >= 0
+            if has_event.any():
+                s = np.where(has_event & (event_fraction < 1.0), event_fraction, 1.0)
+                t = np.where(has_event & (s < 1.0), t_old + s * (t - t_old), t)
+                vx = np.where(has_event, vx_old + s * (vx - vx_old), vx)
+                vy = np.where(has_event, vy_old + s * (vy - vy_old), vy)
+                height = np.where(has_event, h_old + s * (height - h_old), height)
+
+                hit_ground = event_index == 0
+                if hit_ground.any():
+                    landed |= hit_ground
+                    flight_time[hit_ground] = t[hit_ground]
+                    landing_velocity[hit_ground] = np.hypot(vx, vy)[hit_ground]
+                    vx = np.where(hit_ground, 0.0, vx)
+                    vy = np.where(hit_ground, 0.0, vy)
+                    height = np.where(hit_ground, 0.0, height)
+
+                for number, name in enumerate(PARACHUTE_EVENT_NAMES, start=1):
+                    record_event(name, event_index == number)
+                fire_satisfied_events(event_index > 0)
+                state = parachute_state()
+                v = np.hypot(vx, vy)
+
+            rho = self.atmosphere.density(height)
+            q_new = self.thermal.calculate_heat_flux(v, rho, drag_coefficient)
+            ablation.add(t - t_old, 0.5 * (q + q_new), active)
+            max_heat_flux = np.where(active, np.maximum(max_heat_flux, q_new), max_heat_flux)
+            q = q_new
+
+            if has_event.any():
+                active &= ~hit_ground
+
+            step += 1
+            if progress_callback and step % 1000 == 0:
+                progress = min(99, 100 * step / n_steps_estimate)
+                progress_callback(progress, f"t = {np.max(t):.1f} с, активных траекторий: {int(active.sum())}")
+
+        props = ensemble.thermal_properties
+        initial_mass_per_area = ablation.initial_mass_per_area
+        ablated_fraction = np.where(initial_mass_per_area > 0,
+                                    ablation.ablated_mass / np.where(initial_mass_per_area > 0,
+                                                                     initial_mass_per_area, 1.0),
+                                    0.0)
+
+        logger.info("Ensemble simulation completed")
+        return EnsembleOutput(
+            flight_time=flight_time,
+            final_velocity=v,
+            final_height=height,
+            landed=landed,
+            landing_velocity=landing_velocity,
+            peak_deceleration=peak_deceleration,
+            max_heat_flux=max_heat_flux,
+            energy_per_area=ablation.energy_per_area,
+            surface_temperature=ablation.temperature,
+            ablated_mass=ablation.ablated_mass * np.broadcast_to(props.area, (n,)),
+            ablated_fraction=ablated_fraction,
+            parachute_state=state,
+            parachute_events=events
+        )
@@ -3,23 +3,58 @@
 """
 
 try:
-    from .materials import VenusAtmosphere, DragExponentModel, AtmosphericProfile
+    from .materials import VenusAtmosphere, DragExponentModel, AtmosphericProfile, UniformTable
     from .physics import PhysicsEngine, VehicleParameters, InitialConditions
-    from .simulation import SimulationEngine, SimulationInput, SimulationOutput, ParachuteSystem
-    from .thermal import ThermalCalculator, ThermalProperties, ThermalLoad
+    from .simulation import SimulationEngine, SimulationInput, SimulationOutput, SimulationSummary, ParachuteSystem
+    from .thermal import ThermalCalculator, ThermalProperties, ThermalLoad, AblationTracker
     from .structure import calculate_airship_mass, calculate_heat_shield_mass, calculate_ballistic_coefficient, calculate_nose_radius_from_area
     from .orbital import calculate_orbital_trajectory, calculate_angular_displacement, calculate_arc_distance, calculate_orbital_velocity, calculate_escape_velocity
+    from .integrators import ExplicitEuler, DormandPrince45, Event, locate_event, first_event
+    from .ensemble import EnsembleEngine, EnsembleInput, EnsembleOutput
+    from .trajectory_buffer import TrajectoryBuffer, StreamingBuffer, PARACHUTE_STATE_CODES, PARACHUTE_STATE_NAMES, decode_parachute_states
+    from .sweep import SweepRunner, SweepCase, SweepResult, set_input_value, run_cases
+    from .streaming_stats import RunningMoments, QuantileSketch, StreamingHistogram, MetricAccumulator
+    from .montecarlo import MonteCarloRunner, MonteCarloResult, Normal, Uniform, Triangular, sample_inputs
+    from .kernels import trapezoid, cumulative_trapezoid, distance
+    from .stages import StageCache, input_key
+    from .output_io import dumps_output, loads_output, input_to_dict, input_from_dict, save_output, load_output, save_outputs, load_outputs, loads_outputs
+    from .result_cache import ResultCache, input_hash, model_fingerprint
+    from .checkpoint import CancellationToken, SimulationCancelled, SimulationCheckpoint
+    from .sinks import TrajectorySink, BinaryTrajectorySink, CsvTrajectorySink, read_trajectory
+    from .batch import load_cases, cases_from_data, summary_row, summary_values, write_summary
+    from .service import SimulationService, SimulationClient, ServiceError
+    from .distributed import Coordinator, SweepWorker
+    from .shared_results import SharedResultTransport, SharedOutputHandle
+    from .async_runner import AsyncSimulationRunner, SimulationProgress, run_async, run_many_async
     
     __all__ = [
-        'VenusAtmosphere', 'DragExponentModel', 'AtmosphericProfile',
+        'VenusAtmosphere', 'DragExponentModel', 'AtmosphericProfile', 'UniformTable',
         'PhysicsEngine', 'VehicleParameters', 'InitialConditions',
-        'SimulationEngine', 'SimulationInput', 'SimulationOutput', 'ParachuteSystem',
-        'ThermalCalculator', 'ThermalProperties', 'ThermalLoad',
+        'SimulationEngine', 'SimulationInput', 'SimulationOutput', 'SimulationSummary', 'ParachuteSystem',
+        'ThermalCalculator', 'ThermalProperties', 'ThermalLoad', 'AblationTracker',
         'calculate_airship_mass', 'calculate_heat_shield_mass', 
         'calculate_ballistic_coefficient', 'calculate_nose_radius_from_area',
         'calculate_orbital_trajectory', 'calculate_angular_displacement', 
         'calculate_arc_distance', 'calculate_orbital_velocity', 
-        'calculate_escape_velocity'
+        'calculate_escape_velocity',
+        'ExplicitEuler', 'DormandPrince45', 'Event', 'locate_event', 'first_event',
+        'EnsembleEngine', 'EnsembleInput', 'EnsembleOutput',
+        'TrajectoryBuffer', 'StreamingBuffer', 'PARACHUTE_STATE_CODES', 'PARACHUTE_STATE_NAMES', 'decode_parachute_states',
+        'SweepRunner', 'SweepCase', 'SweepResult', 'set_input_value', 'run_cases',
+        'RunningMoments', 'QuantileSketch', 'StreamingHistogram', 'MetricAccumulator',
+        'MonteCarloRunner', 'MonteCarloResult', 'Normal', 'Uniform', 'Triangular', 'sample_inputs',
+        'trapezoid', 'cumulative_trapezoid', 'distance',
+        'StageCache', 'input_key',
+        'dumps_output', 'loads_output', 'input_to_dict', 'input_from_dict',
+        'save_output', 'load_output', 'save_outputs', 'load_outputs', 'loads_outputs',
+        'ResultCache', 'input_hash', 'model_fingerprint',
+        'CancellationToken', 'SimulationCancelled', 'SimulationCheckpoint',
+        'TrajectorySink', 'BinaryTrajectorySink', 'CsvTrajectorySink', 'read_trajectory',
+        'load_cases', 'cases_from_data', 'summary_row', 'summary_values', 'write_summary',
+        'SimulationService', 'SimulationClient', 'ServiceError',
+        'Coordinator', 'SweepWorker',
+        'SharedResultTransport', 'SharedOutputHandle',
+        'AsyncSimulationRunner', 'SimulationProgress', 'run_async', 'run_many_async'
     ]
 except ImportError as e:
     print(f"Ошибка импорта в core: {e}")
@@ -0,0 +1,320 @@
+"""
+Численные интеграторы уравнений движения
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+
+
+# Коэффициенты схемы Дормана-Принса 5(4)
+_DP_C = np.array([0.0, 1/5, 3/10, 4/5, 8/9, 1.0])
+_DP_A = [
+    np.array([]),
+    np.array([1/5]),
+    np.array([3/40, 9/40]),
+    np.array([44/45, -56/15, 32/9]),
+    np.array([19372/6561, -25360/2187, 64448/6561, -212/729]),
+    np.array([9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]),
+]
+_DP_B = np.array([35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84])
+# Разность решений 5-го и 4-го порядков (оценка локальной ошибки)
+_DP_E = np.array([71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+# Непрерывное продолжение 4-го порядка (коэффициенты при theta, theta², theta³, theta⁴)
+_DP_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+
+def _rms_norm(x: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(x * x)))
+
+
+@dataclass
+class Event:
+    """
+    Событие интегрирования - нуль функции function(t, y)
+
+    direction задает направление пересечения: -1 - сверху вниз,
+    +1 - снизу вверх, 0 - любое.
+    """
+    name: str
+    function: Callable[[float, np.ndarray], float]
+    direction: int = -1
+
+    def __call__(self, t: float, y: np.ndarray) -> float:
+        return self.function(t, y)
+
+
+class OdeSolver:
+    """Базовый класс интеграторов с пошаговым интерфейсом"""
+
+    def __init__(self,
+                 fun: Callable[[float, np.ndarray], np.ndarray],
+                 t0: float,
+                 y0: np.ndarray,
+                 t_bound: float):
+        self.fun = fun
+        self.t_bound = t_bound
+        self.t = t0
+        self.y = np.asarray(y0, dtype=float)
+        self.f = np.asarray(fun(t0, self.y), dtype=float)
+        self.t_old = t0
+        self.y_old = self.y
+
+    @property
+    def finished(self) -> bool:
+        return self.t >= self.t_bound
+
+    def restart(self, t: float, y: np.ndarray) -> None:
+        """
+        Продолжает интегрирование из точки (t, y) после разрыва правой части
+        (например, смены конфигурации парашютов). Текущий шаг сохраняется.
+        """
+        self.t = t
+        self.y = np.asarray(y, dtype=float)
+        self.f = np.asarray(self.fun(t, self.y), dtype=float)
+
+    def get_state(self) -> dict:
+        """Состояние, достаточное для продолжения интегрирования (см. set_state)"""
+        return {'t': self.t, 'y': self.y.copy(), 'h': self.h}
+
+    def set_state(self, state: dict) -> None:
+        """Продолжает интегрирование из состояния get_state"""
+        self.h = state['h']
+        self.restart(state['t'], state['y'])
+
+    def step(self) -> None:
+        raise NotImplementedError
+
+    def dense_output(self) -> Callable[[float], np.ndarray]:
+        """Интерполянт решения на последнем принятом шаге [t_old, t]"""
+        raise NotImplementedError
+
+
+class ExplicitEuler(OdeSolver):
+    """Явный метод Эйлера с фиксированным шагом"""
+
+    def __init__(self,
+                 fun: Callable[[float, np.ndarray], np.ndarray],
+                 t0: float,
+                 y0: np.ndarray,
+                 t_bound: float,
+                 step: float = 0.001):
+        """
+        Args:
+            fun: Правая часть системы dy/dt = fun(t, y)
+            t0: Начальное время (с)
+            y0: Начальный вектор состояния
+            t_bound: Конечное время интегрирования (с)
+            step: Шаг интегрирования (с)
+        """
+        super().__init__(fun, t0, y0, t_bound)
+        self.h = step
+
+    def step(self) -> None:
+        h = min(self.h, self.t_bound - self.t)
+        self.t_old, self.y_old = self.t, self.y
+        self.y = self.y + h * self.f
+        # Последний шаг укорачивается до t_bound; защищаемся от накопления ошибки округления
+        self.t = self.t_bound if self.t_bound - (self.t + h) < 1e-3 * self.h else self.t + h
+        self.f = np.asarray(self.fun(self.t, self.y), dtype=float)
+
+    def dense_output(self) -> Callable[[float], np.ndarray]:
+        # Решение Эйлера - ломаная, внутри шага оно линейно
+        t_old, y_old = self.t_old, self.y_old
+        h = self.t - t_old
+        dy = self.y - y_old
+
+        def interpolant(t: float) -> np.ndarray:
+            return y_old + dy * ((t - t_old) / h)
+
+        return interpolant
+
+
+class DormandPrince45(OdeSolver):
+    """
+    Адаптивный интегратор Рунге-Кутты 5(4) Дормана-Принса
+
+    Шаг принимается, если среднеквадратичная по компонентам нормированная
+    оценка локальной ошибки не больше 1:
+        sqrt(mean((err_i / (atol + rtol * max(|y_i|, |y_new_i|)))**2)) <= 1,
+    как в scipy.integrate.RK45. Отдельная компонента может превышать свой
+    допуск (не больше чем в sqrt(n) раз для n компонент).
+    """
+
+    SAFETY: float = 0.9
+    MIN_FACTOR: float = 0.2
+    MAX_FACTOR: float = 10.0
+
+    def __init__(self,
+                 fun: Callable[[float, np.ndarray], np.ndarray],
+                 t0: float,
+                 y0: np.ndarray,
+                 t_bound: float,
+                 rtol: float = 1e-6,
+                 atol: float = 1e-6,
+                 max_step: float = np.inf,
+                 first_step: Optional[float] = None):
+        """
+        Args:
+            fun: Правая часть системы dy/dt = fun(t, y)
+            t0: Начальное время (с)
+            y0: Начальный вектор состояния
+            t_bound: Конечное время интегрирования (с)
+            rtol: Относительный допуск
+            atol: Абсолютный допуск (скаляр или по компонентам)
+            max_step: Максимальный шаг (с)
+            first_step: Начальный шаг (с); если не задан, выбирается автоматически
+        """
+        super().__init__(fun, t0, y0, t_bound)
+        self.rtol = rtol
+        self.atol = np.asarray(atol, dtype=float)
+        self.max_step = max_step
+        self.n_rejected = 0
+        self.K = None
+
+        if first_step is None:
+            self.h = self._select_initial_step()
+        else:
+            self.h = min(first_step, max_step)
+
+    def _select_initial_step(self) -> float:
+        """Оценка начального шага (Hairer, Nørsett, Wanner, разд. II.4)"""
+        interval = self.t_bound - self.t
+        if interval <= 0:
+            return 0.0
+
+        scale = self.atol + self.rtol * np.abs(self.y)
+        d0 = _rms_norm(self.y / scale)
+        d1 = _rms_norm(self.f / scale)
+        h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+        h0 = min(h0, interval)
+
+        y1 = self.y + h0 * self.f
+        f1 = np.asarray(self.fun(self.t + h0, y1), dtype=float)
+        d2 = _rms_norm((f1 - self.f) / scale) / h0
+
+        if d1 <= 1e-15 and d2 <= 1e-15:
+            h1 = max(1e-6, h0 * 1e-3)
+        else:
+            h1 = (0.01 / max(d1, d2)) ** (1 / 5)
+
+        return min(100 * h0, h1, interval, self.max_step)
+
+    def _rk_step(self, h: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        t, y = self.t, self.y
+        K = np.empty((7, y.size))
+        K[0] = self.f
+        for s in range(1, 6):
+            dy = h * (_DP_A[s] @ K[:s])
+            K[s] = self.fun(t + _DP_C[s] * h, y + dy)
+        y_new = y + h * (_DP_B @ K[:6])
+        f_new = np.asarray(self.fun(t + h, y_new), dtype=float)
+        K[6] = f_new
+        return y_new, f_new, K
+
+    def step(self) -> None:
+        """Выполняет один принятый шаг, при необходимости уменьшая его"""
+        h = min(self.h, self.max_step, self.t_bound - self.t)
+
+        while True:
+            y_new, f_new, K = self._rk_step(h)
+            scale = self.atol + self.rtol * np.maximum(np.abs(self.y), np.abs(y_new))
+            error_norm = _rms_norm(h * (_DP_E @ K) / scale)
+
+            if error_norm <= 1.0:
+                if error_norm == 0:
+                    factor = self.MAX_FACTOR
+                else:
+                    factor = min(self.MAX_FACTOR, self.SAFETY * error_norm ** (-1 / 5))
+                break
+
+            self.n_rejected += 1
+            h *= max(self.MIN_FACTOR, self.SAFETY * error_norm ** (-1 / 5))
+            if h < 10 * np.spacing(self.t):
+                raise RuntimeError(f"Шаг интегрирования стал слишком мал при t={self.t:.6f} с")
+
+        self.t_old, self.y_old = self.t, self.y
+        self.t = self.t + h
+        self.y = y_new
+        self.f = f_new
+        self.K = K
+        self.h = h * factor
+
+    def get_state(self) -> dict:
+        state = super().get_state()
+        state['n_rejected'] = self.n_rejected
+        return state
+
+    def set_state(self, state: dict) -> None:
+        super().set_state(state)
+        self.n_rejected = state.get('n_rejected', 0)
+
+    def dense_output(self) -> Callable[[float], np.ndarray]:
+        t_old, y_old = self.t_old, self.y_old
+        h = self.t - t_old
+        Q = self.K.T @ _DP_P
+
+        def interpolant(t: float) -> np.ndarray:
+            x = (t - t_old) / h
+            return y_old + h * (Q @ np.array([x, x * x, x ** 3, x ** 4]))
+
+        return interpolant
+
+
+def locate_event(event: Event, solver: OdeSolver) -> Optional[float]:
+    """
+    Ищет нуль функции события на последнем шаге интегратора
+
+    Args:
+        event: Событие
+        solver: Интегратор после выполнения шага
+
+    Returns:
+        Время события (с) или None, если на шаге пересечения нет
+    """
+    g_new = event(solver.t, solver.y)
+    if (event.direction < 0 and g_new > 0) or (event.direction > 0 and g_new < 0):
+        return None
+    g_old = event(solver.t_old, solver.y_old)
+
+    crossed_down = g_old > 0 >= g_new
+    crossed_up = g_old < 0 <= g_new
+    if event.direction < 0 and not crossed_down:
+        return None
+    if event.direction > 0 and not crossed_up:
+        return None
+    if event.direction == 0 and not (crossed_down or crossed_up):
+        return None
+
+    if g_new == 0:
+        return solver.t
+
+    # scipy.optimize импортируется здесь, а не при импорте модуля: он занимает
+    # больше половины времени запуска, а события нужны не в каждом расчете
+    from scipy.optimize import brentq
+
+    sol = solver.dense_output()
+    return brentq(lambda t: event(t, sol(t)), solver.t_old, solver.t,
+                  xtol=4 * np.finfo(float).eps * max(1.0, abs(solver.t)))
+
+
+def first_event(events: Sequence[Event], solver: OdeSolver) -> Optional[Tuple[float, Event]]:
+    """
+    Находит самое раннее из событий на последнем шаге интегратора
+
+    Returns:
+        (время события, событие) или None
+    """
+    result = None
+    for event in events:
+        t_event = locate_event(event, solver)
+        if t_event is not None and (result is None or t_event < result[0]):
+            result = (t_event, event)
+    return result
@@ -0,0 +1,58 @@
+"""
+Векторные вычислительные ядра для рядов вдоль траектории
+
+Используются ядром симуляции, графиками и окном результатов вместо
+поэлементных циклов Python.
+"""
+import numpy as np
+
+
+def trapezoid(y: np.ndarray, x: np.ndarray) -> float:
+    """
+    Интеграл методом трапеций
+
+    Args:
+        y: Значения функции
+        x: Узлы (например, время)
+
+    Returns:
+        Значение интеграла (0 при числе точек меньше двух)
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    if len(x) < 2:
+        return 0.0
+    return float(np.sum((y[1:] + y[:-1]) / 2.0 * np.diff(x)))
+
+
+def cumulative_trapezoid(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Накопленный интеграл методом трапеций
+
+    Args:
+        y: Значения функции
+        x: Узлы (например, время)
+
+    Returns:
+        Массив той же длины, что x; первый элемент равен 0
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    result = np.zeros(len(x))
+    if len(x) > 1:
+        np.cumsum((y[1:] + y[:-1]) / 2.0 * np.diff(x), out=result[1:])
+    return result
+
+
+def distance(velocity: np.ndarray, time: np.ndarray) -> np.ndarray:
+    """
+    Пройденное расстояние по проекции скорости
+
+    Args:
+        velocity: Проекция скорости (м/с)
+        time: Время (с)
+
+    Returns:
+        Накопленное расстояние (м)
+    """
+    return cumulative_trapezoid(velocity, time)
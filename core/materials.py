@@ -1,11 +1,14 @@
 """
 Модели атмосферы Венеры
 """
+import math
 import numpy as np
 from typing import Tuple, Optional, List
 from dataclasses import dataclass
-from scipy.interpolate import interp1d
-import matplotlib.pyplot as plt
+
+# scipy.interpolate и matplotlib импортируются в методах, где они нужны:
+# импорт core их не загружает, scipy.interpolate загружается при построении
+# таблиц атмосферы
 
 
 @dataclass
@@ -39,13 +42,98 @@ class AtmosphericConstants:
     PRESSURE_SURFACE: float = 9.3e6
 
 
+def _is_array(value) -> bool:
+    """Аргумент - массив (а не одиночное число)"""
+    return isinstance(value, (np.ndarray, list, tuple))
+
+
+class UniformTable:
+    """
+    Табличная функция на равномерной сетке с кубической эрмитовой интерполяцией
+    
+    Значения и производные в узлах сетки берутся из исходного сплайна,
+    поэтому внутри каждого куска сплайна интерполяция воспроизводит его
+    точно, а погрешность возникает только в ячейках, содержащих узел
+    исходных данных. Поиск ячейки - индексная арифметика, O(1).
+    """
+    
+    def __init__(self, spline, x_min: float, x_max: float, step: float):
+        """
+        Args:
+            spline: Исходная функция (scipy BSpline или PPoly) с методом derivative()
+            x_min: Начало сетки
+            x_max: Конец сетки
+            step: Желаемый шаг сетки (уточняется, чтобы сетка точно покрывала отрезок)
+        """
+        n = max(int(np.ceil((x_max - x_min) / step - 1e-9)), 1) + 1
+        self.x = np.linspace(x_min, x_max, n)
+        self.step = (x_max - x_min) / (n - 1)
+        self.values = np.asarray(spline(self.x), dtype=float)
+        # Производные по нормированной координате ячейки
+        self.slopes = np.asarray(spline.derivative()(self.x), dtype=float) * self.step
+        
+        # Списки Python: индексирование списка быстрее, чем массива numpy
+        self._values = self.values.tolist()
+        self._slopes = self.slopes.tolist()
+        self._x_min = float(x_min)
+        self._inv_step = 1.0 / self.step
+        self._last_cell = n - 2
+    
+    def __call__(self, x: float) -> float:
+        """Значение в точке x (скалярный путь, только операции с float)"""
+        u = (x - self._x_min) * self._inv_step
+        i = int(u)
+        if i > self._last_cell:
+            i = self._last_cell
+        elif i < 0:
+            i = 0
+        s = u - i
+        y0 = self._values[i]
+        m0 = self._slopes[i]
+        m1 = self._slopes[i + 1]
+        dy = self._values[i + 1] - y0
+        return y0 + s * (m0 + s * (3.0 * dy - 2.0 * m0 - m1 + s * (m0 + m1 - 2.0 * dy)))
+    
+    def evaluate(self, x: np.ndarray) -> np.ndarray:
+        """Значения в точках массива x"""
+        u = (np.asarray(x, dtype=float) - self._x_min) * self._inv_step
+        i = np.clip(np.floor(u).astype(np.intp), 0, self._last_cell)
+        s = u - i
+        y0 = self.values[i]
+        m0 = self.slopes[i]
+        m1 = self.slopes[i + 1]
+        dy = self.values[i + 1] - y0
+        return y0 + s * (m0 + s * (3.0 * dy - 2.0 * m0 - m1 + s * (m0 + m1 - 2.0 * dy)))
+
+
 class VenusAtmosphere:
-    """Модель атмосферы Венеры"""
+    """
+    Модель атмосферы Венеры
     
-    def __init__(self):
+    Плотность и температура задаются кубическими сплайнами по табличным
+    данным. Для быстрого расчета сплайны один раз табулируются на
+    равномерной сетке с шагом table_step (ln плотности и температура),
+    и далее значения берутся из таблицы за O(1).
+    
+    Погрешность таблицы относительно кубической интерполяции interp1d:
+    при шаге, кратном 5 км (все узлы исходных данных попадают в узлы
+    сетки, в т.ч. шаг по умолчанию 50 м), таблица совпадает со сплайном
+    до ошибок округления (относительная ошибка плотности ~1e-13).
+    При произвольном шаге ошибка ограничена ячейками, содержащими узлы
+    данных (например, при шаге 300 м - около 1.5e-6 по плотности и
+    1e-4 K по температуре); фактическое значение возвращает table_error().
+    """
+    
+    def __init__(self, table_step: float = 50.0):
+        """
+        Args:
+            table_step: Шаг таблицы атмосферы по высоте (м)
+        """
         self.constants = AtmosphericConstants()
+        self.table_step = table_step
         self._init_density_profile()
         self._init_temperature_profile()
+        self._init_tables()
     
     def _init_density_profile(self):
         """Инициализация профиля плотности"""
@@ -64,15 +152,6 @@ class VenusAtmosphere:
         
         self._heights_m = heights_km * 1000
         self._densities = densities
-        
-        # Логарифмическая интерполяция для большей точности
-        log_densities = np.log10(densities)
-        self._density_interp = interp1d(
-            self._heights_m, log_densities,
-            kind='cubic',
-            fill_value=(log_densities[0], log_densities[-1]),
-            bounds_error=False
-        )
     
     def _init_temperature_profile(self):
         """Инициализация профиля температуры"""
@@ -82,77 +161,149 @@ class VenusAtmosphere:
             125, 120, 115, 110, 105, 100, 95, 90, 85, 80
         ])
         
-        self._temperature_interp = interp1d(
-            self._heights_m, temperatures,
-            kind='cubic',
-            fill_value=(temperatures[0], temperatures[-1]),
-            bounds_error=False
+        self._temperatures = temperatures
+    
+    def _init_tables(self):
+        """Табулирование профилей на равномерной сетке"""
+        from scipy.interpolate import make_interp_spline
+        
+        # Те же кубические сплайны (not-a-knot), что строит interp1d(kind='cubic')
+        log_density_spline = make_interp_spline(self._heights_m, np.log(self._densities), k=3)
+        temperature_spline = make_interp_spline(self._heights_m, self._temperatures, k=3)
+        top = float(self._heights_m[-1])
+        self._log_density_table = UniformTable(log_density_spline, 0.0, top, self.table_step)
+        self._temperature_table = UniformTable(temperature_spline, 0.0, top, self.table_step)
+        
+        self._top_height = top
+        self._top_density = float(self._densities[-1])
+        self._surface_density = float(self._densities[0])
+        self._surface_temperature = float(self._temperatures[0])
+        self._top_temperature = float(self._temperatures[-1])
+    
+    def table_error(self, num_points: int = 200001) -> Tuple[float, float]:
+        """
+        Максимальная погрешность таблиц относительно interp1d
+        
+        Args:
+            num_points: Число проверочных точек на отрезке высот таблицы
+            
+        Returns:
+            (относительная ошибка плотности, абсолютная ошибка температуры в K)
+        """
+        from scipy.interpolate import interp1d
+        
+        # Логарифмическая интерполяция плотности - как в исходной модели
+        density_interp = interp1d(self._heights_m, np.log10(self._densities), kind='cubic')
+        temperature_interp = interp1d(self._heights_m, self._temperatures, kind='cubic')
+        
+        heights = np.linspace(0.0, self._top_height, num_points)
+        reference_density = 10 ** density_interp(heights)
+        table_density = np.exp(self._log_density_table.evaluate(heights))
+        reference_temperature = temperature_interp(heights)
+        table_temperature = self._temperature_table.evaluate(heights)
+        return (
+            float(np.max(np.abs(table_density / reference_density - 1.0))),
+            float(np.max(np.abs(table_temperature - reference_temperature)))
         )
     
-    def density(self, height: float) -> float:
+    def density(self, height):
         """
         Плотность атмосферы на заданной высоте
         
         Args:
-            height: Высота над поверхностью (м)
+            height: Высота над поверхностью (м), число или массив
             
         Returns:
-            Плотность (кг/м³)
+            Плотность (кг/м³), число или массив той же формы
         """
+        if _is_array(height):
+            shape = np.shape(height)
+            # 0-мерный массив приводится к одномерному: маски ниже требуют хотя бы одной оси
+            height = np.atleast_1d(np.asarray(height, dtype=float))
+            inside = np.exp(self._log_density_table.evaluate(
+                np.clip(height, 0.0, self._top_height)
+            ))
+            # Экстраполяция выше таблицы: экспоненциальный спад
+            above = height > self._top_height
+            if np.any(above):
+                inside[above] = self._top_density * np.exp(
+                    -(height[above] - self._top_height) / 50000
+                )
+            # Ниже поверхности - табличное значение у поверхности, как для числа
+            inside[height < 0] = self._surface_density
+            return inside.reshape(shape)
+        
         if height < 0:
-            return self._densities[0]
-        elif height > self._heights_m[-1]:
+            return self._surface_density
+        elif height > self._top_height:
             # Экстраполяция: экспоненциальный спад
-            last_height = self._heights_m[-1]
-            last_density = self._densities[-1]
             scale_height = 50000  # м, характерная высота
-            return last_density * np.exp(-(height - last_height) / scale_height)
+            return self._top_density * math.exp(-(height - self._top_height) / scale_height)
         else:
-            return 10 ** self._density_interp(height)
+            return math.exp(self._log_density_table(height))
     
-    def temperature(self, height: float) -> float:
+    def temperature(self, height):
         """
         Температура на заданной высоте
         
         Args:
-            height: Высота над поверхностью (м)
+            height: Высота над поверхностью (м), число или массив
             
         Returns:
-            Температура (K)
+            Температура (K), число или массив той же формы
         """
+        if _is_array(height):
+            # Вне таблицы температура постоянна - достаточно ограничить высоту
+            return self._temperature_table.evaluate(
+                np.clip(np.asarray(height, dtype=float), 0.0, self._top_height)
+            )
+        
         if height < 0:
-            return self._temperature_interp(0)
-        elif height > self._heights_m[-1]:
-            return self._temperature_interp(self._heights_m[-1])
+            return self._surface_temperature
+        elif height > self._top_height:
+            return self._top_temperature
         else:
-            return float(self._temperature_interp(height))
+            return self._temperature_table(height)
     
-    def gravity(self, height: float) -> float:
+    def gravity(self, height):
         """
         Ускорение свободного падения на заданной высоте
         
         Args:
-            height: Высота над поверхностью (м)
+            height: Высота над поверхностью (м), число или массив
             
         Returns:
-            Ускорение свободного падения (м/с²)
+            Ускорение свободного падения (м/с²), число или массив той же формы
         """
+        if _is_array(height):
+            # Ниже поверхности - значение у поверхности
+            height = np.maximum(np.asarray(height, dtype=float), 0.0)
+            ratio = self.constants.RADIUS / (self.constants.RADIUS + height)
+            return self.constants.GRAVITY_SURFACE * ratio * ratio
+        
         if height < 0:
             return self.constants.GRAVITY_SURFACE
         
-        r = self.constants.RADIUS + height
-        return self.constants.GRAVITY_SURFACE * (self.constants.RADIUS / r) ** 2
+        ratio = self.constants.RADIUS / (self.constants.RADIUS + height)
+        return self.constants.GRAVITY_SURFACE * ratio * ratio
     
-    def pressure(self, height: float) -> float:
+    def pressure(self, height):
         """
         Давление на заданной высоте (оценочное)
         
         Args:
-            height: Высота над поверхностью (м)
+            height: Высота над поверхностью (м), число или массив
             
         Returns:
-            Давление (Па)
+            Давление (Па), число или массив той же формы
         """
+        if _is_array(height):
+            shape = np.shape(height)
+            height = np.atleast_1d(np.asarray(height, dtype=float))
+            result = self.density(height) * self.constants.R_SPECIFIC_CO2 * self.temperature(height)
+            result[height == 0] = self.constants.PRESSURE_SURFACE
+            return result.reshape(shape)
+        
         if height == 0:
             return self.constants.PRESSURE_SURFACE
         
@@ -160,46 +311,52 @@ class VenusAtmosphere:
         T = self.temperature(height)
         return rho * self.constants.R_SPECIFIC_CO2 * T
     
-    def sound_speed(self, height: float) -> float:
+    def sound_speed(self, height):
         """
         Скорость звука на заданной высоте
         
         Args:
-            height: Высота над поверхностью (м)
+            height: Высота над поверхностью (м), число или массив
             
         Returns:
-            Скорость звука (м/с)
+            Скорость звука (м/с), число или массив той же формы
         """
         T = self.temperature(height)
         return np.sqrt(self.constants.GAMMA_CO2 * self.constants.R_SPECIFIC_CO2 * T)
     
-    def mach_number(self, velocity: float, height: float) -> float:
+    def mach_number(self, velocity, height):
         """
         Число Маха для заданной скорости и высоты
         
         Args:
-            velocity: Скорость (м/с)
-            height: Высота (м)
+            velocity: Скорость (м/с), число или массив
+            height: Высота (м), число или массив
             
         Returns:
             Число Маха
         """
         c = self.sound_speed(height)
+        if _is_array(c) or _is_array(velocity):
+            c = np.asarray(c, dtype=float)
+            positive = c > 0
+            return np.where(positive, np.abs(velocity) / np.where(positive, c, 1.0), 0.0)
         if c > 0:
             return abs(velocity) / c
         return 0.0
     
-    def dynamic_pressure(self, velocity: float, height: float) -> float:
+    def dynamic_pressure(self, velocity, height):
         """
         Динамическое давление
         
         Args:
-            velocity: Скорость (м/с)
-            height: Высота (м)
+            velocity: Скорость (м/с), число или массив
+            height: Высота (м), число или массив
             
         Returns:
             Динамическое давление (Па)
         """
+        if _is_array(velocity):
+            velocity = np.asarray(velocity, dtype=float)
         rho = self.density(height)
         return 0.5 * rho * velocity ** 2
     
@@ -269,6 +426,21 @@ class DragExponentModel:
         else:
             return self.n_background + lorentz
     
+    def n_values(self, velocity: np.ndarray) -> np.ndarray:
+        """
+        Показатель степени n(v) для массива скоростей
+        
+        Args:
+            velocity: Массив скоростей (м/с)
+            
+        Returns:
+            Массив показателей n
+        """
+        v_abs = np.abs(velocity)
+        lorentz = self.amplitude / (1 + ((v_abs - self.v0) / self.gamma) ** 2)
+        decay = np.exp(-np.maximum(v_abs - 2000, 0.0) / 3000)
+        return self.n_background + lorentz * decay
+    
     def flight_regime(self, velocity: float) -> str:
         """
         Определяет режим полета по скорости
@@ -318,17 +490,18 @@ class AtmosphericProfile:
         """
         heights = np.linspace(0, max_height, num_points)
         
-        densities = np.array([atmosphere.density(h) for h in heights])
-        temperatures = np.array([atmosphere.temperature(h) for h in heights])
-        pressures = np.array([atmosphere.pressure(h) for h in heights])
-        sound_speeds = np.array([atmosphere.sound_speed(h) for h in heights])
-        gravities = np.array([atmosphere.gravity(h) for h in heights])
+        densities = atmosphere.density(heights)
+        temperatures = atmosphere.temperature(heights)
+        pressures = atmosphere.pressure(heights)
+        sound_speeds = atmosphere.sound_speed(heights)
+        gravities = atmosphere.gravity(heights)
         
         return cls(heights, densities, temperatures, pressures, sound_speeds, gravities)
     
     def plot_density_profile(self, ax=None):
         """Построение графика плотности"""
         if ax is None:
+            import matplotlib.pyplot as plt
             fig, ax = plt.subplots(figsize=(12, 8))
         
         ax.plot(self.densities, self.heights / 1000, 'b-', linewidth=3, alpha=0.8)
@@ -0,0 +1,341 @@
+"""
+Анализ рассеивания методом Монте-Карло с потоковой статистикой
+"""
+import logging
+import os
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .simulation import SimulationEngine, SimulationInput
+from .ensemble import EnsembleEngine, EnsembleInput
+from .sweep import set_input_value
+from .streaming_stats import MetricAccumulator
+
+logger = logging.getLogger(__name__)
+
+# Скалярные характеристики, по которым накапливается статистика
+MONTE_CARLO_METRICS = (
+    'peak_deceleration',
+    'max_heat_flux',
+    'final_velocity',
+    'landing_velocity',
+    'ablated_mass',
+    'flight_time',
+)
+
+
+@dataclass
+class Normal:
+    """Нормальное распределение"""
+    mean: float
+    std: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.normal(self.mean, self.std, size)
+
+
+@dataclass
+class Uniform:
+    """Равномерное распределение на [low, high]"""
+    low: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.uniform(self.low, self.high, size)
+
+
+@dataclass
+class Triangular:
+    """Треугольное распределение"""
+    low: float
+    mode: float
+    high: float
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+_worker_engines: Dict[str, Any] = {}
+
+
+def _get_worker_engine(kind: str):
+    if kind not in _worker_engines:
+        _worker_engines[kind] = EnsembleEngine() if kind == 'ensemble' else SimulationEngine()
+    return _worker_engines[kind]
+
+
+def sample_inputs(base_input: SimulationInput,
+                  distributions: Dict[str, Any],
+                  rng: np.random.Generator,
+                  size: int) -> list:
+    """
+    Формирует size входных наборов, разыгрывая поля по распределениям
+
+    Args:
+        base_input: Базовые входные данные
+        distributions: Имя поля (вложенные - через точку) -> распределение
+        rng: Генератор случайных чисел
+        size: Число наборов
+
+    Returns:
+        Список SimulationInput
+    """
+    samples = {name: dist.sample(rng, size) for name, dist in distributions.items()}
+    inputs = []
+    for i in range(size):
+        input_data = base_input
+        for name, values in samples.items():
+            input_data = set_input_value(input_data, name, float(values[i]))
+        inputs.append(input_data)
+    return inputs
+
+
+def _scalar_metrics(output) -> Dict[str, float]:
+    metrics = {
+        'peak_deceleration': output.peak_deceleration,
+        'max_heat_flux': output.max_heat_flux,
+        'final_velocity': output.final_velocity,
+        'landing_velocity': np.nan,
+        'ablated_mass': output.thermal_load.ablated_mass,
+        'flight_time': output.flight_time,
+    }
+    if output.landing_velocity is not None:
+        metrics['landing_velocity'] = output.landing_velocity
+    return metrics
+
+
+def _run_chunk(base_input: SimulationInput,
+               distributions: Dict[str, Any],
+               seed: np.random.SeedSequence,
+               size: int,
+               engine: str,
+               first_index: int = 0) -> Tuple[Dict[str, np.ndarray], Dict[int, str]]:
+    """
+    Расчет порции траекторий
+
+    Ошибка одной траектории не прерывает порцию: ее характеристики остаются
+    NaN, а текст ошибки возвращается по номеру траектории в выборке
+    (first_index + номер в порции) - по нему траекторию можно воспроизвести.
+
+    Returns:
+        (характеристики порции, {номер траектории: текст ошибки})
+    """
+    rng = np.random.default_rng(seed)
+    inputs = sample_inputs(base_input, distributions, rng, size)
+    metrics = {name: np.full(size, np.nan) for name in MONTE_CARLO_METRICS}
+    failures = {}
+
+    if engine == 'ensemble':
+        ensemble = _get_worker_engine('ensemble')
+        try:
+            output = ensemble.run(EnsembleInput.from_simulation_inputs(inputs))
+            return {name: np.asarray(getattr(output, name), dtype=float) for name in MONTE_CARLO_METRICS}, failures
+        except Exception:
+            # Ошибка векторного расчета - порция пересчитывается по одной траектории,
+            # чтобы найти упавшие и сохранить остальные
+            pass
+        for i, input_data in enumerate(inputs):
+            try:
+                output = ensemble.run(EnsembleInput.from_simulation_inputs([input_data]))
+                for name in MONTE_CARLO_METRICS:
+                    metrics[name][i] = np.asarray(getattr(output, name), dtype=float)[0]
+            except Exception:
+                failures[first_index + i] = traceback.format_exc()
+        return metrics, failures
+
+    simulation = _get_worker_engine('scalar')
+    for i, input_data in enumerate(inputs):
+        try:
+            values = _scalar_metrics(simulation.run(input_data, metrics_only=True))
+        except Exception:
+            failures[first_index + i] = traceback.format_exc()
+            continue
+        for name, value in values.items():
+            metrics[name][i] = value
+    return metrics, failures
+
+
+@dataclass
+class MonteCarloResult:
+    """Накопленная статистика по всем разыгранным траекториям"""
+    n_samples: int
+    seed: int
+    metrics: Dict[str, MetricAccumulator]
+    # Номер траектории в выборке -> текст ошибки; в статистику такие траектории не входят
+    failures: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def n_failed(self) -> int:
+        return len(self.failures)
+
+    def summary(self, quantiles: Sequence[float] = (0.01, 0.05, 0.5, 0.95, 0.99)) -> Dict[str, Dict[str, float]]:
+        return {name: acc.summary(quantiles) for name, acc in self.metrics.items()}
+
+
+class MonteCarloRunner:
+    """
+    Разыгрывает n_samples траекторий и накапливает статистику характеристик
+
+    Выборка делится на порции по chunk_size траекторий. Порция i получает
+    собственный независимый поток случайных чисел SeedSequence(seed).spawn(...)[i],
+    поэтому результат воспроизводим и не зависит от числа процессов.
+    Результаты порций сразу сворачиваются в потоковую статистику,
+    так что память не растет с числом траекторий. Ошибка отдельной
+    траектории не прерывает расчет: она попадает в MonteCarloResult.failures
+    с номером траектории и не входит в статистику. Если порция роняет
+    рабочий процесс, в failures попадают все ее траектории.
+    """
+
+    def __init__(self,
+                 base_input: SimulationInput,
+                 distributions: Dict[str, Any],
+                 n_samples: int,
+                 seed: Optional[int] = None,
+                 max_workers: Optional[int] = None,
+                 chunk_size: int = 64,
+                 engine: str = 'scalar',
+                 histogram_bins: int = 50,
+                 histogram_ranges: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Args:
+            base_input: Базовые входные данные
+            distributions: Имя поля SimulationInput -> распределение (Normal, Uniform, ...)
+            n_samples: Число траекторий
+            seed: Начальное значение генератора; если не задано - выбирается случайно
+            max_workers: Число процессов (по умолчанию - число ядер); 1 - без пула
+            chunk_size: Число траекторий в порции
+            engine: 'scalar' - SimulationEngine с выбранным в base_input интегратором
+                    (с 'rk45' обычно быстрее всего),
+                    'ensemble' - векторный EnsembleEngine с шагом integration_step;
+                    выгоден при больших порциях (chunk_size в сотни траекторий)
+            histogram_bins: Число бинов гистограмм
+            histogram_ranges: Диапазоны гистограмм по характеристикам
+        """
+        if engine not in ('ensemble', 'scalar'):
+            raise ValueError(f"Неизвестный тип движка: {engine}")
+        self.base_input = base_input
+        self.distributions = dict(distributions)
+        self.n_samples = n_samples
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % 2**63)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.histogram_bins = histogram_bins
+        self.histogram_ranges = histogram_ranges or {}
+
+    def _chunks(self):
+        n_chunks = -(-self.n_samples // self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+        for i, seed in enumerate(seeds):
+            first_index = i * self.chunk_size
+            size = min(self.chunk_size, self.n_samples - first_index)
+            yield seed, size, first_index
+
+    def run(self, progress_callback: Optional[Callable] = None) -> MonteCarloResult:
+        metrics = {
+            name: MetricAccumulator(self.histogram_bins, self.histogram_ranges.get(name))
+            for name in MONTE_CARLO_METRICS
+        }
+        failures = {}
+        done = 0
+        logger.info(f"Starting Monte Carlo: {self.n_samples} samples, seed {self.seed}")
+
+        def accumulate(chunk):
+            nonlocal done
+            chunk_metrics, chunk_failures = chunk
+            size = len(next(iter(chunk_metrics.values())))
+            # Упавшие траектории исключаются из статистики (а не считаются пропусками)
+            keep = np.ones(size, dtype=bool)
+            for index, error in chunk_failures.items():
+                logger.warning(f"Monte Carlo sample {index} failed:\n{error}")
+                keep[index - done] = False
+            failures.update(chunk_failures)
+            for name, values in chunk_metrics.items():
+                metrics[name].update(values[keep])
+            done += size
+            if progress_callback:
+                progress_callback(100 * done / self.n_samples, f"Sample {done}/{self.n_samples}")
+
+        if self.max_workers == 1:
+            for seed, size, first_index in self._chunks():
+                accumulate(_run_chunk(self.base_input, self.distributions, seed, size, self.engine, first_index))
+        else:
+            self._run_pool(accumulate)
+
+        logger.info(f"Monte Carlo completed, {len(failures)} failed samples")
+        return MonteCarloResult(self.n_samples, self.seed, metrics, failures)
+
+    def _submit(self, executor, chunk):
+        seed, size, first_index = chunk
+        return executor.submit(_run_chunk, self.base_input, self.distributions, seed, size, self.engine, first_index)
+
+    def _run_pool(self, accumulate: Callable):
+        """
+        Расчет порций в пуле процессов
+
+        Порции подаются в пул ограниченным окном и учитываются в порядке
+        отправки - так статистика (в т.ч. скетч) детерминирована. Аварийное
+        завершение рабочего процесса ломает весь пул: порции, бывшие в работе,
+        пересчитываются по одной, неудачными отмечаются только траектории
+        порции, роняющей процесс снова, остальные продолжаются в новом пуле.
+        """
+        pending = deque(enumerate(self._chunks()))
+        # Номер порции -> результат, ожидающий учета по порядку
+        finished = {}
+        next_number = 0
+
+        def store(number, result):
+            nonlocal next_number
+            finished[number] = result
+            while next_number in finished:
+                accumulate(finished.pop(next_number))
+                next_number += 1
+
+        def run_isolated(chunk):
+            """Повторный расчет подозреваемой порции в отдельном процессе"""
+            seed, size, first_index = chunk
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                try:
+                    return self._submit(executor, chunk).result()
+                except BrokenProcessPool:
+                    error = traceback.format_exc()
+                    return ({name: np.full(size, np.nan) for name in MONTE_CARLO_METRICS},
+                            {first_index + i: error for i in range(size)})
+
+        while pending:
+            suspects = []
+            in_flight = {}
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                try:
+                    while pending or in_flight:
+                        while pending and len(in_flight) < 2 * self.max_workers:
+                            number, chunk = pending.popleft()
+                            try:
+                                in_flight[self._submit(executor, chunk)] = (number, chunk)
+                            except BrokenProcessPool:
+                                pending.appendleft((number, chunk))
+                                raise
+                        completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in completed:
+                            if isinstance(future.exception(), BrokenProcessPool):
+                                raise future.exception()
+                            store(in_flight.pop(future)[0], future.result())
+                except BrokenProcessPool:
+                    for future, (number, chunk) in in_flight.items():
+                        # Успевшие завершиться до падения порции сохраняются
+                        if future.done() and not isinstance(future.exception(), BrokenProcessPool):
+                            store(number, future.result())
+                        else:
+                            suspects.append((number, chunk))
+            if suspects:
+                # Какая из порций в работе уронила процесс, неизвестно: каждая
+                # пересчитывается отдельно
+                logger.warning(f"Worker process crashed, re-running {len(suspects)} chunks one by one")
+                for number, chunk in suspects:
+                    store(number, run_isolated(chunk))
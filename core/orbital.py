@@ -4,21 +4,30 @@
 import numpy as np
 from typing import Tuple
 
+from .kernels import cumulative_trapezoid
+
 
 def calculate_orbital_trajectory(time: np.ndarray,
                                 vx: np.ndarray,
                                 vy: np.ndarray,
                                 height: np.ndarray,
-                                planet_radius: float = 6051800.0) -> Tuple:
+                                planet_radius: float = 6051800.0,
+                                decimation: int = 1) -> Tuple:
     """
     Рассчитывает орбитальные параметры траектории
     
+    Угловое положение получается кумулятивным интегрированием угловой
+    скорости vx / r методом трапеций по всей траектории.
+    
     Args:
         time: массив времени (с)
         vx: массив горизонтальных скоростей (м/с)
         vy: массив вертикальных скоростей (м/с)
         height: массив высот (м)
         planet_radius: радиус планеты (м)
+        decimation: шаг прореживания выходных массивов - возвращается каждая
+                    decimation-я точка (и всегда последняя); интегрирование
+                    при этом выполняется по всем точкам
         
     Returns:
         Кортеж орбитальных параметров
@@ -27,42 +36,30 @@ def calculate_orbital_trajectory(time: np.ndarray,
     if n == 0:
         return (), (), (), (), (), ()
     
-    # Инициализация массивов
-    theta = np.zeros(n)  # угловое положение, рад
-    radius = np.zeros(n)  # расстояние до центра, м
-    v_theta = np.zeros(n)  # азимутальная скорость, м/с
-    v_r = np.zeros(n)  # радиальная скорость, м/с
-    latitude = np.zeros(n)  # широта, рад
-    longitude = np.zeros(n)  # долгота, рад
+    time = np.asarray(time, dtype=float)
+    vx = np.asarray(vx, dtype=float)
+    vy = np.asarray(vy, dtype=float)
     
-    # Начальные условия
-    radius[0] = planet_radius + height[0]
-    v_r[0] = -vy[0]  # радиальная скорость положительна наружу
-    v_theta[0] = vx[0]  # азимутальная скорость
+    radius = planet_radius + np.asarray(height, dtype=float)  # расстояние до центра, м
     
-    # Интегрирование
-    for i in range(n):
-        radius[i] = planet_radius + height[i]
-        
-        # Угловое положение (интегрирование угловой скорости)
-        if i == 0:
-            theta[0] = 0
-        else:
-            dt = time[i] - time[i-1]
-            if radius[i-1] > 0:
-                angular_velocity = vx[i-1] / radius[i-1]
-                theta[i] = theta[i-1] + angular_velocity * dt
-            else:
-                theta[i] = theta[i-1]
-        
-        # Скорости в сферических координатах
-        v_r[i] = -vy[i]  # радиальная скорость (положительная от центра)
-        if radius[i] > 0:
-            v_theta[i] = vx[i]
-        
-        # Географические координаты (упрощенно, считаем движение по экватору)
-        latitude[i] = 0  # широта 0 - экватор
-        longitude[i] = np.degrees(theta[i]) % 360
+    # Угловое положение (интегрирование угловой скорости)
+    safe_radius = np.where(radius > 0, radius, 1.0)
+    angular_velocity = np.where(radius > 0, vx / safe_radius, 0.0)
+    theta = cumulative_trapezoid(angular_velocity, time)  # угловое положение, рад
+    
+    if decimation > 1:
+        index = np.arange(0, n, decimation)
+        if index[-1] != n - 1:
+            index = np.append(index, n - 1)
+        theta, radius, vx, vy = theta[index], radius[index], vx[index], vy[index]
+    
+    # Скорости в сферических координатах
+    v_r = -vy  # радиальная скорость (положительная от центра)
+    v_theta = np.where(radius > 0, vx, 0.0)  # азимутальная скорость
+    
+    # Географические координаты (упрощенно, считаем движение по экватору)
+    latitude = np.zeros_like(theta)  # широта 0 - экватор
+    longitude = np.degrees(theta) % 360
     
     return theta, radius, v_theta, v_r, latitude, longitude
 
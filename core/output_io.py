@@ -0,0 +1,302 @@
+"""
+Сохранение и загрузка результатов расчета
+
+Первичные ряды траектории хранятся как двоичные массивы numpy, скалярные
+итоги и входные данные - как JSON-метаданные.
+
+Столбцовый файл (save_output / save_outputs) содержит один или несколько
+результатов: за сигнатурой идут столбцы, каждый выровнен на
+COLUMN_ALIGNMENT байт, в конце - JSON-оглавление (метаданные результатов,
+тип, форма и смещение каждого столбца), его длина и сигнатура. При
+загрузке файл отображается в память целиком, а столбцы - представления
+numpy на это отображение: данные читаются с диска только при обращении,
+сколько бы результатов ни было в файле.
+"""
+import io
+import json
+import mmap
+import numbers
+import os
+import struct
+from dataclasses import asdict, fields, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+
+from .physics import VehicleParameters
+from .simulation import SimulationInput, SimulationOutput, SimulationSummary
+from .thermal import ThermalLoad
+
+# Первичные ряды SimulationOutput; остальные ряды вычисляются по ним
+ARRAY_FIELDS = ('time', 'velocity_x', 'velocity_y', 'height', 'parachute_state_codes')
+# Производные ряды, которые можно сохранить вместе с первичными, чтобы не пересчитывать
+DERIVED_COLUMNS = (
+    'velocity_total', 'density', 'atmosphere_temperature', 'heat_flux', 'n_exponent',
+    'dynamic_pressure', 'mach_number', 'g_load', 'cumulative_heat_load', 'downrange_distance'
+)
+ORBITAL_COLUMNS = ('theta', 'radius', 'velocity_theta', 'velocity_radial', 'latitude', 'longitude')
+
+COLUMNAR_MAGIC = b'VSIMCOL1'
+COLUMNAR_VERSION = 1
+COLUMN_ALIGNMENT = 64
+
+
+def _json_default(value):
+    # Скаляры и массивы numpy в результатах (np.float64, np.bool_ и т.п.)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Значение типа {type(value).__name__} не сериализуется в JSON")
+
+
+def to_json(data: Dict[str, Any], **kwargs) -> str:
+    """JSON с поддержкой скаляров и массивов numpy"""
+    return json.dumps(data, default=_json_default, **kwargs)
+
+
+def input_to_dict(input_data: SimulationInput) -> Dict[str, Any]:
+    """Входные данные как словарь (вложенные ThermalProperties и ParachuteSystem - словари)"""
+    return asdict(input_data)
+
+
+def _field_values(cls, data: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """
+    Значения полей dataclass cls из словаря с проверкой имен и типов
+
+    Числовые поля принимают только числа (int в поле float приводится к float),
+    логические - только bool, строковые - только str.
+    """
+    if not isinstance(data, dict):
+        where = f" ({prefix.rstrip('.')})" if prefix else ''
+        raise ValueError(f"Некорректные входные данные{where}: ожидается словарь")
+    types = {f.name: f.type for f in fields(cls)}
+    unknown = set(data) - set(types)
+    if unknown:
+        raise ValueError(f"Неизвестные поля входных данных: {', '.join(prefix + name for name in sorted(unknown))}")
+
+    values = {}
+    for name, value in data.items():
+        kind = types[name]
+        if kind is float and isinstance(value, numbers.Real) and not isinstance(value, bool):
+            value = float(value)
+        elif kind is int and isinstance(value, numbers.Integral) and not isinstance(value, bool):
+            value = int(value)
+        elif kind in (bool, str) and isinstance(value, kind):
+            pass
+        elif kind is bool and isinstance(value, np.bool_):
+            value = bool(value)
+        elif is_dataclass(kind):
+            if not isinstance(value, kind):
+                value = kind(**_field_values(kind, value, f"{prefix}{name}."))
+        else:
+            raise ValueError(f"Некорректное значение поля {prefix}{name}: {value!r} "
+                             f"(ожидается {kind.__name__})")
+        values[name] = value
+    return values
+
+
+def input_from_dict(data: Dict[str, Any]) -> SimulationInput:
+    """
+    Восстанавливает SimulationInput из словаря
+
+    Args:
+        data: Словарь из input_to_dict (или его часть - недостающие поля
+              получают значения по умолчанию)
+
+    Returns:
+        SimulationInput
+
+    Raises:
+        ValueError: Неизвестное поле или значение неподходящего типа
+    """
+    return SimulationInput(**_field_values(SimulationInput, data))
+
+
+def output_metadata(output: Union[SimulationOutput, SimulationSummary]) -> Dict[str, Any]:
+    """
+    Скалярная часть результата (все поля, кроме рядов траектории)
+
+    Args:
+        output: SimulationOutput или SimulationSummary
+
+    Returns:
+        Словарь, сериализуемый функцией to_json
+    """
+    metadata = {'kind': 'summary' if isinstance(output, SimulationSummary) else 'output'}
+    for f in fields(output):
+        if not f.init or f.name in ARRAY_FIELDS:
+            continue
+        value = getattr(output, f.name)
+        if f.name == 'input_data':
+            value = input_to_dict(value) if value is not None else None
+        elif f.name in ('thermal_load', 'vehicle'):
+            value = asdict(value) if value is not None else None
+        metadata[f.name] = value
+    return metadata
+
+
+def output_from_parts(arrays: Dict[str, np.ndarray],
+                      metadata: Dict[str, Any]) -> Union[SimulationOutput, SimulationSummary]:
+    """
+    Собирает результат из рядов и метаданных (обратно к output_metadata)
+
+    Args:
+        arrays: Первичные ряды (ARRAY_FIELDS); для SimulationSummary не используются
+        metadata: Словарь из output_metadata
+
+    Returns:
+        SimulationOutput или SimulationSummary
+    """
+    values = dict(metadata)
+    kind = values.pop('kind', 'output')
+    values['thermal_load'] = ThermalLoad(**values['thermal_load'])
+    if kind == 'summary':
+        return SimulationSummary(**values)
+
+    if values.get('input_data') is not None:
+        values['input_data'] = input_from_dict(values['input_data'])
+    if values.get('vehicle') is not None:
+        values['vehicle'] = VehicleParameters(**values['vehicle'])
+    for name in ARRAY_FIELDS:
+        values[name] = arrays[name]
+    return SimulationOutput(**values)
+
+
+def dumps_output(output: Union[SimulationOutput, SimulationSummary]) -> bytes:
+    """
+    Результат в компактном двоичном виде: архив .npz без сжатия с первичными
+    рядами (в исходном типе хранения, коды парашютов - int8) и JSON-метаданными
+    """
+    arrays = {}
+    if isinstance(output, SimulationOutput):
+        arrays = {name: np.asarray(getattr(output, name)) for name in ARRAY_FIELDS}
+    metadata = np.frombuffer(to_json(output_metadata(output)).encode('utf-8'), dtype=np.uint8)
+    stream = io.BytesIO()
+    np.savez(stream, metadata=metadata, **arrays)
+    return stream.getvalue()
+
+
+def loads_output(data: bytes) -> Union[SimulationOutput, SimulationSummary]:
+    """Обратно к dumps_output"""
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        metadata = json.loads(archive['metadata'].tobytes().decode('utf-8'))
+        arrays = {name: archive[name] for name in ARRAY_FIELDS if name in archive.files}
+    return output_from_parts(arrays, metadata)
+
+
+def _record_columns(output, derived):
+    columns = {}
+    if isinstance(output, SimulationOutput):
+        for name in ARRAY_FIELDS:
+            columns[name] = getattr(output, name)
+        for name in derived:
+            if name not in DERIVED_COLUMNS + ORBITAL_COLUMNS:
+                raise ValueError(f"Неизвестный производный ряд: {name}")
+            columns[name] = getattr(output, name)
+    return {name: np.ascontiguousarray(value) for name, value in columns.items()}
+
+
+def save_outputs(outputs: Sequence[Union[SimulationOutput, SimulationSummary]],
+                 path: Union[str, Path], derived: Sequence[str] = ()):
+    """
+    Сохраняет результаты в один столбцовый файл
+
+    Args:
+        outputs: Результаты (SimulationOutput или SimulationSummary)
+        path: Путь к файлу
+        derived: Производные ряды (DERIVED_COLUMNS, ORBITAL_COLUMNS), которые
+                 сохраняются вместе с первичными
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    records = []
+    try:
+        with open(tmp_path, 'wb') as fh:
+            fh.write(COLUMNAR_MAGIC)
+            offset = len(COLUMNAR_MAGIC)
+            for output in outputs:
+                columns = {}
+                for name, array in _record_columns(output, derived).items():
+                    padding = -offset % COLUMN_ALIGNMENT
+                    fh.write(b'\0' * padding)
+                    offset += padding
+                    columns[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+                    fh.write(memoryview(array).cast('B'))
+                    offset += array.nbytes
+                records.append({'metadata': output_metadata(output), 'columns': columns})
+            index = to_json({'version': COLUMNAR_VERSION, 'records': records}).encode('utf-8')
+            fh.write(index)
+            fh.write(struct.pack('<Q', len(index)))
+            fh.write(COLUMNAR_MAGIC)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def save_output(output: Union[SimulationOutput, SimulationSummary],
+                path: Union[str, Path], derived: Sequence[str] = ()):
+    """Сохраняет один результат в столбцовый файл (см. save_outputs)"""
+    save_outputs([output], path, derived)
+
+
+def _read_columnar(buffer, source) -> List[Union[SimulationOutput, SimulationSummary]]:
+    tail = len(COLUMNAR_MAGIC) + 8
+    if (len(buffer) < len(COLUMNAR_MAGIC) + tail or buffer[:len(COLUMNAR_MAGIC)] != COLUMNAR_MAGIC
+            or buffer[-len(COLUMNAR_MAGIC):] != COLUMNAR_MAGIC):
+        raise ValueError(f"{source}: не столбцовый файл результатов")
+    index_length, = struct.unpack('<Q', buffer[-tail:-len(COLUMNAR_MAGIC)])
+    index = json.loads(bytes(buffer[len(buffer) - tail - index_length:len(buffer) - tail]).decode('utf-8'))
+    if index['version'] > COLUMNAR_VERSION:
+        raise ValueError(f"{source}: неподдерживаемая версия формата {index['version']}")
+
+    outputs = []
+    for record in index['records']:
+        columns = {
+            name: np.ndarray(tuple(info['shape']), dtype=np.dtype(info['dtype']),
+                             buffer=buffer, offset=info['offset'])
+            for name, info in record['columns'].items()
+        }
+        output = output_from_parts(columns, record['metadata'])
+        if isinstance(output, SimulationOutput):
+            for name in DERIVED_COLUMNS:
+                if name in columns:
+                    output._cache[name] = columns[name]
+            if all(name in columns for name in ORBITAL_COLUMNS):
+                output._cache['orbital'] = tuple(columns[name] for name in ORBITAL_COLUMNS)
+        outputs.append(output)
+    return outputs
+
+
+def load_outputs(path: Union[str, Path]) -> List[Union[SimulationOutput, SimulationSummary]]:
+    """
+    Загружает результаты из столбцового файла без чтения данных
+
+    Args:
+        path: Путь к файлу из save_outputs
+
+    Returns:
+        Список результатов; ряды - представления только для чтения на
+        отображенный в память файл
+    """
+    with open(path, 'rb') as fh:
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    return _read_columnar(buffer, path)
+
+
+def loads_outputs(data: bytes) -> List[Union[SimulationOutput, SimulationSummary]]:
+    """
+    Результаты из содержимого столбцового файла в памяти (например, ответа
+    сервиса расчетов); ряды - представления на data без копирования
+    """
+    return _read_columnar(memoryview(data), '<bytes>')
+
+
+def load_output(path: Union[str, Path]) -> Union[SimulationOutput, SimulationSummary]:
+    """Загружает единственный (или первый) результат из столбцового файла"""
+    outputs = load_outputs(path)
+    if not outputs:
+        raise ValueError(f"{path}: файл не содержит результатов")
+    return outputs[0]
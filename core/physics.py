@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 # Исправленный импорт - используем относительный импорт
 from .materials import VenusAtmosphere, DragExponentModel
+from .trajectory_buffer import BRAKE_CHUTE_BIT, MAIN_CHUTE_BIT
 
 @dataclass
 class VehicleParameters:
@@ -102,6 +103,44 @@ class PhysicsEngine:
         
         return total_drag
     
+    def calculate_drag_force_array(self,
+                                   v_total: np.ndarray,
+                                   density: np.ndarray,
+                                   n: np.ndarray,
+                                   vehicle: VehicleParameters,
+                                   parachute_states,
+                                   parachute_params: Optional[Dict] = None) -> np.ndarray:
+        """
+        Модуль силы сопротивления (аппарат и парашюты) вдоль траектории
+        
+        Args:
+            v_total: Модуль скорости (м/с)
+            density: Плотность атмосферы (кг/м³)
+            n: Показатель степени n(v)
+            vehicle: Параметры аппарата
+            parachute_states: Коды состояния парашютов в каждой точке (PARACHUTE_STATE_CODES)
+            parachute_params: Параметры парашютов
+            
+        Returns:
+            Сила сопротивления (Н)
+        """
+        v_total = np.asarray(v_total, dtype=float)
+        drag = 0.5 * density * vehicle.drag_coefficient * vehicle.cross_section_area * (v_total ** n)
+        
+        if parachute_params:
+            states = np.asarray(parachute_states, dtype=np.int8)
+            dynamic_pressure = 0.5 * density * v_total ** 2
+            brake_area = parachute_params.get('brake_area', 0)
+            if brake_area > 0:
+                brake = (states & BRAKE_CHUTE_BIT) != 0
+                drag += brake * parachute_params.get('brake_coeff', 0.8) * brake_area * dynamic_pressure
+            main_area = parachute_params.get('main_area', 0)
+            if main_area > 0:
+                main = (states & MAIN_CHUTE_BIT) != 0
+                drag += main * parachute_params.get('main_coeff', 1.2) * main_area * dynamic_pressure
+        
+        return np.where(v_total > 1e-3, drag, 0.0)
+    
     # Для обратной совместимости
     def calculate_acceleration_with_parachutes(self,
                                                vx: float,
@@ -0,0 +1,241 @@
+"""
+Дисковый кэш результатов расчета
+
+Результат хранится в файле, имя которого - хэш канонической записи
+SimulationInput (включая вложенные ThermalProperties и ParachuteSystem)
+и отпечатка модели. Отпечаток меняется при изменении исходного кода
+расчетных модулей, поэтому устаревшие результаты не используются.
+Общий размер кэша ограничен: при превышении удаляются давно не
+использованные файлы.
+"""
+import ast
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .output_io import dumps_output, loads_output, input_to_dict
+from .simulation import SimulationEngine, SimulationInput, SimulationOutput, SimulationSummary
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+def _package_imports(path: Path) -> Set[str]:
+    """Имена модулей пакета, импортируемых файлом относительным импортом"""
+    names = set()
+    for node in ast.walk(ast.parse(path.read_bytes(), filename=str(path))):
+        if isinstance(node, ast.ImportFrom) and node.level == 1:
+            if node.module:
+                names.add(node.module.split('.')[0])
+            else:
+                names.update(alias.name for alias in node.names)
+    return {name for name in names if (PACKAGE_DIR / f"{name}.py").is_file()}
+
+
+def model_modules(roots: Tuple[str, ...] = ('simulation', 'output_io')) -> Tuple[str, ...]:
+    """
+    Файлы, от которых зависит результат расчета: модули roots и все модули
+    пакета, которые они импортируют (транзитивно). Список строится по
+    исходному коду, поэтому новый модуль, подключенный к расчету, попадает
+    в отпечаток модели автоматически.
+
+    Args:
+        roots: Исходные модули - движок расчета и формат файлов кэша
+
+    Returns:
+        Имена файлов по алфавиту
+    """
+    found = set()
+    queue = list(roots)
+    while queue:
+        name = queue.pop()
+        if name not in found:
+            found.add(name)
+            queue.extend(_package_imports(PACKAGE_DIR / f"{name}.py") - found)
+    return tuple(f"{name}.py" for name in sorted(found))
+
+
+# Модули, от которых зависит результат расчета
+MODEL_MODULES = model_modules()
+# Увеличивается при несовместимом изменении формата файлов кэша
+CACHE_FORMAT_VERSION = 1
+CACHE_SUFFIX = '.npz'
+
+
+@lru_cache(maxsize=None)
+def model_fingerprint() -> str:
+    """Отпечаток модели: хэш исходного кода расчетных модулей, формата кэша и версии numpy"""
+    digest = hashlib.sha256(f"format={CACHE_FORMAT_VERSION};numpy={np.__version__}".encode())
+    for name in MODEL_MODULES:
+        digest.update(name.encode())
+        digest.update((PACKAGE_DIR / name).read_bytes())
+    return digest.hexdigest()
+
+
+def canonical_input(input_data: SimulationInput) -> str:
+    """
+    Каноническая запись входных данных: JSON с упорядоченными ключами,
+    числа приводятся к float, чтобы 750 и 750.0 давали одну запись
+
+    Args:
+        input_data: Входные данные
+
+    Returns:
+        Строка JSON
+    """
+    def normalize(value):
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, (bool, np.bool_, str)) or value is None:
+            return value.item() if isinstance(value, np.bool_) else value
+        if isinstance(value, (int, float, np.number)):
+            return float(value)
+        return value
+
+    return json.dumps(normalize(input_to_dict(input_data)), sort_keys=True, separators=(',', ':'))
+
+
+def input_hash(input_data: SimulationInput, metrics_only: bool = False) -> str:
+    """Ключ кэша: хэш отпечатка модели и канонической записи входных данных"""
+    digest = hashlib.sha256(model_fingerprint().encode())
+    digest.update(b'summary' if metrics_only else b'output')
+    digest.update(canonical_input(input_data).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def default_cache_dir() -> Path:
+    """Каталог кэша: VENUS_SIM_CACHE_DIR или ~/.cache/venus-sim"""
+    directory = os.environ.get('VENUS_SIM_CACHE_DIR')
+    if directory:
+        return Path(directory)
+    return Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'venus-sim'
+
+
+class ResultCache:
+    """
+    Кэш результатов SimulationEngine.run на диске
+
+    Пример:
+        cache = ResultCache()
+        output = cache.run(SimulationInput())   # расчет и запись
+        output = cache.run(SimulationInput())   # чтение с диска
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None,
+                 max_bytes: int = 1024 * 1024 * 1024,
+                 engine: Optional[SimulationEngine] = None):
+        """
+        Args:
+            directory: Каталог кэша (по умолчанию default_cache_dir())
+            max_bytes: Наибольший общий размер файлов кэша (байт)
+            engine: Движок для расчета отсутствующих результатов
+        """
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_bytes = int(max_bytes)
+        self._engine = engine
+
+    @property
+    def engine(self) -> SimulationEngine:
+        if self._engine is None:
+            self._engine = SimulationEngine()
+        return self._engine
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, input_data: SimulationInput,
+            metrics_only: bool = False) -> Optional[Union[SimulationOutput, SimulationSummary]]:
+        """Результат из кэша или None"""
+        path = self._path(input_hash(input_data, metrics_only))
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            output = loads_output(data)
+        except Exception as e:
+            logger.warning(f"Removed corrupted cache file {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        # Время изменения файла - время последнего использования для вытеснения
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if isinstance(output, SimulationOutput):
+            output._engine = self._engine
+        return output
+
+    def put(self, input_data: SimulationInput, output: Union[SimulationOutput, SimulationSummary]):
+        """Записывает результат в кэш и вытесняет старые файлы при превышении размера"""
+        metrics_only = isinstance(output, SimulationSummary)
+        path = self._path(input_hash(input_data, metrics_only))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Запись во временный файл и переименование: читатель не увидит неполный файл
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(dumps_output(output))
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def run(self, input_data: SimulationInput, progress_callback: Optional[Callable] = None,
+            metrics_only: bool = False) -> Union[SimulationOutput, SimulationSummary]:
+        """
+        Результат из кэша, а при его отсутствии - расчет и запись в кэш
+
+        Аргументы те же, что у SimulationEngine.run
+        """
+        output = self.get(input_data, metrics_only)
+        if output is not None:
+            logger.info("Simulation result loaded from cache")
+            if progress_callback:
+                progress_callback(100, "Loaded from cache")
+            return output
+        output = self.engine.run(input_data, progress_callback, metrics_only=metrics_only)
+        try:
+            self.put(input_data, output)
+        except OSError as e:
+            logger.warning(f"Could not write result to cache: {e}")
+        return output
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    @property
+    def size(self) -> int:
+        """Общий размер файлов кэша (байт)"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Удаляет давно не использованные файлы, пока размер кэша больше max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        """Удаляет все файлы кэша"""
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
@@ -0,0 +1,576 @@
+"""
+Локальный сервис расчетов: HTTP/JSON поверх пула рабочих процессов
+
+Сервис держит заранее запущенные рабочие процессы, в каждом из которых
+создан SimulationEngine (таблицы атмосферы и показателя сопротивления уже
+построены, кэш этапов прогрет), и очередь заданий ограниченной длины.
+Используется только стандартная библиотека; сервис слушает localhost.
+
+Запросы:
+    POST   /jobs                 {"input": {...}, "metrics_only": false} -> 202 {"id": ...}
+    GET    /jobs                 список заданий
+    GET    /jobs/<id>            состояние, ход расчета, итоги
+    GET    /jobs/<id>/result     результат в столбцовом формате (output_io)
+    POST   /jobs/<id>/cancel     отмена ожидающего или выполняемого задания
+    DELETE /jobs/<id>            отмена и удаление задания вместе с результатом
+    GET    /health               число процессов и заданий в очереди
+
+Поле "input" - словарь SimulationInput (как в input_to_dict; можно частично).
+При заполненной очереди POST /jobs возвращает 503 с заголовком Retry-After.
+
+Пример:
+    service = SimulationService(port=8765, workers=4)
+    service.serve_forever()
+
+    client = SimulationClient('http://127.0.0.1:8765')
+    job = client.submit(SimulationInput(entry_angle=20.0))
+    output = client.wait(job)
+"""
+import json
+import logging
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .output_io import input_from_dict, input_to_dict, loads_outputs, save_output
+from .simulation import SimulationInput, SimulationOutput, SimulationSummary
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+RESULT_CONTENT_TYPE = 'application/vnd.venus-sim.columnar'
+# Наибольший размер тела запроса (байт)
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class _SharedCancellationToken:
+    """CancellationToken рабочего процесса: признак отмены в общей памяти, его выставляет сервис"""
+
+    def __init__(self, flag):
+        self._flag = flag
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self._flag.value)
+
+
+def _worker_main(conn, cancel_flag, results_dir: str):
+    """Цикл рабочего процесса: получает задания из conn и возвращает сообщения о ходе и итоге"""
+    from .batch import summary_values
+    from .checkpoint import SimulationCancelled
+    from .simulation import SimulationEngine
+
+    engine = SimulationEngine()
+    token = _SharedCancellationToken(cancel_flag)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if task is None:
+            break
+        job_id, input_dict, metrics_only = task
+        last_percent = -1.0
+
+        def progress(percent, message):
+            nonlocal last_percent
+            # Не чаще одного сообщения на процент
+            if percent - last_percent >= 1 or percent >= 100:
+                last_percent = percent
+                conn.send(('progress', job_id, float(percent), message))
+
+        try:
+            output = engine.run(input_from_dict(input_dict), progress,
+                                metrics_only=metrics_only, cancel_token=token)
+            save_output(output, Path(results_dir) / f"{job_id}.vsim")
+            summary = {key: (float(value) if value is not None else None)
+                       for key, value in summary_values(output).items()}
+            conn.send(('done', job_id, summary))
+        except SimulationCancelled:
+            conn.send(('cancelled', job_id))
+        except Exception:
+            conn.send(('failed', job_id, traceback.format_exc()))
+
+
+@dataclass
+class _Job:
+    id: str
+    input_data: Dict[str, Any]
+    metrics_only: bool
+    status: str = 'queued'
+    progress: float = 0.0
+    message: str = ''
+    error: Optional[str] = None
+    summary: Optional[Dict[str, Any]] = None
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    worker: Optional['_Worker'] = None
+    # Удалить после остановки (DELETE выполняемого задания)
+    deleted: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id, 'status': self.status, 'progress': self.progress,
+            'message': self.message, 'error': self.error, 'summary': self.summary,
+            'metrics_only': self.metrics_only, 'submitted': self.submitted,
+            'started': self.started, 'finished': self.finished
+        }
+
+
+class _Worker:
+    def __init__(self, context, results_dir: str):
+        self.conn, child_conn = context.Pipe()
+        self.cancel_flag = context.RawValue('b', 0)
+        self.process = context.Process(target=_worker_main, args=(child_conn, self.cancel_flag, results_dir),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job: Optional[_Job] = None
+
+
+class SimulationService:
+    """
+    Очередь заданий и пул рабочих процессов с HTTP-интерфейсом
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, workers: Optional[int] = None,
+                 queue_size: int = 64, max_finished: int = 256,
+                 results_dir: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            host: Адрес (по умолчанию только localhost)
+            port: Порт; 0 - любой свободный (см. server_address)
+            workers: Число рабочих процессов (по умолчанию - число ядер)
+            queue_size: Наибольшее число ожидающих заданий
+            max_finished: Сколько завершенных заданий хранить; более старые
+                          удаляются вместе с результатами
+            results_dir: Каталог файлов результатов (по умолчанию временный,
+                         удаляется при остановке)
+        """
+        self.queue_size = queue_size
+        self.max_finished = max_finished
+        self._own_results_dir = results_dir is None
+        self.results_dir = Path(results_dir or tempfile.mkdtemp(prefix='venus-sim-service-'))
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, _Job]' = OrderedDict()
+        self._pending: deque = deque()
+        self._closed = False
+
+        self._context = multiprocessing.get_context()
+        self._workers: List[_Worker] = []
+        for _ in range(workers or multiprocessing.cpu_count() or 1):
+            self._start_worker()
+
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.service = self
+        logger.info(f"Simulation service on {self.url} with {len(self._workers)} workers")
+
+    @property
+    def server_address(self):
+        return self._server.server_address
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, str(self.results_dir))
+        self._workers.append(worker)
+        threading.Thread(target=self._listen, args=(worker,), daemon=True).start()
+        return worker
+
+    # --- Очередь заданий ---
+
+    def submit(self, input_data: Union[SimulationInput, Dict[str, Any]], metrics_only: bool = False) -> str:
+        """
+        Ставит задание в очередь
+
+        Returns:
+            Идентификатор задания
+
+        Raises:
+            ValueError: Некорректные входные данные
+            OverflowError: Очередь заполнена
+        """
+        if isinstance(input_data, SimulationInput):
+            input_data = input_to_dict(input_data)
+        # Проверка имен и типов полей до постановки в очередь, а не в рабочем процессе
+        input_dict = input_to_dict(input_from_dict(input_data))
+        job = _Job(uuid.uuid4().hex, input_dict, bool(metrics_only))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Сервис остановлен")
+            if len(self._pending) >= self.queue_size:
+                raise OverflowError("Очередь заданий заполнена")
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._dispatch()
+        return job.id
+
+    def _dispatch(self):
+        # Вызывается под self._lock
+        for worker in self._workers:
+            if not self._pending:
+                return
+            if worker.job is None and worker.process.is_alive():
+                job = self._pending.popleft()
+                worker.cancel_flag.value = 0
+                worker.job = job
+                job.worker = worker
+                job.status = 'running'
+                job.started = time.time()
+                worker.conn.send((job.id, job.input_data, job.metrics_only))
+
+    def _finish(self, job: _Job, status: str):
+        # Вызывается под self._lock
+        job.status = status
+        job.finished = time.time()
+        if job.worker is not None:
+            job.worker.job = None
+            job.worker = None
+        if job.deleted:
+            self._remove(job)
+        finished = [item for item in self._jobs.values() if item.status in FINISHED_STATES]
+        for old in finished[:max(0, len(finished) - self.max_finished)]:
+            self._remove(old)
+
+    def _remove(self, job: _Job):
+        self._jobs.pop(job.id, None)
+        self._result_path(job.id).unlink(missing_ok=True)
+
+    def _listen(self, worker: _Worker):
+        """Поток чтения сообщений одного рабочего процесса"""
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind, job_id = message[0], message[1]
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == 'progress':
+                    job.progress, job.message = message[2], message[3]
+                    continue
+                if kind == 'done':
+                    job.summary = message[2]
+                    job.progress = 100.0
+                    self._finish(job, 'done')
+                elif kind == 'cancelled':
+                    self._finish(job, 'cancelled')
+                else:
+                    job.error = message[2]
+                    logger.warning(f"Job {job_id} failed:\n{job.error}")
+                    self._finish(job, 'failed')
+                self._dispatch()
+
+        # Рабочий процесс завершился: задание считается неудачным, процесс заменяется
+        worker.process.join(timeout=5)
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            job = worker.job
+            if job is not None:
+                job.error = f"Рабочий процесс завершился с кодом {worker.process.exitcode}"
+                self._finish(job, 'failed')
+            if not self._closed:
+                logger.warning("Worker process exited, starting a new one")
+                self._start_worker()
+                self._dispatch()
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """Состояние задания (KeyError, если его нет)"""
+        with self._lock:
+            return self._jobs[job_id].to_dict()
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Отменяет задание: ожидающее снимается с очереди, выполняемое
+        останавливается на ближайшем шаге интегрирования
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status == 'queued':
+                self._pending.remove(job)
+                self._finish(job, 'cancelled')
+            elif job.status == 'running':
+                job.worker.cancel_flag.value = 1
+            return job.to_dict()
+
+    def delete(self, job_id: str):
+        """Отменяет задание и удаляет его вместе с результатом"""
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status == 'queued':
+                self._pending.remove(job)
+            if job.status == 'running':
+                # Выполняемое задание удаляется после остановки
+                job.deleted = True
+                job.worker.cancel_flag.value = 1
+            else:
+                self._remove(job)
+
+    def _result_path(self, job_id: str) -> Path:
+        return self.results_dir / f"{job_id}.vsim"
+
+    def result_path(self, job_id: str) -> Path:
+        """Файл результата завершенного задания (KeyError или ValueError, если его нет)"""
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status != 'done':
+                raise ValueError(f"Задание в состоянии '{job.status}'")
+        return self._result_path(job_id)
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': len(self._workers),
+                'busy': sum(worker.job is not None for worker in self._workers),
+                'queued': len(self._pending),
+                'queue_size': self.queue_size,
+                'jobs': len(self._jobs)
+            }
+
+    # --- Запуск и остановка ---
+
+    def serve_forever(self):
+        """Обслуживает запросы до shutdown() или KeyboardInterrupt"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def start(self) -> threading.Thread:
+        """Обслуживание запросов в фоновом потоке"""
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Останавливает HTTP-сервер и рабочие процессы"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+            for worker in workers:
+                worker.cancel_flag.value = 1
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+        self._server.shutdown()
+        self._server.server_close()
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            worker.conn.close()
+        if self._own_results_dir:
+            shutil.rmtree(self.results_dir, ignore_errors=True)
+        logger.info("Simulation service stopped")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'VenusSim/1.0'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {'error': message}, headers)
+
+    def _route(self) -> List[str]:
+        return [part for part in self.path.split('?')[0].split('/') if part]
+
+    def do_GET(self):
+        service = self.server.service
+        parts = self._route()
+        try:
+            if parts == ['health']:
+                self._send_json(200, service.health())
+            elif parts == ['jobs']:
+                self._send_json(200, service.jobs())
+            elif len(parts) == 2 and parts[0] == 'jobs':
+                self._send_json(200, service.status(parts[1]))
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'result':
+                self._send_file(service.result_path(parts[1]))
+            else:
+                self._error(404, 'Неизвестный адрес')
+        except KeyError:
+            self._error(404, 'Задание не найдено')
+        except ValueError as e:
+            self._error(409, str(e))
+
+    def _send_file(self, path: Path):
+        with open(path, 'rb') as fh:
+            size = path.stat().st_size
+            self.send_response(200)
+            self.send_header('Content-Type', RESULT_CONTENT_TYPE)
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            shutil.copyfileobj(fh, self.wfile, 1024 * 1024)
+
+    def do_POST(self):
+        service = self.server.service
+        parts = self._route()
+        try:
+            if parts == ['jobs']:
+                request = self._read_json()
+                if not isinstance(request, dict) or not isinstance(request.get('input', {}), dict):
+                    raise ValueError("Ожидается объект {\"input\": {...}}")
+                job_id = service.submit(request.get('input', {}), request.get('metrics_only', False))
+                self._send_json(202, service.status(job_id), {'Location': f"/jobs/{job_id}"})
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+                self._send_json(200, service.cancel(parts[1]))
+            else:
+                self._error(404, 'Неизвестный адрес')
+        except KeyError:
+            self._error(404, 'Задание не найдено')
+        except OverflowError as e:
+            self._error(503, str(e), {'Retry-After': '1'})
+        except (TypeError, ValueError) as e:
+            self._error(400, str(e))
+        except RuntimeError as e:
+            self._error(503, str(e))
+
+    def do_DELETE(self):
+        service = self.server.service
+        parts = self._route()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self._error(404, 'Неизвестный адрес')
+            return
+        try:
+            service.delete(parts[1])
+            self._send_json(200, {'id': parts[1], 'deleted': True})
+        except KeyError:
+            self._error(404, 'Задание не найдено')
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_BYTES:
+            raise ValueError("Слишком большой запрос")
+        try:
+            return json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Некорректный JSON: {e}")
+
+
+class ServiceError(Exception):
+    """Ошибка, возвращенная сервисом расчетов; status - код HTTP"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class SimulationClient:
+    """Клиент SimulationService (только стандартная библиотека и numpy)"""
+
+    def __init__(self, url: str = 'http://127.0.0.1:8765', timeout: float = 30.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> bytes:
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.url + path, data=body, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8'))['error']
+            except (ValueError, KeyError):
+                message = e.reason
+            raise ServiceError(e.code, message) from None
+
+    def _json(self, method: str, path: str, data: Optional[Dict[str, Any]] = None):
+        return json.loads(self._request(method, path, data).decode('utf-8'))
+
+    def submit(self, input_data: Union[SimulationInput, Dict[str, Any]], metrics_only: bool = False) -> str:
+        """Ставит задание в очередь и возвращает его идентификатор"""
+        if isinstance(input_data, SimulationInput):
+            input_data = input_to_dict(input_data)
+        return self._json('POST', '/jobs', {'input': input_data, 'metrics_only': metrics_only})['id']
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        return self._json('GET', f"/jobs/{job_id}")
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        return self._json('GET', '/jobs')
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        return self._json('POST', f"/jobs/{job_id}/cancel")
+
+    def delete(self, job_id: str):
+        self._json('DELETE', f"/jobs/{job_id}")
+
+    def health(self) -> Dict[str, Any]:
+        return self._json('GET', '/health')
+
+    def result(self, job_id: str) -> Union[SimulationOutput, SimulationSummary]:
+        """Результат завершенного задания; ряды - представления на полученные данные"""
+        return loads_outputs(self._request('GET', f"/jobs/{job_id}/result"))[0]
+
+    def wait(self, job_id: str, poll_interval: float = 0.2,
+             timeout: Optional[float] = None) -> Union[SimulationOutput, SimulationSummary]:
+        """
+        Ждет завершения задания и возвращает результат
+
+        Raises:
+            ServiceError: Задание завершилось с ошибкой или отменено
+            TimeoutError: Задание не завершилось за timeout секунд
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if status['status'] == 'done':
+                return self.result(job_id)
+            if status['status'] in FINISHED_STATES:
+                raise ServiceError(409, status['error'] or f"Задание в состоянии '{status['status']}'")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Задание {job_id} не завершилось за {timeout} с")
+            time.sleep(poll_interval)
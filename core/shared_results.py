@@ -0,0 +1,93 @@
+"""
+Передача результатов из рабочих процессов через общую память
+
+Возврат SimulationOutput из процесса пула сериализует все ряды: для расчета
+на 400 тыс. точек это десятки мегабайт копирования в процессе, в канале и
+при разборе. SharedResultTransport вместо этого записывает ряды в столбцовый
+файл (output_io.save_output) в каталоге на tmpfs (/dev/shm), а процессу-
+родителю возвращает только описатель. Родитель отображает файл в память -
+ряды становятся представлениями numpy без копирования - и сразу удаляет
+его имя: память освобождается вместе с последним рядом. Каталог обмена
+удаляется при закрытии транспорта, так что результаты упавших или
+отмененных расчетов тоже не остаются.
+"""
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from .output_io import load_output, save_output
+from .simulation import SimulationOutput, SimulationSummary
+
+# Каталог tmpfs: файлы в нем находятся в оперативной памяти
+SHARED_MEMORY_DIR = '/dev/shm'
+
+
+def shared_memory_dir() -> str:
+    """Каталог для файлов обмена: /dev/shm, если он есть, иначе временный каталог"""
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        return SHARED_MEMORY_DIR
+    return tempfile.gettempdir()
+
+
+@dataclass(frozen=True)
+class SharedOutputHandle:
+    """Описатель результата в общей памяти - все, что передается между процессами"""
+    path: str
+    nbytes: int
+
+
+class SharedResultTransport:
+    """
+    Каталог обмена результатами на время одного пакета расчетов
+
+    Объект передается в рабочие процессы (сериализуется только путь):
+    export() вызывается в рабочем процессе, open() - в родителе.
+
+    Пример:
+        with SharedResultTransport() as transport:
+            handle = executor.submit(run_and_export, ..., transport).result()
+            output = transport.open(handle)
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            directory: Родительский каталог (по умолчанию shared_memory_dir())
+        """
+        self.directory = Path(tempfile.mkdtemp(prefix='venus-sim-results-',
+                                               dir=directory or shared_memory_dir()))
+
+    def export(self, output: SimulationOutput) -> SharedOutputHandle:
+        """Записывает результат в общую память (в рабочем процессе)"""
+        path = self.directory / f"{uuid.uuid4().hex}.vsim"
+        save_output(output, path)
+        return SharedOutputHandle(str(path), path.stat().st_size)
+
+    def open(self, handle: SharedOutputHandle) -> Union[SimulationOutput, SimulationSummary]:
+        """
+        Результат по описателю (в родительском процессе)
+
+        Ряды - представления только для чтения на отображенный файл; имя
+        файла удаляется сразу, память освобождается вместе с рядами
+        """
+        output = load_output(handle.path)
+        try:
+            os.unlink(handle.path)
+        except PermissionError:
+            # Windows не удаляет отображенный файл - он удалится в close()
+            pass
+        return output
+
+    def close(self):
+        """Удаляет каталог обмена вместе с неполученными результатами"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
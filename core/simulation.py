@@ -1,14 +1,21 @@
+import copy
+import math
 import numpy as np
-from typing import Dict, Tuple, List, Optional, Callable, Any
-from dataclasses import dataclass
+from typing import Dict, Tuple, Optional, Callable, Any, Union
+from dataclasses import dataclass, field
 import logging
 
 # Исправленный импорт - используем относительный импорт
 from .materials import VenusAtmosphere, DragExponentModel
 from .physics import PhysicsEngine, VehicleParameters, InitialConditions
-from .thermal import ThermalCalculator, ThermalProperties, ThermalLoad
+from .thermal import ThermalCalculator, ThermalProperties, ThermalLoad, AblationTracker
 from .structure import calculate_airship_mass, calculate_nose_radius_from_area
 from .orbital import calculate_orbital_trajectory
+from .kernels import trapezoid, cumulative_trapezoid, distance
+from .trajectory_buffer import TrajectoryBuffer, StreamingBuffer, decode_parachute_states
+from .integrators import ExplicitEuler, DormandPrince45, Event, first_event
+from .stages import StageCache, input_key
+from .checkpoint import SimulationCheckpoint, SimulationCancelled
 
 logger = logging.getLogger(__name__)
 
@@ -33,58 +40,489 @@ class SimulationInput:
     entry_angle: float = 12.0
     simulation_time: float = 400.0
     heat_shield_area: float = 1.5
-    thermal_properties: ThermalProperties = ThermalProperties()
+    thermal_properties: ThermalProperties = field(default_factory=ThermalProperties)
     mass_calculation_mode: str = 'airship'
     envelope_density: float = 0.8
     payload_mass: float = 150.0
     gas_lift: float = 1.0
-    parachute_system: ParachuteSystem = ParachuteSystem()
+    parachute_system: ParachuteSystem = field(default_factory=ParachuteSystem)
     integration_step: float = 0.001
+    # Метод интегрирования: 'euler' - явный Эйлер с шагом integration_step,
+    # 'rk45' - адаптивный Дорман-Принс 5(4) с допусками rtol/atol
+    integrator: str = 'euler'
+    rtol: float = 1e-8
+    atol: float = 1e-6
+    max_step: float = 1.0
+    # Тип хранения траектории: 'float64' или 'float32' (вдвое меньше памяти)
+    output_dtype: str = 'float64'
+    # Прореживание сохраняемой траектории: 'all' - каждый шаг,
+    # 'every' - каждый output_every-й шаг, 'interval' - не чаще чем раз в output_interval с,
+    # 'adaptive' - только точки, без которых линейная интерполяция скоростей, высоты
+    # и теплового потока ошибается больше чем на output_tolerance (доля от скорости
+    # входа, высоты входа и текущего максимума потока). Начальная и конечная точки,
+    # события парашютов, максимумы нагрева и перегрузки сохраняются всегда;
+    # скалярные итоги считаются по всем шагам интегрирования
+    output_mode: str = 'all'
+    output_every: int = 10
+    output_interval: float = 0.1
+    output_tolerance: float = 1e-3
 
 @dataclass
 class SimulationOutput:
+    """
+    Результат расчета траектории
+    
+    Хранит первичное состояние (время, скорости, высота, коды состояния
+    парашютов - см. PARACHUTE_STATE_CODES) и скалярные итоги. Производные ряды - тепловой поток, перегрузка,
+    скоростной напор, число Маха, накопленная тепловая нагрузка, пройденная
+    дальность, орбитальные углы - вычисляются при первом обращении
+    по модели атмосферы и кэшируются.
+    """
     time: np.ndarray
     velocity_x: np.ndarray
     velocity_y: np.ndarray
-    velocity_total: np.ndarray
     height: np.ndarray
-    heat_flux: np.ndarray
-    n_exponent: np.ndarray
-    theta: np.ndarray
-    radius: np.ndarray
-    velocity_theta: np.ndarray
-    velocity_radial: np.ndarray
-    latitude: np.ndarray
-    longitude: np.ndarray
+    parachute_state_codes: np.ndarray
+    flight_distance: float
+    flight_time: float
+    final_velocity: float
+    final_height: float
+    thermal_load: ThermalLoad
+    parachute_events: Dict[str, Any]
+    airship_results: Optional[Dict] = None
+    vehicle_mass: float = 0.0
+    max_heat_flux: float = 0.0
+    angular_displacement: float = 0.0
+    arc_distance: float = 0.0
+    landing_velocity: Optional[float] = None
+    peak_deceleration: float = 0.0
+    input_data: Optional['SimulationInput'] = None
+    vehicle: Optional[VehicleParameters] = None
+    _cache: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _engine: Any = field(default=None, init=False, repr=False, compare=False)
+    
+    def __getstate__(self):
+        # Кэш и ссылка на движок не сериализуются - ряды пересчитываются при обращении
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        state['_engine'] = None
+        return state
+    
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+    
+    @property
+    def _models(self) -> 'SimulationEngine':
+        if self._engine is None:
+            self._engine = SimulationEngine()
+        return self._engine
+    
+    @property
+    def parachute_states(self) -> np.ndarray:
+        """Названия состояний парашютов ('none', 'brake', 'main', 'both')"""
+        return self._cached('parachute_states',
+                            lambda: decode_parachute_states(self.parachute_state_codes))
+    
+    @property
+    def velocity_total(self) -> np.ndarray:
+        return self._cached('velocity_total',
+                            lambda: np.sqrt(self.velocity_x**2 + self.velocity_y**2))
+    
+    @property
+    def density(self) -> np.ndarray:
+        """Плотность атмосферы вдоль траектории (кг/м³)"""
+        return self._cached('density', lambda: self._models.atmosphere.density(self.height))
+    
+    @property
+    def atmosphere_temperature(self) -> np.ndarray:
+        """Температура атмосферы вдоль траектории (K)"""
+        return self._cached('atmosphere_temperature',
+                            lambda: self._models.atmosphere.temperature(self.height))
+    
+    @property
+    def heat_flux(self) -> np.ndarray:
+        """Тепловой поток (Вт/м²)"""
+        return self._cached('heat_flux', lambda: self._models.thermal.calculate_heat_flux(
+            self.velocity_total, self.density, self.input_data.drag_coefficient
+        ))
+    
+    @property
+    def n_exponent(self) -> np.ndarray:
+        return self._cached('n_exponent',
+                            lambda: self._models.drag_model.n_values(self.velocity_total))
+    
+    @property
+    def dynamic_pressure(self) -> np.ndarray:
+        """Скоростной напор (Па)"""
+        return self._cached('dynamic_pressure',
+                            lambda: 0.5 * self.density * self.velocity_total**2)
+    
+    @property
+    def mach_number(self) -> np.ndarray:
+        return self._cached('mach_number', lambda: self._models.atmosphere.mach_number(
+            self.velocity_total, self.height
+        ))
+    
+    @property
+    def g_load(self) -> np.ndarray:
+        """Перегрузка от аэродинамических сил в единицах g у поверхности"""
+        def compute():
+            models = self._models
+            parachute_params = None
+            if self.input_data.parachute_system.use_parachutes:
+                parachute_params = models._parachute_params(self.input_data.parachute_system)
+            drag_force = models.physics.calculate_drag_force_array(
+                self.velocity_total, self.density, self.n_exponent, self.vehicle,
+                self.parachute_state_codes, parachute_params
+            )
+            return drag_force / self.vehicle.mass / models.atmosphere.constants.GRAVITY_SURFACE
+        return self._cached('g_load', compute)
+    
+    @property
+    def cumulative_heat_load(self) -> np.ndarray:
+        """Накопленная тепловая энергия на единицу площади (Дж/м²)"""
+        return self._cached('cumulative_heat_load',
+                            lambda: cumulative_trapezoid(self.heat_flux, self.time))
+    
+    @property
+    def downrange_distance(self) -> np.ndarray:
+        """Пройденная горизонтальная дальность (м)"""
+        return self._cached('downrange_distance',
+                            lambda: distance(self.velocity_x, self.time))
+    
+    def _orbital(self, index):
+        orbital = self._cached('orbital', lambda: calculate_orbital_trajectory(
+            self.time, self.velocity_x, self.velocity_y, self.height,
+            self._models.atmosphere.constants.RADIUS
+        ))
+        return orbital[index]
+    
+    @property
+    def theta(self) -> np.ndarray:
+        return self._orbital(0)
+    
+    @property
+    def radius(self) -> np.ndarray:
+        return self._orbital(1)
+    
+    @property
+    def velocity_theta(self) -> np.ndarray:
+        return self._orbital(2)
+    
+    @property
+    def velocity_radial(self) -> np.ndarray:
+        return self._orbital(3)
+    
+    @property
+    def latitude(self) -> np.ndarray:
+        return self._orbital(4)
+    
+    @property
+    def longitude(self) -> np.ndarray:
+        return self._orbital(5)
+
+@dataclass
+class SimulationSummary:
+    """Скалярные результаты расчета без массивов траектории (режим metrics_only)"""
     flight_distance: float
     flight_time: float
     final_velocity: float
     final_height: float
     thermal_load: ThermalLoad
     parachute_events: Dict[str, Any]
-    parachute_states: List[str]
     airship_results: Optional[Dict] = None
     vehicle_mass: float = 0.0
     max_heat_flux: float = 0.0
     angular_displacement: float = 0.0
     arc_distance: float = 0.0
+    landing_velocity: Optional[float] = None
+    peak_deceleration: float = 0.0
+    n_samples: int = 0
+
+class _MetricsRecorder:
+    """
+    Накапливает скалярные характеристики по ходу интегрирования с O(1) памятью.
+    Квадратуры те же, что при постобработке полной траектории.
+    """
+    
+    def __init__(self, atmosphere, thermal, input_data):
+        self.atmosphere = atmosphere
+        self.thermal = thermal
+        self.drag_coefficient = input_data.drag_coefficient
+        self.planet_radius = atmosphere.constants.RADIUS
+        self.ablation = AblationTracker(input_data.thermal_properties)
+        self.n_samples = 0
+        self.max_heat_flux = 0.0
+        self.flight_distance = 0.0
+        self.theta = 0.0
+        self.last_heat_flux = 0.0
+        self._last = None
+    
+    def __getstate__(self):
+        # Модели не входят в контрольную точку - движок подставляет свои при продолжении
+        state = self.__dict__.copy()
+        state['atmosphere'] = None
+        state['thermal'] = None
+        return state
+    
+    def append(self, t, y, parachute_state, g_load=0.0, event=False):
+        vx, vy, height = float(y[0]), float(y[1]), float(y[2])
+        v_total = math.sqrt(vx * vx + vy * vy)
+        q = self.thermal.calculate_heat_flux(
+            v_total, self.atmosphere.density(height), self.drag_coefficient
+        )
+        self.last_heat_flux = q
+        
+        if self._last is not None:
+            t_prev, vx_prev, h_prev, q_prev, _ = self._last
+            dt = t - t_prev
+            self.ablation.add(dt, (q_prev + q) / 2.0)
+            self.flight_distance += (vx_prev + vx) / 2.0 * dt
+            self.theta += (vx_prev / (self.planet_radius + h_prev) +
+                           vx / (self.planet_radius + height)) / 2.0 * dt
+        
+        self.max_heat_flux = max(self.max_heat_flux, q)
+        self._last = (t, vx, height, q, v_total)
+        self.n_samples += 1
+    
+    def result(self):
+        t, vx, height, q, v_total = self._last
+        return {
+            'flight_time': t,
+            'final_velocity': v_total,
+            'final_height': height,
+            'flight_distance': self.flight_distance,
+            'angular_displacement': self.theta,
+            'arc_distance': self.theta * (self.planet_radius + height),
+            'max_heat_flux': self.max_heat_flux,
+            'n_samples': self.n_samples
+        }
+
+class _TrajectoryRecorder:
+    """Сохраняет все точки траектории (и при заданном metrics - скалярные итоги по ним)"""
+    
+    def __init__(self, buffer, metrics=None):
+        self.buffer = buffer
+        self.metrics = metrics
+    
+    def append(self, t, y, parachute_state, g_load=0.0, event=False):
+        if self.metrics is not None:
+            self.metrics.append(t, y, parachute_state, g_load, event)
+        self.buffer.append(t, y, parachute_state)
+    
+    def result(self):
+        return self.buffer.result()
+
+class _DecimatingRecorder:
+    """
+    Сохраняет часть точек траектории по правилу output_mode.
+    Скалярные итоги при этом считаются по всем шагам (_MetricsRecorder).
+    
+    В режиме 'adaptive' используется алгоритм "вращающейся двери": для каждого
+    канала поддерживается интервал наклонов прямых из последней сохраненной
+    точки, проходящих в пределах допуска от всех пропущенных точек. Точка
+    сохраняется, когда интервал становится пустым, так что линейная
+    интерполяция сохраненных точек отличается от пропущенных не больше допуска.
+    """
+    
+    def __init__(self, buffer, metrics, input_data):
+        self.buffer = buffer
+        self.metrics = metrics
+        self.mode = input_data.output_mode
+        self.every = max(int(input_data.output_every), 1)
+        self.interval = input_data.output_interval
+        self.tolerance = input_data.output_tolerance
+        # Допуски каналов vx, vy, height, heat_flux; для теплового потока
+        # масштаб - текущий максимум, допуск обновляется вместе с ним
+        self._tol = [self.tolerance * input_data.entry_speed,
+                     self.tolerance * input_data.entry_speed,
+                     self.tolerance * input_data.entry_height,
+                     self.tolerance]
+        self._count = 0
+        self._next_time = 0.0
+        self._pending = None
+        self._anchor = None
+        self._low = None
+        self._high = None
+        # Максимумы: [значение, точка, сохранена ли точка]
+        self._peaks = {'heat_flux': [-np.inf, None, False], 'g_load': [-np.inf, None, False]}
+    
+    def _fits(self, t, values):
+        t_anchor, anchor_values = self._anchor
+        dt = t - t_anchor
+        if dt <= 0:
+            return True
+        low, high = self._low, self._high
+        for i in range(4):
+            slope = (values[i] - anchor_values[i]) / dt
+            if slope < low[i] or slope > high[i]:
+                return False
+        return True
+    
+    def _narrow(self, t, values):
+        t_anchor, anchor_values = self._anchor
+        dt = t - t_anchor
+        if dt <= 0:
+            return
+        low, high, tol = self._low, self._high, self._tol
+        for i in range(4):
+            delta = values[i] - anchor_values[i]
+            bound = (delta - tol[i]) / dt
+            if bound > low[i]:
+                low[i] = bound
+            bound = (delta + tol[i]) / dt
+            if bound < high[i]:
+                high[i] = bound
+    
+    def _store(self, point):
+        t, y, parachute_state, values = point
+        self.buffer.append(t, y, parachute_state)
+        self._anchor = (t, values)
+        self._low = [-math.inf] * 4
+        self._high = [math.inf] * 4
+        self._pending = None
+        for peak in self._peaks.values():
+            if peak[1] is point:
+                peak[2] = True
+    
+    def append(self, t, y, parachute_state, g_load=0.0, event=False):
+        self.metrics.append(t, y, parachute_state, g_load, event)
+        q = self.metrics.last_heat_flux
+        values = (float(y[0]), float(y[1]), float(y[2]), q)
+        point = (t, values[:3], parachute_state, values)
+        
+        if self.mode == 'adaptive':
+            if self._pending is not None and not self._fits(t, values):
+                self._store(self._pending)
+            keep = self._anchor is None
+        elif self.mode == 'every':
+            keep = self._count % self.every == 0
+        else:
+            keep = t >= self._next_time
+            if keep:
+                self._next_time = (np.floor(t / self.interval + 1e-9) + 1) * self.interval
+        self._count += 1
+        
+        peak = self._peaks['heat_flux']
+        if q > peak[0]:
+            peak[0], peak[1], peak[2] = q, point, False
+            self._tol[3] = self.tolerance * max(q, 1.0)
+        peak = self._peaks['g_load']
+        if g_load > peak[0]:
+            peak[0], peak[1], peak[2] = g_load, point, False
+        
+        if keep or event:
+            self._store(point)
+        else:
+            if self.mode == 'adaptive':
+                self._narrow(t, values)
+            self._pending = point
+    
+    def result(self):
+        # Последняя точка и непопавшие в выборку максимумы
+        if self._pending is not None:
+            self._store(self._pending)
+        for peak in self._peaks.values():
+            if peak[1] is not None and not peak[2]:
+                t, y, parachute_state, _ = peak[1]
+                self.buffer.insert(t, y, parachute_state)
+                peak[2] = True
+        return self.buffer.result()
+
+def _snapshot_recorder(recorder):
+    """
+    Копия приемника точек для контрольной точки. Буфер траектории копируется
+    своим snapshot() (без копирования записанных блоков), остальное состояние
+    приемника - глубоким копированием; иначе каждая контрольная точка копировала
+    бы всю траекторию и стоимость расчета с контрольными точками росла бы квадратично.
+    """
+    buffer = getattr(recorder, 'buffer', None)
+    memo = {} if buffer is None else {id(buffer): buffer.snapshot()}
+    return copy.deepcopy(recorder, memo)
+
+@dataclass
+class _RunControl:
+    """Параметры остановки и продолжения расчета, передаваемые в цикл интегрирования"""
+    kind: str = 'output'
+    sink: Any = None
+    cancel_token: Any = None
+    checkpoint_interval: Optional[float] = None
+    checkpoint_callback: Optional[Callable] = None
+    resume_from: Optional[SimulationCheckpoint] = None
 
 class SimulationEngine:
     
-    def __init__(self):
+    # Поля SimulationInput, которые читают этапы расчета
+    AIRSHIP_MASS_FIELDS = (
+        'envelope_density', 'payload_mass', 'gas_lift', 'heat_shield_area',
+        'thermal_properties.thickness', 'thermal_properties.density'
+    )
+    TRAJECTORY_FIELDS = (
+        'drag_coefficient', 'cross_section_area', 'entry_height', 'entry_speed', 'entry_angle',
+        'simulation_time', 'parachute_system', 'integrator', 'integration_step',
+        'rtol', 'atol', 'max_step', 'output_dtype', 'output_mode', 'output_every',
+        'output_interval', 'output_tolerance'
+    )
+    THERMAL_FIELDS = ('thermal_properties',)
+    
+    def __init__(self, stage_cache_size: int = 1):
+        """
+        Args:
+            stage_cache_size: Сколько последних результатов каждого этапа
+                              запоминать (0 - не запоминать)
+        """
         self.atmosphere = VenusAtmosphere()
         self.drag_model = DragExponentModel()
         self.physics = PhysicsEngine(self.atmosphere, self.drag_model)
         self.thermal = ThermalCalculator()
-        self.integration_step = 0.001
+        self.stages = StageCache(stage_cache_size)
     
-    def run(self, input_data: SimulationInput, progress_callback: Optional[Callable] = None) -> SimulationOutput:
+    def run(self, input_data: SimulationInput, progress_callback: Optional[Callable] = None,
+            metrics_only: bool = False, sink=None, cancel_token=None,
+            checkpoint_interval: Optional[float] = None,
+            checkpoint_callback: Optional[Callable] = None,
+            resume_from: Optional[SimulationCheckpoint] = None) -> Union[SimulationOutput, SimulationSummary]:
+        """
+        Выполняет расчет
+        
+        Args:
+            input_data: Входные данные
+            progress_callback: Функция progress_callback(percent, message)
+            metrics_only: Не сохранять траекторию, а вернуть только скалярные
+                          характеристики (SimulationSummary) с O(1) памятью
+            sink: Приемник траектории (см. core/sinks.py): точки по правилу
+                  output_mode передаются ему блоками по ходу интегрирования,
+                  в памяти остается только текущий блок; возвращается
+                  SimulationSummary
+            cancel_token: CancellationToken; после cancel() расчет останавливается
+                          на ближайшем шаге с исключением SimulationCancelled,
+                          содержащим контрольную точку
+            checkpoint_interval: Период контрольных точек (с модельного времени)
+            checkpoint_callback: Функция checkpoint_callback(checkpoint), получающая
+                                 контрольные точки
+            resume_from: Контрольная точка, с которой продолжается расчет (входные
+                         данные и режим расчета должны совпадать с сохраненными)
+        
+        Если траектория для этих входных данных уже запомнена в кэше этапов
+        (stage_cache_size > 0), интегрирование не выполняется: progress_callback
+        получает только переходы между этапами без хода по шагам,
+        checkpoint_callback не вызывается и cancel_token не проверяется.
+        
+        Returns:
+            SimulationOutput или SimulationSummary. При включенном кэше этапов
+            ряды траектории общие для результатов с той же траекторией и
+            доступны только для чтения
+        """
         logger.info("Starting simulation...")
         
         if progress_callback:
             progress_callback(0, "Initializing simulation...")
         
-        vehicle_mass, airship_results = self._calculate_vehicle_mass(input_data)
+        vehicle_mass, airship_results = self.stages.get(
+            'mass', self._mass_key(input_data), lambda: self._calculate_vehicle_mass(input_data)
+        )
         
         if progress_callback:
             progress_callback(10, f"Vehicle mass: {vehicle_mass:.1f} kg")
@@ -106,38 +544,73 @@ class SimulationEngine:
         if progress_callback:
             progress_callback(15, "Integrating trajectory...")
         
-        trajectory_results = self._integrate_trajectory(
-            init_conditions, vehicle, input_data, progress_callback
+        control = _RunControl(
+            kind='stream' if sink is not None else 'summary' if metrics_only else 'output',
+            sink=sink,
+            cancel_token=cancel_token,
+            checkpoint_interval=checkpoint_interval,
+            checkpoint_callback=checkpoint_callback,
+            resume_from=resume_from
         )
         
+        if metrics_only or sink is not None:
+            recorder = self._prepare_recorder(input_data, control)
+            metrics = recorder.metrics if sink is not None else recorder
+            if sink is not None:
+                sink.open(input_data, resume_from.sink_position if resume_from is not None else None)
+            try:
+                trajectory_results = self._integrate_trajectory(
+                    init_conditions, vehicle, input_data, progress_callback, recorder, control
+                )
+            finally:
+                # При ошибке приемнику передаются уже рассчитанные точки
+                if sink is not None:
+                    recorder.buffer.flush()
+                    sink.close()
+            summary = self._compile_summary(
+                trajectory_results, metrics, input_data, vehicle_mass, airship_results
+            )
+            if progress_callback:
+                progress_callback(100, "Simulation completed")
+            logger.info("Simulation completed successfully")
+            return summary
+        
+        # Этапы ниже запоминаются по ключам из полей входных данных (см. core/stages.py):
+        # траектория зависит от массы как от числа, поэтому, например, изменение
+        # теплофизических свойств при заданной массе не повторяет интегрирование
+        trajectory_key = (vehicle_mass,) + input_key(input_data, self._trajectory_fields(input_data))
+        trajectory_results, metrics = self.stages.get('trajectory', trajectory_key, lambda: self._run_trajectory_stage(
+            init_conditions, vehicle, input_data, progress_callback, control
+        ))
+        
         if progress_callback:
             progress_callback(85, "Calculating thermal loads...")
         
-        thermal_load = self._calculate_thermal_loads(
+        # Производные ряды и орбитальные величины зависят только от траектории
+        # (drag_coefficient входит в ключ траектории)
+        derived = self.stages.get('derived', trajectory_key, lambda: self._calculate_derived_quantities(
             trajectory_results, input_data
-        )
-        
-        if progress_callback:
-            progress_callback(90, "Calculating orbital parameters...")
-        
-        orbital_results = calculate_orbital_trajectory(
-            trajectory_results['time'],
-            trajectory_results['vx'],
-            trajectory_results['vy'],
-            trajectory_results['height']
-        )
+        ))
+        thermal_key = (trajectory_key, input_key(input_data, self.THERMAL_FIELDS))
+        thermal_load = self.stages.get('thermal', thermal_key, lambda: self._run_thermal_stage(
+            trajectory_results, derived, metrics, input_data
+        ))
+        orbital = self.stages.get('orbital', trajectory_key, lambda: self._calculate_orbital_quantities(
+            trajectory_results, derived, metrics
+        ))
         
         if progress_callback:
             progress_callback(95, "Compiling results...")
         
         output = self._compile_output(
             trajectory_results,
+            derived,
             thermal_load,
-            orbital_results,
+            orbital,
             input_data,
+            vehicle,
             vehicle_mass,
-            airship_results,
-            init_conditions
+            airship_results
         )
         
         if progress_callback:
@@ -146,6 +619,32 @@ class SimulationEngine:
         logger.info("Simulation completed successfully")
         return output
     
+    def _trajectory_fields(self, input_data: SimulationInput) -> Tuple[str, ...]:
+        if input_data.output_mode != 'all':
+            # При прореживании тепловой расчет ведется по всем шагам внутри интегрирования
+            return self.TRAJECTORY_FIELDS + self.THERMAL_FIELDS
+        return self.TRAJECTORY_FIELDS
+    
+    def _run_trajectory_stage(self, init_conditions, vehicle, input_data, progress_callback, control):
+        recorder = self._prepare_recorder(input_data, control)
+        trajectory_results = self._integrate_trajectory(
+            init_conditions, vehicle, input_data, progress_callback, recorder, control
+        )
+        if isinstance(recorder, _DecimatingRecorder):
+            # Прореженная траектория: тепловой расчет и интегралы - по всем шагам
+            return trajectory_results, recorder.metrics
+        return trajectory_results, None
+    
+    def _run_thermal_stage(self, trajectory_results, derived, metrics, input_data):
+        if metrics is not None:
+            return metrics.ablation.thermal_load(metrics.result()['max_heat_flux'], self.thermal)
+        return self._calculate_thermal_loads(trajectory_results, derived, input_data)
+    
+    def _mass_key(self, input_data: SimulationInput) -> tuple:
+        if input_data.mass_calculation_mode == 'airship':
+            return ('airship',) + input_key(input_data, self.AIRSHIP_MASS_FIELDS)
+        return ('specified', input_data.mass_specified)
+    
     def _calculate_vehicle_mass(self, input_data: SimulationInput) -> Tuple[float, Optional[Dict]]:
         if input_data.mass_calculation_mode == 'airship':
             results = calculate_airship_mass(
@@ -160,220 +659,346 @@ class SimulationEngine:
         else:
             return input_data.mass_specified, None
     
-    def _integrate_trajectory(self, init_conditions, vehicle, input_data, progress_callback):
-        n_steps = int(input_data.simulation_time / self.integration_step) + 1
-        
-        time = np.zeros(n_steps)
-        vx = np.zeros(n_steps)
-        vy = np.zeros(n_steps)
-        height = np.zeros(n_steps)
-        n_exp = np.zeros(n_steps)
-        parachute_states = ['none'] * n_steps
-        
-        time[0] = 0.0
-        vx[0] = init_conditions.vx0
-        vy[0] = init_conditions.vy0
-        height[0] = init_conditions.entry_height
-        
-        parachute_params = {
-            'brake_area': input_data.parachute_system.brake_chute_area,
-            'brake_coeff': input_data.parachute_system.brake_chute_coeff,
-            'main_area': input_data.parachute_system.main_chute_area,
-            'main_coeff': input_data.parachute_system.main_chute_coeff
-        }
+    def _integrate_trajectory(self, init_conditions, vehicle, input_data, progress_callback, recorder, control=None):
+        control = control or _RunControl()
+        parachute_system = input_data.parachute_system
+        parachute_params = self._parachute_params(parachute_system)
+        parachute_state = 'none'
+        
+        # Вектор состояния: [vx, vy, height]
+        def rhs(t, y):
+            if parachute_state != 'none':
+                ax, ay, _ = self.physics.calculate_acceleration_with_parachutes(
+                    y[0], y[1], y[2], vehicle, parachute_state, parachute_params
+                )
+            else:
+                ax, ay, _ = self.physics.calculate_acceleration(y[0], y[1], y[2], vehicle)
+            return np.array([ax, ay, y[1]])
+        
+        y0 = np.array([init_conditions.vx0, init_conditions.vy0, init_conditions.entry_height])
+        solver = self._create_solver(rhs, y0, input_data)
+        events = self._create_events(parachute_system)
         
-        brake_deployed = False
-        main_deployed = False
-        brake_jettisoned = False
+        # События, которые еще могут произойти (в порядке проверки)
+        pending = ['brake_deploy'] if parachute_system.use_parachutes else []
         parachute_events = {}
+        landing_velocity = None
+        
+        def fire_satisfied_events(t, y):
+            # Срабатывают события, условие которых уже выполнено в точке (t, y):
+            # например, при совпадающих порогах открытия основного и отстрела тормозного
+            fired = True
+            while fired:
+                fired = False
+                for name in list(pending):
+                    if events[name](t, y) <= 0:
+                        self._record_parachute_event(name, t, y, parachute_events, pending)
+                        fired = True
+                        break
+            return self._determine_parachute_state(parachute_events)
+        
+        resume = control.resume_from
+        if resume is None:
+            t, y = solver.t, solver.y
+            parachute_state = fire_satisfied_events(t, y)
+            solver.restart(t, y)
+            step = 0
+            peak_deceleration = 0.0
+            # Начальная точка и точки событий сохраняются при любом прореживании
+            is_event = True
+        else:
+            parachute_events.update(resume.parachute_events)
+            pending[:] = resume.pending_events
+            parachute_state = resume.parachute_state
+            solver.set_state(resume.solver_state)
+            t, y = solver.t, solver.y
+            step = resume.step
+            peak_deceleration = resume.peak_deceleration
+            is_event = resume.is_event
+        g_surface = self.atmosphere.constants.GRAVITY_SURFACE
+        cancel_token = control.cancel_token
+        interval = control.checkpoint_interval
+        if control.checkpoint_callback is not None and interval:
+            next_checkpoint = (math.floor(t / interval + 1e-9) + 1) * interval
+        else:
+            next_checkpoint = math.inf
         
-        for i in range(n_steps - 1):
-            current_time = time[i]
-            current_vx = vx[i]
-            current_vy = vy[i]
-            current_height = height[i]
-            current_v_total = np.sqrt(current_vx**2 + current_vy**2)
-            
-            parachute_state = self._determine_parachute_state(
-                current_v_total,
-                input_data.parachute_system,
-                brake_deployed,
-                main_deployed,
-                brake_jettisoned,
-                parachute_events,
-                current_time,
-                current_height
-            )
-            
-            if parachute_state == 'brake' and not brake_deployed:
-                brake_deployed = True
-            elif parachute_state == 'main' and not main_deployed:
-                main_deployed = True
-            elif 'brake_jettison' in parachute_events and not brake_jettisoned:
-                brake_jettisoned = True
-            
-            parachute_states[i] = parachute_state
+        while True:
+            if landing_velocity is not None:
+                recorder.append(t, y, parachute_state, 0.0, True)
+                break
             
-            if input_data.parachute_system.use_parachutes and parachute_state != 'none':
-                ax, ay, v_total = self.physics.calculate_acceleration_with_parachutes(
-                    current_vx, current_vy, current_height,
-                    vehicle, parachute_state, parachute_params
-                )
-            else:
-                ax, ay, v_total = self.physics.calculate_acceleration(
-                    current_vx, current_vy, current_height, vehicle
-                )
+            # Контрольная точка - состояние в начале шага, до записи точки (t, y)
+            if cancel_token is not None and cancel_token.cancelled:
+                raise SimulationCancelled(self._make_checkpoint(
+                    control, input_data, solver, recorder, parachute_state, parachute_events,
+                    pending, peak_deceleration, step, is_event
+                ))
+            if t >= next_checkpoint:
+                control.checkpoint_callback(self._make_checkpoint(
+                    control, input_data, solver, recorder, parachute_state, parachute_events,
+                    pending, peak_deceleration, step, is_event
+                ))
+                next_checkpoint = (math.floor(t / interval + 1e-9) + 1) * interval
             
-            n_exp[i] = self.drag_model.n_value(v_total)
+            # Перегрузка от аэродинамических сил (без учета тяжести) в единицах g у поверхности
+            deceleration = np.sqrt(solver.f[0]**2 + (solver.f[1] + self.atmosphere.gravity(y[2]))**2)
+            deceleration /= g_surface
+            peak_deceleration = max(peak_deceleration, deceleration)
             
-            vx[i+1] = current_vx + ax * self.integration_step
-            vy[i+1] = current_vy + ay * self.integration_step
-            height[i+1] = current_height + current_vy * self.integration_step
-            time[i+1] = current_time + self.integration_step
+            recorder.append(t, y, parachute_state, deceleration, is_event)
+            is_event = False
             
-            if height[i+1] <= 0:
-                height[i+1] = 0
-                vx[i+1] = 0
-                vy[i+1] = 0
-                n_steps = i + 2
+            if solver.finished:
                 break
             
-            if v_total < 1.0 and current_height < 1000:
-                n_steps = i + 1
+            if np.sqrt(y[0]**2 + y[1]**2) < 1.0 and y[2] < 1000:
                 break
             
-            if progress_callback and i % 1000 == 0:
-                progress = min(80, 15 + 65 * i / n_steps)
-                progress_callback(progress, f"Step {i}/{n_steps}")
-        
-        time = time[:n_steps]
-        vx = vx[:n_steps]
-        vy = vy[:n_steps]
-        height = height[:n_steps]
-        n_exp = n_exp[:n_steps]
-        parachute_states = parachute_states[:n_steps]
+            solver.step()
+            hit = first_event([events['ground']] + [events[name] for name in pending], solver)
+            
+            if hit is None:
+                t, y = solver.t, solver.y
+            else:
+                t_event, event = hit
+                y_event = solver.dense_output()(t_event)
+                t = t_event
+                is_event = True
+                if event.name == 'ground':
+                    landing_velocity = np.sqrt(y_event[0]**2 + y_event[1]**2)
+                    y = np.array([0.0, 0.0, 0.0])
+                else:
+                    y = y_event
+                    self._record_parachute_event(event.name, t, y, parachute_events, pending)
+                    parachute_state = fire_satisfied_events(t, y)
+                    solver.restart(t, y)
+            
+            step += 1
+            if progress_callback and step % 1000 == 0:
+                progress = min(80, 15 + 65 * t / input_data.simulation_time)
+                progress_callback(progress, f"t = {t:.1f} с")
+        
+        results = recorder.result()
+        results.update({
+            'parachute_events': parachute_events,
+            'landing_velocity': landing_velocity,
+            'peak_deceleration': peak_deceleration
+        })
+        return results
+    
+    def _make_checkpoint(self, control, input_data, solver, recorder, parachute_state, parachute_events,
+                         pending, peak_deceleration, step, is_event):
+        sink_position = None
+        if control.sink is not None:
+            # Все точки до контрольной уже в приемнике
+            recorder.buffer.flush()
+            sink_position = control.sink.position()
+        return SimulationCheckpoint(
+            input_data=copy.deepcopy(input_data),
+            kind=control.kind,
+            time=solver.t,
+            state=solver.y.copy(),
+            solver_state=solver.get_state(),
+            parachute_state=parachute_state,
+            parachute_events=dict(parachute_events),
+            pending_events=list(pending),
+            peak_deceleration=peak_deceleration,
+            step=step,
+            is_event=is_event,
+            recorder=_snapshot_recorder(recorder),
+            sink_position=sink_position
+        )
+    
+    def _prepare_recorder(self, input_data, control):
+        checkpoint = control.resume_from
+        if checkpoint is None:
+            if control.kind == 'summary':
+                return _MetricsRecorder(self.atmosphere, self.thermal, input_data)
+            return self._create_recorder(input_data, control.sink)
+        
+        if checkpoint.kind != control.kind:
+            raise ValueError(f"Контрольная точка сохранена в другом режиме расчета: {checkpoint.kind}")
+        if checkpoint.input_data != input_data:
+            raise ValueError("Контрольная точка сохранена для других входных данных")
+        # Снимок копируется, чтобы с одной контрольной точки можно было продолжать несколько раз
+        recorder = _snapshot_recorder(checkpoint.recorder)
+        metrics = recorder if isinstance(recorder, _MetricsRecorder) else recorder.metrics
+        if metrics is not None:
+            metrics.atmosphere = self.atmosphere
+            metrics.thermal = self.thermal
+        if isinstance(getattr(recorder, 'buffer', None), StreamingBuffer):
+            recorder.buffer.sink = control.sink
+        return recorder
+    
+    def _create_solver(self, rhs, y0, input_data):
+        if input_data.integrator == 'euler':
+            return ExplicitEuler(rhs, 0.0, y0, input_data.simulation_time,
+                                 step=input_data.integration_step)
+        elif input_data.integrator == 'rk45':
+            return DormandPrince45(rhs, 0.0, y0, input_data.simulation_time,
+                                   rtol=input_data.rtol,
+                                   atol=input_data.atol,
+                                   max_step=input_data.max_step)
+        raise ValueError(f"Неизвестный метод интегрирования: {input_data.integrator}")
+    
+    def _create_recorder(self, input_data, sink=None):
+        if input_data.output_mode not in ('all', 'every', 'interval', 'adaptive'):
+            raise ValueError(f"Неизвестный режим сохранения траектории: {input_data.output_mode}")
+        
+        metrics = None
+        if sink is not None:
+            buffer = StreamingBuffer(sink, dtype=input_data.output_dtype)
+            metrics = _MetricsRecorder(self.atmosphere, self.thermal, input_data)
+        else:
+            buffer = TrajectoryBuffer(dtype=input_data.output_dtype)
         
-        v_total = np.sqrt(vx**2 + vy**2)
+        if input_data.output_mode == 'all':
+            return _TrajectoryRecorder(buffer, metrics)
+        if metrics is None:
+            metrics = _MetricsRecorder(self.atmosphere, self.thermal, input_data)
+        return _DecimatingRecorder(buffer, metrics, input_data)
+    
+    def _create_events(self, parachute_system):
+        def velocity_below(threshold):
+            return lambda t, y: np.sqrt(y[0]**2 + y[1]**2) - threshold
         
         return {
-            'time': time,
-            'vx': vx,
-            'vy': vy,
-            'height': height,
-            'n_exp': n_exp,
-            'v_total': v_total,
-            'parachute_states': parachute_states,
-            'parachute_events': parachute_events
+            'brake_deploy': Event('brake_deploy', velocity_below(parachute_system.brake_deploy_velocity)),
+            'main_deploy': Event('main_deploy', velocity_below(parachute_system.main_deploy_velocity)),
+            'brake_jettison': Event('brake_jettison', velocity_below(parachute_system.brake_jettison_velocity)),
+            'ground': Event('ground', lambda t, y: y[2]),
         }
     
-    def _determine_parachute_state(self, velocity, parachute_system, brake_deployed, main_deployed, brake_jettisoned, events, time, height):
-        if not parachute_system.use_parachutes:
-            return 'none'
-        
-        if not brake_deployed and velocity <= parachute_system.brake_deploy_velocity:
-            events['brake_deploy_time'] = time
-            events['brake_deploy_velocity'] = velocity
-            events['brake_deploy_height'] = height
-            return 'brake'
-        
-        if brake_deployed and not main_deployed and velocity <= parachute_system.main_deploy_velocity:
-            events['main_deploy_time'] = time
-            events['main_deploy_velocity'] = velocity
-            events['main_deploy_height'] = height
-            return 'both'
-        
-        if brake_deployed and not brake_jettisoned and velocity <= parachute_system.brake_jettison_velocity:
-            events['brake_jettison_time'] = time
-            events['brake_jettison_velocity'] = velocity
-            events['brake_jettison_height'] = height
+    def _record_parachute_event(self, name, time, y, events, pending):
+        events[f'{name}_time'] = time
+        events[f'{name}_velocity'] = np.sqrt(y[0]**2 + y[1]**2)
+        events[f'{name}_height'] = y[2]
+        
+        pending.remove(name)
+        if name == 'brake_deploy':
+            pending.extend(['main_deploy', 'brake_jettison'])
+    
+    def _determine_parachute_state(self, events):
+        brake_deployed = 'brake_deploy_time' in events
+        main_deployed = 'main_deploy_time' in events
+        brake_jettisoned = 'brake_jettison_time' in events
+        
+        if brake_deployed and not brake_jettisoned:
+            return 'both' if main_deployed else 'brake'
+        if main_deployed:
             return 'main'
-        
-        if brake_deployed:
-            if not brake_jettisoned:
-                if main_deployed:
-                    return 'both'
-                else:
-                    return 'brake'
-            else:
-                if main_deployed:
-                    return 'main'
-        
         return 'none'
     
-    def _calculate_thermal_loads(self, trajectory_results, input_data):
+    def _parachute_params(self, parachute_system):
+        return {
+            'brake_area': parachute_system.brake_chute_area,
+            'brake_coeff': parachute_system.brake_chute_coeff,
+            'main_area': parachute_system.main_chute_area,
+            'main_coeff': parachute_system.main_chute_coeff
+        }
+    
+    def _calculate_derived_quantities(self, trajectory_results, input_data):
+        # Ряды, нужные тепловому расчету, считаются один раз и передаются
+        # в SimulationOutput как уже вычисленные; остальные - по запросу
+        density = self.atmosphere.density(trajectory_results['height'])
+        return {
+            'velocity_total': trajectory_results['v_total'],
+            'density': density,
+            'heat_flux': self.thermal.calculate_heat_flux(
+                trajectory_results['v_total'], density, input_data.drag_coefficient
+            )
+        }
+    
+    def _calculate_thermal_loads(self, trajectory_results, derived, input_data):
+        thermal_load = self.thermal.calculate_ablation(
+            trajectory_results['time'], derived['heat_flux'], input_data.thermal_properties
+        )
+        
+        return thermal_load
+    
+    def _calculate_orbital_quantities(self, trajectory_results, derived, metrics=None):
         time = trajectory_results['time']
-        v_total = trajectory_results['v_total']
+        vx = trajectory_results['vx']
         height = trajectory_results['height']
+        heat_flux = derived['heat_flux']
         
-        densities = np.array([self.atmosphere.density(h) for h in height])
-        heat_flux = np.array([
-            self.thermal.calculate_heat_flux(v, rho, input_data.drag_coefficient)
-            for v, rho in zip(v_total, densities)
-        ])
+        if metrics is not None:
+            # Интегралы по всем шагам, а не по прореженной траектории
+            result = metrics.result()
+            return {key: result[key] for key in
+                    ('flight_distance', 'angular_displacement', 'arc_distance', 'max_heat_flux')}
         
-        thermal_load = self.thermal.calculate_ablation(
-            time, heat_flux, input_data.thermal_properties
-        )
+        # Та же квадратура, что в calculate_orbital_trajectory
+        angular_displacement = trapezoid(vx / (self.atmosphere.constants.RADIUS + height), time)
+        arc_distance = 0
+        if len(time) > 0:
+            arc_distance = angular_displacement * (self.atmosphere.constants.RADIUS + height[-1])
         
-        return thermal_load
+        return {
+            'flight_distance': trapezoid(vx, time),
+            'angular_displacement': angular_displacement,
+            'arc_distance': arc_distance,
+            'max_heat_flux': np.max(heat_flux) if len(heat_flux) > 0 else 0.0
+        }
     
-    def _compile_output(self, trajectory_results, thermal_load, orbital_results, input_data, vehicle_mass, airship_results, init_conditions):
+    def _compile_output(self, trajectory_results, derived, thermal_load, orbital, input_data, vehicle, vehicle_mass, airship_results):
         time = trajectory_results['time']
         vx = trajectory_results['vx']
-        vy = trajectory_results['vy']
         height = trajectory_results['height']
         v_total = trajectory_results['v_total']
-        n_exp = trajectory_results['n_exp']
-        
-        densities = np.array([self.atmosphere.density(h) for h in height])
-        heat_flux = np.array([
-            self.thermal.calculate_heat_flux(v, rho, input_data.drag_coefficient)
-            for v, rho in zip(v_total, densities)
-        ])
         
         flight_time = time[-1] if len(time) > 0 else 0
         final_velocity = v_total[-1] if len(v_total) > 0 else 0
         final_height = height[-1] if len(height) > 0 else 0
         
-        flight_distance = 0.0
-        if len(time) > 1:
-            for i in range(len(time) - 1):
-                dt = time[i+1] - time[i]
-                vx_avg = (vx[i] + vx[i+1]) / 2.0
-                flight_distance += vx_avg * dt
-        
-        theta, radius, v_theta, v_r, latitude, longitude = orbital_results
-        
-        angular_displacement = 0.0
-        if len(theta) > 0:
-            angular_displacement = theta[-1] - theta[0]
-        
-        arc_distance = angular_displacement * radius[-1] if len(radius) > 0 else 0
-        
-        return SimulationOutput(
+        output = SimulationOutput(
             time=time,
             velocity_x=vx,
-            velocity_y=vy,
-            velocity_total=v_total,
+            velocity_y=trajectory_results['vy'],
             height=height,
-            heat_flux=heat_flux,
-            n_exponent=n_exp,
-            theta=theta,
-            radius=radius,
-            velocity_theta=v_theta,
-            velocity_radial=v_r,
-            latitude=latitude,
-            longitude=longitude,
-            flight_distance=flight_distance,
+            parachute_state_codes=trajectory_results['parachute_states'],
+            flight_distance=orbital['flight_distance'],
             flight_time=flight_time,
             final_velocity=final_velocity,
             final_height=final_height,
             thermal_load=thermal_load,
             parachute_events=trajectory_results.get('parachute_events', {}),
-            parachute_states=trajectory_results.get('parachute_states', []),
             airship_results=airship_results,
             vehicle_mass=vehicle_mass,
-            max_heat_flux=np.max(heat_flux) if len(heat_flux) > 0 else 0.0,
-            angular_displacement=angular_displacement,
-            arc_distance=arc_distance
-        )
\ No newline at end of file
+            max_heat_flux=orbital['max_heat_flux'],
+            angular_displacement=orbital['angular_displacement'],
+            arc_distance=orbital['arc_distance'],
+            landing_velocity=trajectory_results.get('landing_velocity'),
+            peak_deceleration=trajectory_results.get('peak_deceleration', 0.0),
+            input_data=input_data,
+            vehicle=vehicle
+        )
+        output._engine = self
+        # Уже вычисленные ряды траектории общие для результатов с той же
+        # траекторией, но словарь у каждого результата свой: ряды, вычисленные
+        # по запросу одного результата, не попадают в кэш стадии и в другие результаты
+        output._cache = dict(derived)
+        return output
+    
+    def _compile_summary(self, trajectory_results, recorder, input_data, vehicle_mass, airship_results):
+        # recorder - _MetricsRecorder, накопивший итоги по всем шагам
+        metrics = recorder.result()
+        thermal_load = recorder.ablation.thermal_load(metrics['max_heat_flux'], self.thermal)
+        
+        return SimulationSummary(
+            flight_distance=metrics['flight_distance'],
+            flight_time=metrics['flight_time'],
+            final_velocity=metrics['final_velocity'],
+            final_height=metrics['final_height'],
+            thermal_load=thermal_load,
+            parachute_events=trajectory_results.get('parachute_events', {}),
+            airship_results=airship_results,
+            vehicle_mass=vehicle_mass,
+            max_heat_flux=metrics['max_heat_flux'],
+            angular_displacement=metrics['angular_displacement'],
+            arc_distance=metrics['arc_distance'],
+            landing_velocity=trajectory_results.get('landing_velocity'),
+            peak_deceleration=trajectory_results.get('peak_deceleration', 0.0),
+            n_samples=metrics['n_samples']
+        )
@@ -0,0 +1,223 @@
+"""
+Приемники траектории для потоковой записи на диск
+
+SimulationEngine.run(input_data, sink=...) передает приемнику точки
+траектории блоками по мере интегрирования. Каждый блок сразу дописывается
+в файл и сбрасывается на диск, поэтому при аварийном завершении расчета
+в файле остаются все переданные точки, а память ограничена размером блока.
+"""
+import csv
+import json
+import os
+import struct
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .output_io import to_json
+from .trajectory_buffer import decode_parachute_states
+
+TRAJECTORY_MAGIC = b'VSIMTRJ1'
+TRAJECTORY_VERSION = 1
+# Заголовок дополняется до кратного размера, чтобы записи начинались с выровненного смещения
+HEADER_ALIGNMENT = 64
+CSV_COLUMNS = ('time', 'velocity_x', 'velocity_y', 'height', 'parachute_state')
+
+
+def trajectory_record_dtype(dtype=np.float64) -> np.dtype:
+    """Тип записи двоичного файла траектории: четыре числа и код состояния парашютов"""
+    dtype = np.dtype(dtype).newbyteorder('<')
+    return np.dtype([('time', dtype), ('vx', dtype), ('vy', dtype), ('height', dtype),
+                     ('parachute_state', np.int8)])
+
+
+class TrajectorySink:
+    """
+    Базовый приемник траектории
+
+    Движок вызывает open(input_data, position) перед интегрированием,
+    write(chunk) для каждого блока и close() в конце (в том числе при ошибке).
+    Блок - словарь столбцов 'time', 'vx', 'vy', 'height', 'parachute_states'
+    (коды int8); массивы блока переиспользуются движком и после write не должны
+    храниться. position() - позиция после записанных точек, которую движок
+    сохраняет в контрольной точке; при продолжении расчета она передается в
+    open, и приемник должен отбросить все записанное после нее.
+    """
+
+    def __init__(self, chunk_size: int = 4096):
+        """
+        Args:
+            chunk_size: Число точек в блоке
+        """
+        self.chunk_size = chunk_size
+
+    def open(self, input_data, position: Optional[int] = None):
+        pass
+
+    def position(self) -> Optional[int]:
+        return None
+
+    def write(self, chunk: Dict[str, np.ndarray]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _FileSink(TrajectorySink):
+    def __init__(self, path: Union[str, Path], chunk_size: int = 4096, fsync: bool = False):
+        super().__init__(chunk_size)
+        self.path = Path(path)
+        self.fsync = fsync
+        self.n_points = 0
+        self._file = None
+
+    def _flush(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def position(self) -> int:
+        self._flush()
+        return self._file.tell()
+
+    def _reopen(self, position: int, mode: str, **kwargs):
+        # Продолжение: записанное после контрольной точки отбрасывается
+        self._file = open(self.path, mode, **kwargs)
+        self._file.seek(position)
+        self._file.truncate()
+        self.n_points = 0
+
+    def close(self):
+        if self._file is not None:
+            self._flush()
+            self._file.close()
+            self._file = None
+
+
+class BinaryTrajectorySink(_FileSink):
+    """
+    Двоичный файл с дозаписью: сигнатура, длина и JSON-заголовок (тип записи,
+    входные данные), затем записи фиксированной длины (trajectory_record_dtype)
+    в типе хранения output_dtype. Неполная последняя запись после аварийного
+    завершения при чтении отбрасывается (read_trajectory).
+    """
+
+    def __init__(self, path: Union[str, Path], chunk_size: int = 4096, fsync: bool = False):
+        """
+        Args:
+            path: Путь к файлу (перезаписывается)
+            chunk_size: Число точек в блоке
+            fsync: Сбрасывать каждый блок на диск через os.fsync
+                   (защита и от сбоя ОС, а не только процесса)
+        """
+        super().__init__(path, chunk_size, fsync)
+        self._records = None
+
+    def open(self, input_data, position: Optional[int] = None):
+        record_dtype = trajectory_record_dtype(input_data.output_dtype)
+        self._records = np.empty(self.chunk_size, dtype=record_dtype)
+        if position is not None:
+            self._reopen(position, 'r+b')
+            return
+        header = to_json({
+            'version': TRAJECTORY_VERSION,
+            'dtype': np.lib.format.dtype_to_descr(record_dtype),
+            'input_data': asdict(input_data)
+        }).encode('utf-8')
+        prefix = len(TRAJECTORY_MAGIC) + 4
+        header += b' ' * (-(prefix + len(header)) % HEADER_ALIGNMENT)
+        self._file = open(self.path, 'wb')
+        self._file.write(TRAJECTORY_MAGIC)
+        self._file.write(struct.pack('<I', len(header)))
+        self._file.write(header)
+        self._flush()
+        self.n_points = 0
+
+    def write(self, chunk: Dict[str, np.ndarray]):
+        n = len(chunk['time'])
+        if n > len(self._records):
+            self._records = np.empty(n, dtype=self._records.dtype)
+        records = self._records[:n]
+        records['time'] = chunk['time']
+        records['vx'] = chunk['vx']
+        records['vy'] = chunk['vy']
+        records['height'] = chunk['height']
+        records['parachute_state'] = chunk['parachute_states']
+        self._file.write(memoryview(records).cast('B'))
+        self._flush()
+        self.n_points += n
+
+
+class CsvTrajectorySink(_FileSink):
+    """CSV-файл с заголовком CSV_COLUMNS; состояние парашютов - названием"""
+
+    def open(self, input_data, position: Optional[int] = None):
+        if position is not None:
+            self._reopen(position, 'r+', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            return
+        self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(CSV_COLUMNS)
+        self._flush()
+        self.n_points = 0
+
+    def write(self, chunk: Dict[str, np.ndarray]):
+        # tolist() дает числа Python, repr которых восстанавливает значение точно
+        self._writer.writerows(zip(
+            np.asarray(chunk['time'], dtype=float).tolist(),
+            np.asarray(chunk['vx'], dtype=float).tolist(),
+            np.asarray(chunk['vy'], dtype=float).tolist(),
+            np.asarray(chunk['height'], dtype=float).tolist(),
+            decode_parachute_states(chunk['parachute_states']).tolist()
+        ))
+        self._flush()
+        self.n_points += len(chunk['time'])
+
+
+def read_trajectory(path: Union[str, Path]) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Открывает двоичный файл траектории (в том числе незавершенный) без чтения данных
+
+    Args:
+        path: Путь к файлу BinaryTrajectorySink
+
+    Returns:
+        (столбцы, заголовок): столбцы 'time', 'vx', 'vy', 'height',
+        'parachute_states' - представления только для чтения на отображенный
+        в память файл; заголовок содержит 'input_data' (словарь)
+    """
+    with open(path, 'rb') as fh:
+        if fh.read(len(TRAJECTORY_MAGIC)) != TRAJECTORY_MAGIC:
+            raise ValueError(f"{path}: не файл траектории")
+        header_length, = struct.unpack('<I', fh.read(4))
+        header = json.loads(fh.read(header_length).decode('utf-8'))
+    if header['version'] > TRAJECTORY_VERSION:
+        raise ValueError(f"{path}: неподдерживаемая версия формата {header['version']}")
+
+    record_dtype = np.lib.format.descr_to_dtype(
+        [tuple(field) for field in header['dtype']]
+    )
+    offset = len(TRAJECTORY_MAGIC) + 4 + header_length
+    count = (os.path.getsize(path) - offset) // record_dtype.itemsize
+    if count > 0:
+        records = np.memmap(path, dtype=record_dtype, mode='r', offset=offset, shape=(count,))
+    else:
+        records = np.empty(0, dtype=record_dtype)
+    columns = {
+        'time': records['time'],
+        'vx': records['vx'],
+        'vy': records['vy'],
+        'height': records['height'],
+        'parachute_states': records['parachute_state']
+    }
+    return columns, header
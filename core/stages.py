@@ -0,0 +1,106 @@
+"""
+Запоминание результатов этапов расчета
+
+Расчет разбит на этапы (масса -> траектория -> производные ряды ->
+тепловой расчет -> орбитальные величины -> результат). Ключ каждого этапа
+составляется из полей SimulationInput, которые этап читает, и ключей или
+результатов предыдущих этапов, поэтому после изменения входных данных
+пересчитываются только этапы ниже по цепочке.
+
+Запомненный результат этапа общий для всех расчетов с тем же ключом,
+поэтому массивы в нем (в т.ч. внутри словарей и кортежей) доступны
+только для чтения: изменение рядов одного результата не может испортить
+другие результаты и следующие расчеты.
+"""
+import logging
+from collections import OrderedDict
+from dataclasses import astuple, is_dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def freeze_arrays(value: Any) -> Any:
+    """Делает массивы numpy в value (и во вложенных словарях, списках, кортежах) доступными только для чтения"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze_arrays(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze_arrays(item)
+    return value
+
+
+def input_key(input_data: Any, fields: Sequence[str]) -> tuple:
+    """
+    Ключ этапа по значениям полей входных данных
+
+    Args:
+        input_data: Входные данные (dataclass)
+        fields: Имена полей; вложенные поля задаются через точку,
+                например 'thermal_properties.density'. Поле-dataclass
+                входит в ключ всеми своими значениями
+
+    Returns:
+        Кортеж значений, пригодный для использования как ключ словаря
+    """
+    values = []
+    for name in fields:
+        value = input_data
+        for part in name.split('.'):
+            value = getattr(value, part)
+        values.append(astuple(value) if is_dataclass(value) else value)
+    return tuple(values)
+
+
+class StageCache:
+    """
+    Результаты этапов расчета по ключам
+
+    Для каждого этапа хранится не более maxsize последних результатов
+    (вытесняется давно не использованный). maxsize=0 отключает запоминание.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self.maxsize = max(int(maxsize), 0)
+        self._entries: Dict[str, OrderedDict] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def get(self, stage: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Результат этапа: запомненный для этого ключа или вычисленный заново
+
+        Args:
+            stage: Имя этапа
+            key: Ключ этапа
+            compute: Функция без аргументов, вычисляющая результат
+
+        Returns:
+            Результат этапа
+        """
+        entries = self._entries.setdefault(stage, OrderedDict())
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits[stage] = self.hits.get(stage, 0) + 1
+            logger.debug("Stage '%s': reused", stage)
+            return entries[key]
+
+        self.misses[stage] = self.misses.get(stage, 0) + 1
+        value = compute()
+        if self.maxsize > 0:
+            entries[key] = freeze_arrays(value)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+        return value
+
+    def clear(self, stage: Optional[str] = None):
+        """Забывает результаты одного этапа или всех"""
+        if stage is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(stage, None)
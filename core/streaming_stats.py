@@ -0,0 +1,205 @@
+"""
+Потоковая статистика: моменты, квантили и гистограммы
+с памятью, не зависящей от числа обработанных значений
+"""
+import random
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RunningMoments:
+    """Среднее, дисперсия, минимум и максимум (алгоритм Уэлфорда/Чана)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        other = RunningMoments()
+        other.count = values.size
+        other.mean = float(values.mean())
+        other._m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: 'RunningMoments') -> None:
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Несмещенная оценка дисперсии"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+
+class QuantileSketch:
+    """
+    Скетч квантилей KLL (Karnin, Lang, Liberty, 2016)
+
+    Уровень i хранит не более k значений с весом 2**i; при переполнении
+    уровень сортируется и каждое второе значение переходит на следующий.
+    Память O(k log(n/k)), ранговая ошибка порядка 1/k.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = 0):
+        self.k = k
+        self.count = 0
+        self.levels: List[List[float]] = [[]]
+        self._random = random.Random(seed)
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        self.count += values.size
+        self.levels[0].extend(values.tolist())
+        self._compress()
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self.k:
+                items.sort()
+                # При нечетном числе одно значение остается на уровне
+                keep = [items.pop(self._random.randrange(len(items)))] if len(items) % 2 else []
+                offset = self._random.randint(0, 1)
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[level + 1].extend(items[offset::2])
+                self.levels[level] = keep
+            level += 1
+
+    def _weighted_items(self) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate([np.asarray(items, dtype=float) for items in self.levels])
+        weights = np.concatenate([np.full(len(items), 2.0 ** level)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        Квантиль(и) уровня q (скаляр или массив в [0, 1])
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        values, cumulative = self._weighted_items()
+        ranks = np.asarray(q, dtype=float) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, ranks, side='left'), len(values) - 1)
+        result = values[index]
+        return result if np.ndim(q) else float(result)
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+
+class StreamingHistogram:
+    """
+    Гистограмма с фиксированными границами бинов
+
+    Если диапазон не задан, он выбирается по первой порции данных
+    (с запасом в половину размаха); значения вне диапазона учитываются
+    в счетчиках underflow/overflow.
+    """
+
+    def __init__(self, bins: int = 50, value_range: Optional[Tuple[float, float]] = None):
+        self.bins = bins
+        self.edges: Optional[np.ndarray] = None
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        if value_range is not None:
+            self.edges = np.linspace(value_range[0], value_range[1], bins + 1)
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        if self.edges is None:
+            low, high = float(values.min()), float(values.max())
+            margin = 0.5 * (high - low) if high > low else max(abs(low), 1.0) * 0.5
+            self.edges = np.linspace(low - margin, high + margin, self.bins + 1)
+
+        self.underflow += int(np.count_nonzero(values < self.edges[0]))
+        self.overflow += int(np.count_nonzero(values > self.edges[-1]))
+        counts, _ = np.histogram(values, bins=self.edges)
+        self.counts += counts
+
+    def merge(self, other: 'StreamingHistogram') -> None:
+        if other.edges is None:
+            return
+        if self.edges is None:
+            self.edges = other.edges.copy()
+        elif not np.array_equal(self.edges, other.edges):
+            raise ValueError("Гистограммы с разными границами бинов нельзя объединить")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+
+class MetricAccumulator:
+    """Потоковая статистика одной величины: моменты, квантили, гистограмма"""
+
+    def __init__(self, bins: int = 50,
+                 value_range: Optional[Tuple[float, float]] = None,
+                 sketch_size: int = 200):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(sketch_size)
+        self.histogram = StreamingHistogram(bins, value_range)
+        # Число пропущенных значений (NaN), например скорость посадки для не приземлившихся
+        self.missing = 0
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        finite = values[~np.isnan(values)]
+        self.missing += values.size - finite.size
+        self.moments.update(finite)
+        self.sketch.update(finite)
+        self.histogram.update(finite)
+
+    def merge(self, other: 'MetricAccumulator') -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+        self.missing += other.missing
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def summary(self, quantiles: Sequence[float] = (0.01, 0.05, 0.5, 0.95, 0.99)) -> Dict[str, float]:
+        empty = self.moments.count == 0
+        result = {
+            'count': self.moments.count,
+            'missing': self.missing,
+            'mean': np.nan if empty else self.moments.mean,
+            'std': np.nan if empty else self.moments.std,
+            'min': np.nan if empty else self.moments.min,
+            'max': np.nan if empty else self.moments.max,
+        }
+        for q in quantiles:
+            result[f'p{100 * q:g}'] = self.quantile(q)
+        return result
@@ -0,0 +1,288 @@
+"""
+Параметрические расчеты по сетке значений SimulationInput
+в пуле процессов
+"""
+import itertools
+import logging
+import os
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .shared_results import SharedOutputHandle, SharedResultTransport
+from .simulation import SimulationEngine, SimulationInput, SimulationOutput
+
+logger = logging.getLogger(__name__)
+
+# Движок создается один раз на процесс: таблицы атмосферы не перестраиваются для каждого расчета
+_worker_engine: Optional[SimulationEngine] = None
+
+
+def _get_worker_engine() -> SimulationEngine:
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = SimulationEngine()
+    return _worker_engine
+
+
+def set_input_value(input_data: SimulationInput, name: str, value: Any) -> SimulationInput:
+    """
+    Возвращает копию входных данных с измененным полем
+
+    Args:
+        input_data: Исходные данные
+        name: Имя поля; вложенные поля задаются через точку,
+              например 'parachute_system.brake_deploy_velocity'
+        value: Новое значение
+
+    Returns:
+        Новый SimulationInput
+    """
+    head, _, rest = name.partition('.')
+    if not hasattr(input_data, head):
+        raise AttributeError(f"Неизвестный параметр: {name}")
+    if rest:
+        value = set_input_value(getattr(input_data, head), rest, value)
+    return replace(input_data, **{head: value})
+
+
+@dataclass
+class SweepCase:
+    """Один расчетный случай сетки"""
+    index: int
+    parameters: Dict[str, Any]
+    input_data: SimulationInput
+
+
+@dataclass
+class SweepResult:
+    """Результат одного случая: выход симуляции либо текст ошибки"""
+    index: int
+    parameters: Dict[str, Any]
+    output: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _run_case(index: int, input_data: SimulationInput,
+              reducer: Optional[Callable] = None,
+              metrics_only: bool = False,
+              transport: Optional[SharedResultTransport] = None):
+    try:
+        output = _get_worker_engine().run(input_data, metrics_only=metrics_only)
+        if reducer is not None:
+            output = reducer(output)
+        if transport is not None and isinstance(output, SimulationOutput):
+            output = transport.export(output)
+        return index, output, None
+    except Exception:
+        return index, None, traceback.format_exc()
+
+
+class SweepRunner:
+    """
+    Расчет всех комбинаций значений параметров (декартово произведение осей)
+
+    Пример:
+        runner = SweepRunner(base, {'entry_angle': [8, 10, 12],
+                                    'entry_speed': [7000, 7500]},
+                             max_workers=4)
+        results = runner.run()
+    """
+
+    def __init__(self,
+                 base_input: SimulationInput,
+                 axes: Dict[str, Sequence[Any]],
+                 max_workers: Optional[int] = None,
+                 reducer: Optional[Callable] = None,
+                 metrics_only: bool = False,
+                 shared_results: bool = True):
+        """
+        Args:
+            base_input: Базовые входные данные
+            axes: Оси сетки: имя поля SimulationInput -> список значений
+            max_workers: Число процессов (по умолчанию - число ядер);
+                         при 1 расчет идет в текущем процессе
+            reducer: Функция уровня модуля, применяемая к SimulationOutput
+                     в рабочем процессе (например, выбор нужных скаляров),
+                     чтобы не передавать массивы траектории обратно
+            metrics_only: Рассчитывать только скалярные характеристики
+                          (SimulationSummary) без хранения траектории
+            shared_results: Возвращать SimulationOutput из рабочих процессов
+                            через общую память (SharedResultTransport): ряды
+                            результатов - представления только для чтения
+                            без копирования; False - обычная сериализация
+        """
+        self.base_input = base_input
+        self.axes = dict(axes)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.reducer = reducer
+        self.metrics_only = metrics_only
+        self.shared_results = shared_results
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(values) for values in self.axes.values())
+
+    def cases(self) -> List[SweepCase]:
+        names = list(self.axes)
+        cases = []
+        for index, values in enumerate(itertools.product(*self.axes.values())):
+            input_data = self.base_input
+            for name, value in zip(names, values):
+                input_data = set_input_value(input_data, name, value)
+            cases.append(SweepCase(index, dict(zip(names, values)), input_data))
+        return cases
+
+    def run(self, progress_callback: Optional[Callable] = None) -> List[SweepResult]:
+        """
+        Выполняет все случаи
+
+        Args:
+            progress_callback: Функция progress_callback(percent, message),
+                               вызывается по завершении каждого случая
+
+        Returns:
+            Список SweepResult в порядке случаев сетки
+        """
+        return run_cases(self.cases(), self.max_workers, self.reducer,
+                         self.metrics_only, progress_callback, self.shared_results)
+
+
+def run_cases(cases: Sequence[SweepCase],
+              max_workers: Optional[int] = None,
+              reducer: Optional[Callable] = None,
+              metrics_only: bool = False,
+              progress_callback: Optional[Callable] = None,
+              shared_results: bool = True) -> List[SweepResult]:
+    """
+    Выполняет произвольный набор случаев в пуле процессов
+
+    Исключение в случае отмечает ошибкой только этот случай. Аварийное
+    завершение рабочего процесса ломает весь пул: случаи, бывшие в работе,
+    пересчитываются по одному, ошибкой отмечается только роняющий процесс,
+    остальные продолжаются в новом пуле.
+
+    Args:
+        cases: Случаи; index каждого - только метка, она переносится
+               в SweepResult.index
+        max_workers: Число процессов (по умолчанию - число ядер);
+                     при 1 расчет идет в текущем процессе
+        reducer: См. SweepRunner
+        metrics_only: См. SweepRunner
+        progress_callback: Функция progress_callback(percent, message),
+                           вызывается по завершении каждого случая
+        shared_results: См. SweepRunner
+
+    Returns:
+        Список SweepResult в порядке случаев
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    cases = list(cases)
+    total = len(cases)
+    results: List[Optional[SweepResult]] = [None] * total
+    done = 0
+    logger.info(f"Starting sweep: {total} cases, {max_workers} workers")
+
+    # Результаты хранятся по позиции случая в cases; case.index - только метка
+    def collect(position, output, error):
+        nonlocal done
+        case = cases[position]
+        results[position] = SweepResult(case.index, case.parameters, output, error)
+        if error is not None:
+            logger.warning(f"Sweep case {case.index} failed:\n{error}")
+        done += 1
+        if progress_callback:
+            progress_callback(100 * done / total, f"Case {done}/{total}")
+
+    if max_workers == 1:
+        for position, case in enumerate(cases):
+            collect(*_run_case(position, case.input_data, reducer, metrics_only))
+        return results
+
+    # Полные результаты возвращаются через общую память; сводки и результаты
+    # reducer малы и передаются обычной сериализацией
+    transport = SharedResultTransport() if shared_results and not metrics_only else None
+
+    def submit(executor, position):
+        return executor.submit(_run_case, position, cases[position].input_data, reducer, metrics_only, transport)
+
+    def finish(future):
+        position, output, error = future.result()
+        if isinstance(output, SharedOutputHandle):
+            output = transport.open(output)
+        collect(position, output, error)
+
+    def run_pool(pending) -> List[int]:
+        """
+        Считает случаи с позициями из pending. Падение рабочего процесса делает
+        пул непригодным, и все его незавершенные future получают BrokenProcessPool;
+        тогда возвращаются позиции случаев, которые были в работе (среди них - упавший)
+        """
+        in_flight = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while pending or in_flight:
+                    # В работе не больше max_workers случаев - столько же подозреваемых при падении
+                    while pending and len(in_flight) < max_workers:
+                        position = pending.popleft()
+                        try:
+                            in_flight[submit(executor, position)] = position
+                        except BrokenProcessPool:
+                            pending.appendleft(position)
+                            raise
+                    completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in completed:
+                        if isinstance(future.exception(), BrokenProcessPool):
+                            raise future.exception()
+                        position = in_flight.pop(future)
+                        try:
+                            finish(future)
+                        except Exception:
+                            collect(position, None, traceback.format_exc())
+            except BrokenProcessPool:
+                suspects = []
+                for future, position in in_flight.items():
+                    # Успевшие завершиться до падения случаи сохраняются
+                    if future.done() and not isinstance(future.exception(), BrokenProcessPool):
+                        try:
+                            finish(future)
+                        except Exception:
+                            collect(position, None, traceback.format_exc())
+                    else:
+                        suspects.append(position)
+                return suspects
+        return []
+
+    def run_isolated(position):
+        """Повторный расчет подозреваемого случая в отдельном процессе"""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = submit(executor, position)
+            try:
+                finish(future)
+            except Exception:
+                collect(position, None, traceback.format_exc())
+
+    try:
+        pending = deque(range(total))
+        while pending:
+            suspects = run_pool(pending)
+            if suspects:
+                # Какой из случаев в работе уронил процесс, неизвестно: каждый
+                # пересчитывается отдельно, ошибкой отмечается только тот, что
+                # роняет процесс снова
+                logger.warning(f"Worker process crashed, re-running {len(suspects)} cases one by one")
+                for position in suspects:
+                    run_isolated(position)
+    finally:
+        if transport is not None:
+            transport.close()
+
+    logger.info("Sweep completed")
+    return results
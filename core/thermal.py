@@ -2,6 +2,8 @@
 import numpy as np
 from dataclasses import dataclass
 
+from .kernels import trapezoid
+
 @dataclass
 class ThermalProperties:
     specific_heat: float = 900.0
@@ -34,83 +36,188 @@ class ThermalCalculator:
         energy_per_area = 0.0
         
         if len(time) > 1 and len(heat_flux) > 1:
-            for i in range(len(time) - 1):
-                dt = time[i+1] - time[i]
-                q_avg = (heat_flux[i] + heat_flux[i+1]) / 2.0
-                energy_per_area += q_avg * dt
+            energy_per_area = trapezoid(heat_flux, time)
         
         total_energy = energy_per_area * heat_shield_area
         return total_energy, energy_per_area
     
     def calculate_ablation(self, time, heat_flux, properties):
-        mass_per_area = properties.density * properties.thickness
-        
-        if len(time) <= 1 or mass_per_area <= 0:
+        if len(time) <= 1 or properties.density * properties.thickness <= 0:
             return ThermalLoad()
         
-        ablated_mass = 0.0
-        current_temp = properties.initial_temperature
+        time = np.asarray(time)
+        heat_flux = np.asarray(heat_flux)
+        tracker = AblationTracker(properties)
+        tracker.add_series(np.diff(time), (heat_flux[:-1] + heat_flux[1:]) / 2.0)
         
-        for i in range(len(time) - 1):
-            dt = time[i+1] - time[i]
-            q_avg = (heat_flux[i] + heat_flux[i+1]) / 2.0
-            
-            if q_avg <= 0:
-                continue
-            
-            energy_in = q_avg * dt
+        max_heat_flux = np.max(heat_flux) if len(heat_flux) > 0 else 0.0
+        return tracker.thermal_load(max_heat_flux, self)
+    
+    def calculate_efficiency(self, total_energy, properties):
+        heat_shield_mass = properties.density * properties.thickness * properties.area
+        max_energy = heat_shield_mass * properties.specific_heat * (properties.max_temperature - properties.initial_temperature)
+        
+        if total_energy > 0 and max_energy > 0:
+            efficiency = min(max_energy, total_energy) / max_energy * 100
+        else:
+            efficiency = 100.0
+        
+        return efficiency
+
+def _running_sum(initial, values):
+    """Накопленные суммы initial + values[0] + ... в порядке пошагового сложения"""
+    return np.cumsum(np.concatenate(([initial], values)))[1:]
+
+class AblationTracker:
+    """
+    Пошаговый расчет нагрева и абляции без хранения истории потока.
+    Поля properties могут быть массивами - тогда каждый элемент
+    соответствует отдельной траектории ансамбля (shape - форма ансамбля).
+    """
+    
+    def __init__(self, properties, shape=()):
+        self.properties = properties
+        self.shape = shape
+        if shape == ():
+            self.initial_mass_per_area = float(properties.density * properties.thickness)
+            self.mass_per_area = self.initial_mass_per_area
+            self.temperature = float(properties.initial_temperature)
+            self.ablated_mass = 0.0
+            self.energy_per_area = 0.0
+        else:
+            self.initial_mass_per_area = np.broadcast_to(
+                np.asarray(properties.density * properties.thickness, dtype=float), shape
+            ).copy()
+            self.mass_per_area = self.initial_mass_per_area.copy()
+            self.temperature = np.full(shape, properties.initial_temperature, dtype=float)
+            self.ablated_mass = np.zeros(shape)
+            self.energy_per_area = np.zeros(shape)
+        # Теплозащита прогорела насквозь - дальнейший нагрев не учитывается
+        self.burnt_through = self.initial_mass_per_area <= 0
+    
+    def add(self, dt, q_avg, mask=True):
+        """Учитывает интервал dt со средним тепловым потоком q_avg"""
+        if self.shape == ():
+            self._add_scalar(dt, q_avg)
+        else:
+            self._add_array(dt, q_avg, mask)
+    
+    def add_series(self, dt, q_avg):
+        """
+        Учитывает последовательность интервалов dt со средними потоками q_avg
+        (одиночная траектория) без цикла по шагам. Результат совпадает с
+        вызовом add() для каждого интервала: суммы накапливаются np.cumsum
+        в том же порядке, что и в пошаговом расчете.
+        """
+        props = self.properties
+        energy_in = np.asarray(q_avg, dtype=float) * np.asarray(dt, dtype=float)
+        if len(energy_in) == 0:
+            return
+        self.energy_per_area = _running_sum(self.energy_per_area, energy_in)[-1]
+        if self.burnt_through:
+            return
+        
+        # Шаги без нагрева (q_avg <= 0) состояние покрытия не меняют
+        heating = np.where(np.asarray(q_avg) > 0, energy_in, 0.0)
+        if self.temperature < props.melting_temperature:
+            # Нагрев до плавления: масса покрытия постоянна
+            temperature = _running_sum(self.temperature,
+                                       heating / (self.mass_per_area * props.specific_heat))
+            melted = np.flatnonzero(temperature >= props.melting_temperature)
+            if len(melted) == 0:
+                self.temperature = float(temperature[-1])
+                return
+            start = melted[0]
+            # Избыток энергии шага, на котором достигнута температура плавления, идет на абляцию
+            excess = (temperature[start] - props.melting_temperature) * \
+                     self.mass_per_area * props.specific_heat
+            self.temperature = props.melting_temperature
+            heating = np.concatenate(([excess], heating[start + 1:]))
+        
+        mass_ablated = heating / props.latent_heat
+        mass_per_area = _running_sum(self.mass_per_area, -mass_ablated)
+        ablated_mass = _running_sum(self.ablated_mass, mass_ablated)
+        burnt = np.flatnonzero(mass_per_area <= 0)
+        if len(burnt):
+            self.ablated_mass = float(ablated_mass[burnt[0]])
+            self.mass_per_area = 0
+            self.burnt_through = True
+        else:
+            self.ablated_mass = float(ablated_mass[-1])
+            self.mass_per_area = float(mass_per_area[-1])
+    
+    def _add_scalar(self, dt, q_avg):
+        props = self.properties
+        energy_in = q_avg * dt
+        self.energy_per_area += energy_in
+        
+        if q_avg <= 0 or self.burnt_through:
+            return
+        
+        if self.temperature < props.melting_temperature:
+            self.temperature += energy_in / (self.mass_per_area * props.specific_heat)
             
-            if current_temp < properties.melting_temperature:
-                temp_rise = energy_in / (mass_per_area * properties.specific_heat)
-                current_temp += temp_rise
-                
-                if current_temp > properties.melting_temperature:
-                    excess_energy = (current_temp - properties.melting_temperature) * mass_per_area * properties.specific_heat
-                    current_temp = properties.melting_temperature
-                    
-                    if excess_energy > 0:
-                        ablation_energy = excess_energy
-                    else:
-                        ablation_energy = 0
-                else:
-                    ablation_energy = 0
+            if self.temperature > props.melting_temperature:
+                ablation_energy = (self.temperature - props.melting_temperature) * \
+                                  self.mass_per_area * props.specific_heat
+                self.temperature = props.melting_temperature
             else:
-                ablation_energy = energy_in
+                ablation_energy = 0
+        else:
+            ablation_energy = energy_in
+        
+        if ablation_energy > 0 and self.temperature >= props.melting_temperature:
+            mass_ablated = ablation_energy / props.latent_heat
+            self.ablated_mass += mass_ablated
+            self.mass_per_area -= mass_ablated
             
-            if ablation_energy > 0 and current_temp >= properties.melting_temperature:
-                mass_ablated = ablation_energy / properties.latent_heat
-                ablated_mass += mass_ablated
-                mass_per_area -= mass_ablated
-                
-                if mass_per_area <= 0:
-                    mass_per_area = 0
-                    ablated_fraction = 1.0
-                    break
-        
-        if properties.density * properties.thickness > 0:
-            ablated_fraction = ablated_mass / (properties.density * properties.thickness)
+            if self.mass_per_area <= 0:
+                self.mass_per_area = 0
+                self.burnt_through = True
+    
+    def _add_array(self, dt, q_avg, mask):
+        props = self.properties
+        self.energy_per_area += np.where(mask, q_avg * dt, 0.0)
+        
+        heating = mask & (q_avg > 0) & ~self.burnt_through
+        energy_in = q_avg * dt
+        below = self.temperature < props.melting_temperature
+        capacity = np.where(self.mass_per_area > 0, self.mass_per_area, 1.0) * props.specific_heat
+        new_temperature = self.temperature + energy_in / capacity
+        
+        excess = (new_temperature - props.melting_temperature) * capacity
+        ablation_energy = np.where(below, np.where(excess > 0, excess, 0.0), energy_in)
+        new_temperature = np.where(below, np.minimum(new_temperature, props.melting_temperature),
+                                   self.temperature)
+        self.temperature = np.where(heating, new_temperature, self.temperature)
+        
+        ablating = heating & (ablation_energy > 0) & (self.temperature >= props.melting_temperature)
+        mass_ablated = np.where(ablating, ablation_energy / props.latent_heat, 0.0)
+        self.ablated_mass += mass_ablated
+        self.mass_per_area -= mass_ablated
+        
+        burnt = self.mass_per_area <= 0
+        self.mass_per_area = np.where(burnt, 0.0, self.mass_per_area)
+        self.burnt_through |= burnt
+    
+    def thermal_load(self, max_heat_flux, calculator=None):
+        """Итоговая тепловая нагрузка (для одиночной траектории)"""
+        props = self.properties
+        calculator = calculator or ThermalCalculator()
+        
+        if self.initial_mass_per_area > 0:
+            ablated_fraction = self.ablated_mass / self.initial_mass_per_area
         else:
             ablated_fraction = 0.0
         
-        total_energy, energy_per_area = self.calculate_total_energy(time, heat_flux, properties.area)
+        total_energy = self.energy_per_area * props.area
         
         return ThermalLoad(
-            max_heat_flux=np.max(heat_flux) if len(heat_flux) > 0 else 0.0,
+            max_heat_flux=max_heat_flux,
             total_energy=total_energy,
-            energy_per_area=energy_per_area,
-            surface_temperature=current_temp,
+            energy_per_area=self.energy_per_area,
+            surface_temperature=self.temperature,
             ablated_fraction=ablated_fraction,
-            ablated_mass=ablated_mass * properties.area,
-            efficiency=self.calculate_efficiency(total_energy, properties)
+            ablated_mass=self.ablated_mass * props.area,
+            efficiency=calculator.calculate_efficiency(total_energy, props)
         )
-    
-    def calculate_efficiency(self, total_energy, properties):
-        heat_shield_mass = properties.density * properties.thickness * properties.area
-        max_energy = heat_shield_mass * properties.specific_heat * (properties.max_temperature - properties.initial_temperature)
-        
-        if total_energy > 0 and max_energy > 0:
-            efficiency = min(max_energy, total_energy) / max_energy * 100
-        else:
-            efficiency = 100.0
-        
-        return efficiency
\ No newline at end of file
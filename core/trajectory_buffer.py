@@ -0,0 +1,248 @@
+"""
+Компактное хранение траектории: столбцы состояния в одном непрерывном
+массиве и целочисленные коды состояния парашютов
+"""
+import numpy as np
+from typing import Dict
+
+# Коды состояний парашютной системы (совпадают с графиками состояний).
+# Бит 0 - тормозной парашют, бит 1 - основной
+PARACHUTE_STATE_CODES = {'none': 0, 'brake': 1, 'main': 2, 'both': 3}
+PARACHUTE_STATE_NAMES = {code: name for name, code in PARACHUTE_STATE_CODES.items()}
+BRAKE_CHUTE_BIT = 1
+MAIN_CHUTE_BIT = 2
+
+
+def decode_parachute_states(codes: np.ndarray) -> np.ndarray:
+    """
+    Преобразует коды состояний парашютов в названия
+
+    Args:
+        codes: Массив кодов (int8)
+
+    Returns:
+        Массив строк ('none', 'brake', 'main', 'both')
+    """
+    names = np.array([PARACHUTE_STATE_NAMES[code] for code in range(len(PARACHUTE_STATE_NAMES))])
+    return names[np.asarray(codes, dtype=np.intp)]
+
+
+class TrajectoryBuffer:
+    """
+    Буфер точек траектории
+
+    Столбцы time, vx, vy, height хранятся строками массива (4, n), так что
+    каждый столбец непрерывен в памяти; состояние парашютов - отдельный
+    столбец int8. Точки пишутся в блоки: первый блок небольшой, каждый
+    следующий вдвое больше предыдущего, но не больше chunk_size. При
+    заполнении блока добавляется новый, уже записанные данные не копируются,
+    а память растет вместе с фактической длиной полета. При получении
+    результата блоки один раз объединяются (если блок единственный и занят
+    хотя бы наполовину - без копирования); итоговые массивы - представления.
+    """
+
+    COLUMNS = ('time', 'vx', 'vy', 'height')
+
+    def __init__(self, chunk_size: int = 65536, dtype=np.float64, initial_chunk_size: int = 1024):
+        """
+        Args:
+            chunk_size: Наибольший размер блока (число точек)
+            dtype: Тип хранения столбцов состояния (float64 или float32)
+            initial_chunk_size: Размер первого блока
+        """
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = max(int(chunk_size), 1)
+        self.size = 0
+        # Заполненные блоки: (данные, состояния)
+        self._chunks = []
+        self._fill = 0
+        self._data, self._states = self._new_chunk(min(max(int(initial_chunk_size), 1), self.chunk_size))
+
+    def _new_chunk(self, length):
+        return (np.empty((len(self.COLUMNS), length), dtype=self.dtype),
+                np.empty(length, dtype=np.int8))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(data.nbytes + states.nbytes for data, states in self._chunks) + \
+               self._data.nbytes + self._states.nbytes
+
+    def append(self, t, y, parachute_state: str):
+        """Добавляет точку: время, вектор состояния [vx, vy, height], состояние парашютов"""
+        n = self._fill
+        if n == self._data.shape[1]:
+            self._chunks.append((self._data, self._states))
+            self._data, self._states = self._new_chunk(min(2 * n, self.chunk_size))
+            n = 0
+        data = self._data
+        data[0, n] = t
+        data[1, n] = y[0]
+        data[2, n] = y[1]
+        data[3, n] = y[2]
+        self._states[n] = PARACHUTE_STATE_CODES[parachute_state]
+        self._fill = n + 1
+        self.size += 1
+
+    def _consolidate(self, reserve: int = 0):
+        """Объединяет блоки в один массив (с запасом reserve точек)"""
+        if not self._chunks and self._fill + reserve <= self._data.shape[1] <= 2 * (self._fill + reserve):
+            return
+        data, states = self._new_chunk(self.size + reserve)
+        # Заполненные блоки полные, текущий - до self._fill
+        pieces = self._chunks + [(self._data[:, :self._fill], self._states[:self._fill])]
+        offset = 0
+        for chunk_data, chunk_states in pieces:
+            length = len(chunk_states)
+            data[:, offset:offset + length] = chunk_data
+            states[offset:offset + length] = chunk_states
+            offset += length
+        self._chunks = []
+        self._data, self._states = data, states
+        self._fill = self.size
+
+    def snapshot(self) -> 'TrajectoryBuffer':
+        """
+        Независимая копия буфера для контрольной точки
+
+        Заполненные блоки после записи не изменяются (объединение и вставка
+        создают новые массивы), поэтому копия ссылается на них, а копируется
+        только текущий блок - не больше chunk_size точек независимо от длины
+        траектории.
+        """
+        copy = TrajectoryBuffer.__new__(TrajectoryBuffer)
+        copy.dtype = self.dtype
+        copy.chunk_size = self.chunk_size
+        copy.size = self.size
+        copy._chunks = list(self._chunks)
+        copy._fill = self._fill
+        copy._data = np.empty_like(self._data)
+        copy._data[:, :self._fill] = self._data[:, :self._fill]
+        copy._states = np.empty_like(self._states)
+        copy._states[:self._fill] = self._states[:self._fill]
+        return copy
+
+    def insert(self, t, y, parachute_state: str):
+        """Вставляет точку с сохранением порядка по времени"""
+        self._consolidate(reserve=1)
+        n = self._fill
+        index = int(np.searchsorted(self._data[0, :n], t, side='right'))
+        self._data[:, index + 1:n + 1] = self._data[:, index:n]
+        self._states[index + 1:n + 1] = self._states[index:n]
+        self._data[:, index] = (t, y[0], y[1], y[2])
+        self._states[index] = PARACHUTE_STATE_CODES[parachute_state]
+        self._fill = n + 1
+        self.size += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """Столбец по имени - представление без копирования"""
+        self._consolidate()
+        return self._data[self.COLUMNS.index(name), :self.size]
+
+    @property
+    def parachute_states(self) -> np.ndarray:
+        self._consolidate()
+        return self._states[:self.size]
+
+    def result(self) -> Dict[str, np.ndarray]:
+        vx = self.column('vx')
+        vy = self.column('vy')
+        return {
+            'time': self.column('time'),
+            'vx': vx,
+            'vy': vy,
+            'height': self.column('height'),
+            'v_total': np.sqrt(np.square(vx, dtype=float) + np.square(vy, dtype=float)),
+            'parachute_states': self.parachute_states
+        }
+
+
+class StreamingBuffer:
+    """
+    Буфер точек траектории, передающий их приемнику блоками
+
+    В памяти хранится только текущий блок из sink.chunk_size точек; заполненный
+    блок передается в sink.write и переиспользуется. Интерфейс тот же, что у
+    TrajectoryBuffer, но result() возвращает только число точек.
+    """
+
+    def __init__(self, sink, dtype=np.float64):
+        """
+        Args:
+            sink: Приемник с методом write(chunk) и атрибутом chunk_size
+            dtype: Тип хранения столбцов состояния (float64 или float32)
+        """
+        self.sink = sink
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = max(int(getattr(sink, 'chunk_size', 4096)), 1)
+        self.size = 0
+        self._fill = 0
+        self._data = np.empty((len(TrajectoryBuffer.COLUMNS), self.chunk_size), dtype=self.dtype)
+        self._states = np.empty(self.chunk_size, dtype=np.int8)
+
+    def __getstate__(self):
+        # Приемник не входит в контрольную точку - движок подставляет его при продолжении
+        state = self.__dict__.copy()
+        state['sink'] = None
+        return state
+
+    def append(self, t, y, parachute_state: str):
+        """Добавляет точку: время, вектор состояния [vx, vy, height], состояние парашютов"""
+        n = self._fill
+        if n == self._data.shape[1]:
+            self.flush()
+            n = 0
+        data = self._data
+        data[0, n] = t
+        data[1, n] = y[0]
+        data[2, n] = y[1]
+        data[3, n] = y[2]
+        self._states[n] = PARACHUTE_STATE_CODES[parachute_state]
+        self._fill = n + 1
+        self.size += 1
+
+    def snapshot(self) -> 'StreamingBuffer':
+        """Копия буфера для контрольной точки (без приемника; в памяти только текущий блок)"""
+        copy = StreamingBuffer.__new__(StreamingBuffer)
+        copy.__dict__.update(self.__getstate__())
+        copy._data = self._data.copy()
+        copy._states = self._states.copy()
+        return copy
+
+    def insert(self, t, y, parachute_state: str):
+        """
+        Вставляет точку с сохранением порядка по времени в текущий блок.
+        Точка раньше уже переданных приемнику не вставляется: порядок в
+        приемнике не нарушается (максимумы при этом остаются в скалярных итогах).
+        """
+        n = self._fill
+        if n == 0 or t < self._data[0, 0]:
+            return
+        if n == self._data.shape[1]:
+            # Вставка бывает только в конце расчета - блок расширяется на одну точку
+            self._data = np.concatenate([self._data, np.empty((self._data.shape[0], 1), dtype=self.dtype)], axis=1)
+            self._states = np.append(self._states, np.int8(0))
+        index = int(np.searchsorted(self._data[0, :n], t, side='right'))
+        self._data[:, index + 1:n + 1] = self._data[:, index:n]
+        self._states[index + 1:n + 1] = self._states[index:n]
+        self._data[:, index] = (t, y[0], y[1], y[2])
+        self._states[index] = PARACHUTE_STATE_CODES[parachute_state]
+        self._fill = n + 1
+        self.size += 1
+
+    def flush(self):
+        """Передает накопленные точки приемнику"""
+        n = self._fill
+        if n == 0:
+            return
+        self.sink.write({
+            'time': self._data[0, :n],
+            'vx': self._data[1, :n],
+            'vy': self._data[2, :n],
+            'height': self._data[3, :n],
+            'parachute_states': self._states[:n]
+        })
+        self._fill = 0
+
+    def result(self) -> Dict[str, int]:
+        self.flush()
+        return {'n_points': self.size}
@@ -7,6 +7,7 @@ import numpy as np
 # Исправленный импорт
 try:
     from core.simulation import SimulationEngine, SimulationInput, ThermalProperties, ParachuteSystem
+    from core.checkpoint import CancellationToken, SimulationCancelled
     from gui.results_window import SimpleResultsWindow
 except ImportError:
     # Альтернативный вариант импорта
@@ -14,6 +15,7 @@ except ImportError:
     import os
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from core.simulation import SimulationEngine, SimulationInput, ThermalProperties, ParachuteSystem
+    from core.checkpoint import CancellationToken, SimulationCancelled
     from gui.results_window import SimpleResultsWindow
 
 class SimpleSimulationApp:
@@ -24,6 +26,9 @@ class SimpleSimulationApp:
         
         self.simulation_engine = SimulationEngine()
         self.running = False
+        self.cancel_token = None
+        # Контрольная точка остановленного расчета - с нее можно продолжить
+        self.checkpoint = None
         
         self._create_widgets()
     
@@ -254,6 +259,14 @@ class SimpleSimulationApp:
                                     command=self.run_simulation, width=20)
         self.run_button.pack(side=tk.LEFT, padx=5)
         
+        self.stop_button = ttk.Button(button_frame, text="Остановить",
+                                      command=self.stop_simulation, width=20, state='disabled')
+        self.stop_button.pack(side=tk.LEFT, padx=5)
+        
+        self.resume_button = ttk.Button(button_frame, text="Продолжить",
+                                        command=self.resume_simulation, width=20, state='disabled')
+        self.resume_button.pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(button_frame, text="Выход", command=self.root.quit, width=20).pack(side=tk.LEFT, padx=5)
         
         # Убедитесь, что колонки расширяются
@@ -269,12 +282,44 @@ class SimpleSimulationApp:
             messagebox.showerror("Ошибка ввода", f"Некорректные данные: {e}")
             return
         
+        self._start_thread(input_data, None)
+    
+    def stop_simulation(self):
+        if self.running and self.cancel_token is not None:
+            self.cancel_token.cancel()
+            self.status_label.config(text="Остановка симуляции...")
+    
+    def resume_simulation(self):
+        if self.running or self.checkpoint is None:
+            return
+        
+        try:
+            input_data = self._get_input_data()
+        except ValueError as e:
+            messagebox.showerror("Ошибка ввода", f"Некорректные данные: {e}")
+            return
+        
+        if input_data != self.checkpoint.input_data:
+            messagebox.showwarning("Продолжение невозможно",
+                                   "Параметры изменены после остановки. Запустите симуляцию заново.")
+            return
+        
+        self._start_thread(input_data, self.checkpoint)
+    
+    def _start_thread(self, input_data, checkpoint):
         self.running = True
+        self.cancel_token = CancellationToken()
         self.run_button.config(state='disabled')
-        self.progress['value'] = 0
-        self.status_label.config(text="Запуск симуляции...")
-        
-        thread = threading.Thread(target=self._run_simulation_thread, args=(input_data,))
+        self.resume_button.config(state='disabled')
+        self.stop_button.config(state='normal')
+        if checkpoint is None:
+            self.progress['value'] = 0
+            self.status_label.config(text="Запуск симуляции...")
+        else:
+            self.status_label.config(text=f"Продолжение с t = {checkpoint.time:.1f} с...")
+        
+        thread = threading.Thread(target=self._run_simulation_thread,
+                                  args=(input_data, checkpoint, self.cancel_token))
         thread.daemon = True
         thread.start()
     
@@ -317,13 +362,16 @@ class SimpleSimulationApp:
         
         return input_data
     
-    def _run_simulation_thread(self, input_data):
+    def _run_simulation_thread(self, input_data, checkpoint=None, cancel_token=None):
         def progress_callback(progress, message):
             self.root.after(0, self._update_progress, progress, message)
         
         try:
-            results = self.simulation_engine.run(input_data, progress_callback)
+            results = self.simulation_engine.run(input_data, progress_callback,
+                                                 cancel_token=cancel_token, resume_from=checkpoint)
             self.root.after(0, self._show_results, results, input_data)
+        except SimulationCancelled as e:
+            self.root.after(0, self._simulation_cancelled, e.checkpoint)
         except Exception as e:
             self.root.after(0, self._simulation_error, str(e))
     
@@ -331,15 +379,26 @@ class SimpleSimulationApp:
         self.progress['value'] = progress
         self.status_label.config(text=message)
     
-    def _show_results(self, results, input_data):
+    def _finish_run(self):
         self.running = False
+        self.cancel_token = None
         self.run_button.config(state='normal')
+        self.stop_button.config(state='disabled')
+    
+    def _show_results(self, results, input_data):
+        self._finish_run()
+        self.checkpoint = None
         self.status_label.config(text="Симуляция завершена")
         
         SimpleResultsWindow(self.root, results, input_data)
     
+    def _simulation_cancelled(self, checkpoint):
+        self._finish_run()
+        self.checkpoint = checkpoint
+        self.resume_button.config(state='normal')
+        self.status_label.config(text=f"Симуляция остановлена при t = {checkpoint.time:.1f} с")
+    
     def _simulation_error(self, error_message):
-        self.running = False
-        self.run_button.config(state='normal')
+        self._finish_run()
         self.status_label.config(text="Ошибка симуляции")
         messagebox.showerror("Ошибка симуляции", f"Произошла ошибка:\n{error_message}")
\ No newline at end of file
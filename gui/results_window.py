@@ -4,6 +4,9 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 
+from core.kernels import cumulative_trapezoid, distance
+from core.trajectory_buffer import PARACHUTE_STATE_CODES
+
 class SimpleResultsWindow:
     def __init__(self, parent, results, input_data):
         self.parent = parent
@@ -87,11 +90,9 @@ class SimpleResultsWindow:
         
         if hasattr(self.results, 'velocity_x') and hasattr(self.results, 'time'):
             ax = axes[1, 1]
-            x_distance = np.zeros_like(self.results.time)
-            for i in range(1, len(self.results.time)):
-                dt = self.results.time[i] - self.results.time[i-1]
-                vx_avg = (self.results.velocity_x[i-1] + self.results.velocity_x[i]) / 2
-                x_distance[i] = x_distance[i-1] + vx_avg * dt
+            x_distance = getattr(self.results, 'downrange_distance', None)
+            if x_distance is None:
+                x_distance = distance(self.results.velocity_x, self.results.time)
             
             ax.plot(x_distance / 1000, self.results.height / 1000, 'm-', linewidth=2)
             ax.set_xlabel('Расстояние (км)')
@@ -133,11 +134,9 @@ class SimpleResultsWindow:
         
         ax = axes[0, 1]
         if len(self.results.time) > 1:
-            cumulative = np.zeros(len(self.results.time))
-            for i in range(1, len(self.results.time)):
-                dt = self.results.time[i] - self.results.time[i-1]
-                q_avg = (self.results.heat_flux[i-1] + self.results.heat_flux[i]) / 2
-                cumulative[i] = cumulative[i-1] + q_avg * dt
+            cumulative = getattr(self.results, 'cumulative_heat_load', None)
+            if cumulative is None:
+                cumulative = cumulative_trapezoid(self.results.heat_flux, self.results.time)
             
             ax.plot(self.results.time, cumulative / 1e6, 'y-', linewidth=2)
             ax.set_xlabel('Время (с)')
@@ -152,11 +151,9 @@ class SimpleResultsWindow:
                        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
         
         ax = axes[1, 0]
-        if hasattr(self.results, 'height'):
-            temps = np.where(self.results.height > 70000, 300, 
-                           np.where(self.results.height > 40000, 400,
-                                   np.where(self.results.height > 10000, 600, 737)))
-            ax.plot(self.results.time, temps, 'c-', linewidth=2, label='Температура атмосферы')
+        if hasattr(self.results, 'atmosphere_temperature'):
+            ax.plot(self.results.time, self.results.atmosphere_temperature, 'c-', linewidth=2,
+                   label='Температура атмосферы')
         
         if hasattr(self.results, 'thermal_load'):
             tl = self.results.thermal_load
@@ -201,9 +198,9 @@ class SimpleResultsWindow:
         fig, axes = plt.subplots(2, 2, figsize=(10, 8))
         
         ax = axes[0, 0]
-        states = self.results.parachute_states
-        state_values = {'none': 0, 'brake': 1, 'main': 2, 'both': 3}
-        numeric_states = [state_values.get(s, 0) for s in states]
+        numeric_states = getattr(self.results, 'parachute_state_codes', None)
+        if numeric_states is None:
+            numeric_states = [PARACHUTE_STATE_CODES.get(s, 0) for s in self.results.parachute_states]
         
         ax.step(self.results.time, numeric_states, 'b-', where='post', linewidth=2)
         ax.set_yticks([0, 1, 2, 3])
@@ -242,19 +239,12 @@ class SimpleResultsWindow:
         
         ax = axes[1, 0]
         if len(self.results.time) > 1:
-            acceleration = np.zeros_like(self.results.velocity_total)
-            for i in range(1, len(self.results.time)):
-                dt = self.results.time[i] - self.results.time[i-1]
-                if dt > 0:
-                    dv = self.results.velocity_total[i] - self.results.velocity_total[i-1]
-                    acceleration[i] = dv / dt
-            
-            acceleration_g = acceleration / 8.87
+            acceleration_g = self.results.g_load
             
             ax.plot(self.results.time, acceleration_g, 'r-', linewidth=2)
             ax.set_xlabel('Время (с)')
             ax.set_ylabel('Перегрузка (g)')
-            ax.set_title('Оценка перегрузок')
+            ax.set_title('Аэродинамическая перегрузка')
             ax.grid(True, alpha=0.3)
             ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
             
@@ -265,15 +255,13 @@ class SimpleResultsWindow:
                        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
         
         ax = axes[1, 1]
-        if hasattr(self.results, 'height'):
-            scale_height = 15000
-            density_approx = 65.0 * np.exp(-self.results.height / scale_height)
-            q_dyn = 0.5 * density_approx * (self.results.velocity_total ** 2)
+        if hasattr(self.results, 'dynamic_pressure'):
+            q_dyn = self.results.dynamic_pressure
             
             ax.plot(self.results.time, q_dyn / 1e3, 'b-', linewidth=2)
             ax.set_xlabel('Время (с)')
             ax.set_ylabel('Динамическое давление (кПа)')
-            ax.set_title('Оценка динамического давления')
+            ax.set_title('Динамическое давление')
             ax.grid(True, alpha=0.3)
         
         plt.tight_layout()
@@ -13,14 +13,21 @@ __license__ = 'MIT'
 try:
     from .core.materials import VenusAtmosphere
     from .core.simulation import SimulationEngine, ThermalProperties, ParachuteSystem
-    from .gui.main_window import SimpleSimulationApp
 except ImportError as e:
     print(f"Ошибка импорта: {e}")
     VenusAtmosphere = None
     SimulationEngine = None
     ThermalProperties = None
     ParachuteSystem = None
-    SimpleSimulationApp = None
+
+
+def __getattr__(name):
+    # GUI (tkinter, matplotlib) загружается только при обращении:
+    # расчеты без окна, например venus-sim, его не импортируют
+    if name == 'SimpleSimulationApp':
+        from .gui.main_window import SimpleSimulationApp
+        return SimpleSimulationApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'VenusAtmosphere',
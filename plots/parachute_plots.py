@@ -4,6 +4,8 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from core.trajectory_buffer import PARACHUTE_STATE_CODES
+
 
 def plot_parachute_events(results):
     """График событий парашютов"""
@@ -13,9 +15,9 @@ def plot_parachute_events(results):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
     
     # Состояния парашютов
-    states = results.parachute_states
-    state_values = {'none': 0, 'brake': 1, 'main': 2, 'both': 3}
-    numeric_states = [state_values.get(s, 0) for s in states]
+    numeric_states = getattr(results, 'parachute_state_codes', None)
+    if numeric_states is None:
+        numeric_states = [PARACHUTE_STATE_CODES.get(s, 0) for s in results.parachute_states]
     
     ax1.step(results.time, numeric_states, 'b-', where='post')
     ax1.set_yticks([0, 1, 2, 3])
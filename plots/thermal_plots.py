@@ -1,5 +1,6 @@
 import matplotlib.pyplot as plt
-import numpy as np
+
+from core.kernels import cumulative_trapezoid
 
 def plot_heat_flux(results):
     if not hasattr(results, 'heat_flux'):
@@ -14,11 +15,7 @@ def plot_heat_flux(results):
     ax1.grid(True, alpha=0.3)
     
     if len(results.time) > 1:
-        cumulative = np.zeros(len(results.time))
-        for i in range(1, len(results.time)):
-            dt = results.time[i] - results.time[i-1]
-            q_avg = (results.heat_flux[i-1] + results.heat_flux[i]) / 2
-            cumulative[i] = cumulative[i-1] + q_avg * dt
+        cumulative = cumulative_trapezoid(results.heat_flux, results.time)
         
         ax2.plot(results.time, cumulative / 1e6, 'orange-')
         ax2.set_xlabel('Время (с)')
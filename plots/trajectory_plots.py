@@ -2,7 +2,8 @@
 Упрощенные графики траектории
 """
 import matplotlib.pyplot as plt
-import numpy as np
+
+from core.kernels import distance
 
 
 def plot_speed_height(results):
@@ -34,11 +35,7 @@ def plot_trajectory(results):
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Рассчитываем пройденное расстояние
-    x_distance = np.zeros_like(results.time)
-    for i in range(1, len(results.time)):
-        dt = results.time[i] - results.time[i-1]
-        vx_avg = (results.velocity_x[i-1] + results.velocity_x[i]) / 2
-        x_distance[i] = x_distance[i-1] + vx_avg * dt
+    x_distance = distance(results.velocity_x, results.time)
     
     # Рисуем траекторию
     ax.plot(x_distance / 1000, results.height / 1000, 'b-')
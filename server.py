@@ -0,0 +1,52 @@
+"""
+Локальный сервис расчетов (venus-sim-server)
+
+Пример:
+    venus-sim-server --port 8765 --workers 4
+
+Описание запросов - в core/service.py.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog='venus-sim-server',
+        description='HTTP/JSON сервис расчетов входа в атмосферу Венеры'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес (по умолчанию 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Порт (по умолчанию 8765)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Число рабочих процессов (по умолчанию - число ядер)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help='Наибольшее число ожидающих заданий (по умолчанию 64)')
+    parser.add_argument('--results-dir', default=None,
+                        help='Каталог файлов результатов (по умолчанию временный)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Подробный журнал')
+    return parser
+
+
+def main(argv=None) -> int:
+    """Точка входа venus-sim-server"""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s %(name)s %(levelname)s: %(message)s'
+    )
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from core.service import SimulationService
+
+    service = SimulationService(args.host, args.port, args.workers, args.queue_size,
+                                results_dir=args.results_dir)
+    print(f"Serving on {service.url} (Ctrl+C to stop)", file=sys.stderr)
+    service.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
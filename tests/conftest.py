@@ -0,0 +1,28 @@
+"""Общие настройки тестов: корень репозитория в sys.path (пакеты без __init__.py)"""
+import os
+import sys
+from dataclasses import replace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.simulation import ParachuteSystem, SimulationInput  # noqa: E402
+
+
+@pytest.fixture
+def parachute_input():
+    """Вход с парашютами: все три события парашютов за 400 с полета"""
+    return SimulationInput(parachute_system=ParachuteSystem(use_parachutes=True))
+
+
+@pytest.fixture
+def rk45_input(parachute_input):
+    """Быстрый расчет адаптивным интегратором (около 500 точек)"""
+    return replace(parachute_input, integrator='rk45')
+
+
+@pytest.fixture
+def euler_input(parachute_input):
+    """Расчет методом Эйлера с крупным шагом (около 40 тыс. точек)"""
+    return replace(parachute_input, integration_step=0.01)
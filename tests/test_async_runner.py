@@ -0,0 +1,67 @@
+"""Тесты асинхронного интерфейса: ход расчета и отмена"""
+import asyncio
+import time
+
+import pytest
+
+from core.async_runner import AsyncSimulationRunner, SimulationProgress
+from core.simulation import SimulationEngine, SimulationInput, SimulationSummary
+
+# Расчет Эйлером по умолчанию идет несколько секунд - его успевают отменить
+LONG_INPUT = SimulationInput()
+FAST_INPUT = SimulationInput(integrator='rk45', simulation_time=200.0)
+
+
+async def cancel_after_progress(runner, percent):
+    """Запускает долгий расчет, отменяет его после заданного хода; время от отмены до выхода"""
+    progress = SimulationProgress()
+    task = asyncio.ensure_future(runner.run(LONG_INPUT, metrics_only=True, progress=progress))
+    async for value, _ in progress:
+        if value >= percent:
+            break
+    cancelled_at = time.perf_counter()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    return time.perf_counter() - cancelled_at
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_cancellation_stops_the_run_and_frees_the_slot(executor):
+    async def scenario():
+        async with AsyncSimulationRunner(executor, max_concurrency=1, max_workers=1) as runner:
+            elapsed = await cancel_after_progress(runner, 20)
+            # Слот семафора освобожден, а пул свободен для следующего расчета
+            summary = await asyncio.wait_for(runner.run(FAST_INPUT, metrics_only=True), timeout=30)
+            return elapsed, summary
+
+    elapsed, summary = asyncio.run(scenario())
+    assert elapsed < 2.0
+    assert isinstance(summary, SimulationSummary)
+
+
+def test_cancelling_run_many_cancels_queued_cases():
+    async def scenario():
+        async with AsyncSimulationRunner('thread', max_concurrency=1, max_workers=1) as runner:
+            task = asyncio.ensure_future(runner.run_many([LONG_INPUT] * 3, metrics_only=True))
+            await asyncio.sleep(0.5)
+            started = time.perf_counter()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 2.0
+
+
+def test_run_many_returns_results_in_order():
+    inputs = [SimulationInput(integrator='rk45', simulation_time=200.0, entry_angle=angle)
+              for angle in (9.0, 12.0, 10.0)]
+
+    async def scenario():
+        async with AsyncSimulationRunner('thread', max_concurrency=2) as runner:
+            return await runner.run_many(inputs, metrics_only=True)
+
+    outputs = asyncio.run(scenario())
+    expected = [SimulationEngine().run(input_data, metrics_only=True) for input_data in inputs]
+    assert [output.flight_distance for output in outputs] == [item.flight_distance for item in expected]
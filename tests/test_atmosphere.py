@@ -0,0 +1,52 @@
+"""Тесты модели атмосферы Венеры"""
+import numpy as np
+import pytest
+
+from core.materials import VenusAtmosphere
+
+HEIGHTS = [-10.0, 0.0, 3.5e4, 1.234e5, 2e5, 3.5e5]
+METHODS = ['density', 'pressure', 'temperature', 'gravity', 'sound_speed']
+
+
+@pytest.fixture(scope='module')
+def atmosphere():
+    return VenusAtmosphere()
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('height', HEIGHTS)
+def test_scalar_zero_dim_and_vector_inputs_agree(atmosphere, method, height):
+    """Число, 0-мерный и одномерный массивы дают одинаковые значения"""
+    function = getattr(atmosphere, method)
+    scalar = function(height)
+    zero_dim = function(np.asarray(height))
+    vector = function(np.array([height]))
+
+    assert np.shape(zero_dim) == ()
+    assert vector.shape == (1,)
+    assert scalar == zero_dim == vector[0]
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_vector_matches_elementwise(atmosphere, method):
+    """Вектор высот считается так же, как поэлементно"""
+    function = getattr(atmosphere, method)
+    heights = np.array(HEIGHTS)
+    expected = [function(h) for h in HEIGHTS]
+    np.testing.assert_array_equal(function(heights), expected)
+    np.testing.assert_array_equal(function(heights.reshape(2, 3)), np.reshape(expected, (2, 3)))
+
+
+def test_tables_match_original_scipy_interpolation(atmosphere):
+    """Равномерные таблицы совпадают с прежней интерполяцией interp1d(kind='cubic')"""
+    interpolate = pytest.importorskip('scipy.interpolate')
+    heights = atmosphere._heights_m
+    log_density = interpolate.interp1d(heights, np.log(atmosphere._densities), kind='cubic')
+    temperature = interpolate.interp1d(heights, atmosphere._temperatures, kind='cubic')
+    # Узлы данных, середины ячеек и произвольные точки
+    points = np.unique(np.concatenate([heights, (heights[:-1] + heights[1:]) / 2,
+                                       np.random.default_rng(0).uniform(0, heights[-1], 2000)]))
+
+    np.testing.assert_allclose(atmosphere.density(points), np.exp(log_density(points)), rtol=1e-10)
+    np.testing.assert_allclose(atmosphere.temperature(points), temperature(points), rtol=1e-10)
+    assert atmosphere.density(float(points[7])) == pytest.approx(float(np.exp(log_density(points[7]))), rel=1e-10)
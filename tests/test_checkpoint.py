@@ -0,0 +1,96 @@
+"""Тесты остановки и продолжения расчета"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from core.checkpoint import CancellationToken, SimulationCancelled, SimulationCheckpoint
+from core.output_io import ARRAY_FIELDS
+from core.simulation import ParachuteSystem, SimulationEngine, SimulationInput
+from core.trajectory_buffer import TrajectoryBuffer
+
+
+def assert_same_output(actual, expected):
+    for name in ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name), err_msg=name)
+    assert actual.thermal_load == expected.thermal_load
+    assert actual.parachute_events == expected.parachute_events
+    assert actual.peak_deceleration == expected.peak_deceleration
+    assert actual.flight_distance == expected.flight_distance
+
+
+@pytest.fixture(scope='module')
+def checkpoints_run():
+    """Расчет Эйлером с контрольными точками каждые 10 с и тот же расчет без них"""
+    input_data = SimulationInput(parachute_system=ParachuteSystem(use_parachutes=True), integration_step=0.01)
+    reference = SimulationEngine().run(input_data)
+    checkpoints = []
+    with_checkpoints = SimulationEngine().run(input_data, checkpoint_interval=10.0,
+                                              checkpoint_callback=checkpoints.append)
+    return input_data, reference, with_checkpoints, checkpoints
+
+
+def test_checkpoints_do_not_change_the_result(checkpoints_run):
+    _, reference, with_checkpoints, checkpoints = checkpoints_run
+    assert [checkpoint.time for checkpoint in checkpoints[:2]] == pytest.approx([10.0, 20.0], abs=0.011)
+    assert len(checkpoints) == 40
+    assert_same_output(with_checkpoints, reference)
+
+
+@pytest.mark.parametrize('position', [0, 11, 39])
+def test_resume_reproduces_uninterrupted_run(checkpoints_run, position):
+    input_data, reference, _, checkpoints = checkpoints_run
+    resumed = SimulationEngine().run(input_data, resume_from=checkpoints[position])
+    assert_same_output(resumed, reference)
+
+
+def test_checkpoint_can_be_resumed_twice_and_from_file(checkpoints_run, tmp_path):
+    input_data, reference, _, checkpoints = checkpoints_run
+    checkpoint = checkpoints[20]
+    assert_same_output(SimulationEngine().run(input_data, resume_from=checkpoint), reference)
+
+    path = tmp_path / 'run.ckpt'
+    checkpoint.save(path)
+    loaded = SimulationCheckpoint.load(path)
+    assert_same_output(SimulationEngine().run(input_data, resume_from=loaded), reference)
+
+
+def test_cancelled_run_resumes_from_its_checkpoint(checkpoints_run):
+    input_data, reference, _, _ = checkpoints_run
+    token = CancellationToken()
+
+    def progress(percent, message):
+        if percent > 40:
+            token.cancel()
+
+    with pytest.raises(SimulationCancelled) as info:
+        SimulationEngine().run(input_data, progress_callback=progress, cancel_token=token)
+    checkpoint = info.value.checkpoint
+    assert 0 < checkpoint.time < reference.time[-1]
+
+    assert_same_output(SimulationEngine().run(input_data, resume_from=checkpoint), reference)
+
+
+def test_resume_rejects_other_inputs(checkpoints_run):
+    input_data, _, _, checkpoints = checkpoints_run
+    with pytest.raises(ValueError):
+        SimulationEngine().run(replace(input_data, entry_angle=13.0), resume_from=checkpoints[0])
+
+
+def test_buffer_snapshot_is_independent():
+    buffer = TrajectoryBuffer(chunk_size=8, initial_chunk_size=2)
+    y = np.zeros(3)
+    for i in range(21):
+        buffer.append(float(i), y, 'none')
+    snapshot = buffer.snapshot()
+    # Заполненные блоки общие, текущий скопирован
+    assert snapshot._chunks[0][0] is buffer._chunks[0][0]
+
+    buffer.append(100.0, y, 'main')
+    snapshot.append(200.0, y, 'brake')
+    buffer.insert(0.5, y, 'both')
+
+    np.testing.assert_array_equal(snapshot.column('time'), list(range(21)) + [200.0])
+    assert snapshot.parachute_states[-1] == 1
+    assert buffer.column('time')[1] == 0.5 and buffer.column('time')[-1] == 100.0
+    assert buffer.size == 23 and snapshot.size == 22
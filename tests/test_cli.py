@@ -0,0 +1,62 @@
+"""Пакетный запуск из командной строки (cli.main) на небольшом файле случаев"""
+import json
+
+import pytest
+
+import cli
+from core.output_io import load_output
+from core.simulation import ParachuteSystem, SimulationEngine, SimulationInput
+
+CASES = {
+    'defaults': {'integrator': 'rk45', 'parachute_system': {'use_parachutes': True}},
+    'cases': [
+        {'name': 'steep', 'entry_angle': 20},
+        {'name': 'shallow', 'entry_angle': 10},
+    ],
+    'grid': {'entry_speed': [7000, 7500]},
+}
+
+
+@pytest.fixture
+def cases_file(tmp_path):
+    path = tmp_path / 'cases.json'
+    path.write_text(json.dumps(CASES), encoding='utf-8')
+    return path
+
+
+def test_summary_of_all_cases(cases_file, tmp_path):
+    output_dir = tmp_path / 'results'
+    assert cli.main([str(cases_file), '-o', str(output_dir), '-j', '1', '-q']) == 0
+
+    rows = json.loads((output_dir / 'summary.json').read_text(encoding='utf-8'))
+    assert len(rows) == 4
+    assert all(row['status'] == 'ok' for row in rows)
+    assert (output_dir / 'summary.csv').read_text(encoding='utf-8').count('\n') == 5
+
+    expected = SimulationEngine().run(SimulationInput(
+        integrator='rk45', entry_angle=20.0, entry_speed=7000.0,
+        parachute_system=ParachuteSystem(use_parachutes=True)
+    ))
+    row = next(row for row in rows if row['name'] == 'steep[entry_speed=7000]')
+    assert row['final_velocity'] == pytest.approx(expected.final_velocity, rel=1e-12)
+    assert row['peak_deceleration'] == pytest.approx(expected.peak_deceleration, rel=1e-12)
+
+
+def test_save_trajectories(cases_file, tmp_path):
+    output_dir = tmp_path / 'results'
+    assert cli.main([str(cases_file), '-o', str(output_dir), '-j', '1', '-q', '--save-trajectories']) == 0
+
+    files = sorted(output_dir.glob('*.vsim'))
+    assert len(files) == 4
+    output = load_output(files[0])
+    assert output.flight_time > 0
+    assert len(output.time) > 1
+
+
+def test_invalid_case_file(tmp_path, capsys):
+    path = tmp_path / 'bad.json'
+    path.write_text(json.dumps({'cases': [{'entry_angle': 'steep'}]}), encoding='utf-8')
+
+    assert cli.main([str(path), '-o', str(tmp_path / 'results'), '-q']) == 2
+    assert 'entry_angle' in capsys.readouterr().err
+    assert not (tmp_path / 'results').exists()
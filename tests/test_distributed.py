@@ -0,0 +1,85 @@
+"""Распределенный расчет: координатор и рабочие узлы на localhost"""
+import socket
+import threading
+from dataclasses import replace
+
+import pytest
+
+from core.batch import summary_values
+from core.distributed import PROTOCOL_VERSION, Coordinator, SweepWorker, recv_message, send_message
+from core.simulation import SimulationEngine
+from core.sweep import SweepCase
+
+ANGLES = [9.0, 10.0, 11.0, 12.0, 13.0, 14.0]
+
+
+@pytest.fixture
+def cases(rk45_input):
+    return [SweepCase(index, {'entry_angle': angle}, replace(rk45_input, entry_angle=angle))
+            for index, angle in enumerate(ANGLES)]
+
+
+def run_in_thread(function):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('value', function()), daemon=True)
+    thread.start()
+    return thread, result
+
+
+def start_worker(coordinator, name):
+    host, port = coordinator.address
+    return run_in_thread(SweepWorker(host, port, max_workers=1, heartbeat_interval=0.2, name=name).run)
+
+
+def check_results(results, cases):
+    engine = SimulationEngine()
+    assert [result.index for result in results] == [case.index for case in cases]
+    for result, case in zip(results, cases):
+        assert result.ok, result.error
+        assert result.parameters == case.parameters
+        expected = summary_values(engine.run(case.input_data))
+        assert result.output['final_velocity'] == pytest.approx(expected['final_velocity'], rel=1e-12)
+
+
+def test_two_workers_share_the_cases(cases):
+    coordinator = Coordinator(cases, port=0, chunk_size=2)
+    workers = [start_worker(coordinator, name) for name in ('first', 'second')]
+
+    results = coordinator.run(timeout=120)
+
+    chunk_counts = []
+    for thread, result in workers:
+        thread.join(timeout=30)
+        chunk_counts.append(result['value'])
+    assert sum(chunk_counts) == 3
+    assert all(count > 0 for count in chunk_counts)
+    check_results(results, cases)
+
+
+def test_chunks_of_silent_worker_are_reassigned(cases):
+    coordinator = Coordinator(cases, port=0, chunk_size=2, heartbeat_timeout=1.0)
+    run_thread, run_result = run_in_thread(lambda: coordinator.run(timeout=120))
+
+    # Узел получает блоки и перестает отвечать, не закрывая соединение
+    silent = socket.create_connection(coordinator.address)
+    send_message(silent, {'type': 'hello', 'version': PROTOCOL_VERSION, 'worker': 'silent', 'slots': 1})
+    assert recv_message(silent)['type'] == 'chunk'
+
+    worker_thread, worker_result = start_worker(coordinator, 'alive')
+    run_thread.join(timeout=120)
+    worker_thread.join(timeout=30)
+    silent.close()
+
+    assert worker_result['value'] == 3
+    check_results(run_result['value'], cases)
+
+
+def test_case_index_is_only_a_label(cases):
+    labels = [100, 7, 7, -3, 42, 0]
+    relabeled = [SweepCase(label, case.parameters, case.input_data) for label, case in zip(labels, cases)]
+    coordinator = Coordinator(relabeled, port=0, chunk_size=4)
+    thread, _ = start_worker(coordinator, 'only')
+
+    results = coordinator.run(timeout=120)
+    thread.join(timeout=30)
+    check_results(results, relabeled)
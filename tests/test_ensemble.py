@@ -0,0 +1,47 @@
+"""Ансамблевый интегратор против скалярного движка (метод Эйлера)"""
+from dataclasses import replace
+
+import pytest
+
+from core.ensemble import EnsembleEngine, EnsembleInput
+from core.simulation import SimulationEngine
+
+
+@pytest.fixture
+def members(euler_input):
+    short = replace(euler_input, simulation_time=150.0)
+    heavy = replace(short, mass_calculation_mode='specified', mass_specified=1e6,
+                    entry_height=20000.0, entry_angle=60.0)
+    # Третья траектория (без событий парашютов) достигает поверхности за 3 с
+    return [short, replace(short, entry_angle=30.0), heavy]
+
+
+def test_ensemble_matches_scalar_engine(members):
+    ensemble = EnsembleEngine().run(EnsembleInput.from_simulation_inputs(members))
+
+    for index, input_data in enumerate(members):
+        output = SimulationEngine().run(input_data)
+        member = ensemble.member(index)
+
+        assert member['flight_time'] == pytest.approx(output.flight_time, rel=1e-12)
+        assert member['final_height'] == pytest.approx(output.final_height, rel=1e-12, abs=1e-9)
+        assert member['peak_deceleration'] == pytest.approx(output.peak_deceleration, rel=1e-12)
+        assert member['max_heat_flux'] == pytest.approx(output.max_heat_flux, rel=1e-12)
+        assert member['energy_per_area'] == pytest.approx(output.thermal_load.energy_per_area, rel=1e-12)
+        assert member['landed'] == (output.landing_velocity is not None)
+        if output.landing_velocity is not None:
+            assert member['landing_velocity'] == pytest.approx(output.landing_velocity, rel=1e-12)
+
+        assert member['parachute_events'].keys() == output.parachute_events.keys()
+        for key, value in output.parachute_events.items():
+            assert member['parachute_events'][key] == pytest.approx(value, rel=1e-12), key
+
+
+def test_parachute_events_split_the_step(members):
+    ensemble = EnsembleEngine().run(EnsembleInput.from_simulation_inputs(members[:1]))
+    events = ensemble.member(0)['parachute_events']
+
+    # Шаг делится в точке события, поэтому время не привязано к сетке 0.01 с
+    assert abs(events['main_deploy_time'] - round(events['main_deploy_time'], 2)) > 1e-4
+    assert events['main_deploy_velocity'] == pytest.approx(50.0, rel=1e-12)
+    assert events['brake_jettison_time'] == events['main_deploy_time']
@@ -0,0 +1,84 @@
+"""Тесты интеграторов и поиска событий"""
+import math
+import numpy as np
+import pytest
+
+from core.integrators import DormandPrince45, Event, ExplicitEuler, first_event
+from core.simulation import SimulationEngine, SimulationInput
+
+PARACHUTE_EVENTS = ('brake_deploy', 'main_deploy', 'brake_jettison')
+
+
+def integrate(solver, events=()):
+    hit = None
+    while not solver.finished and hit is None:
+        solver.step()
+        hit = first_event(events, solver)
+    return hit
+
+
+def test_dormand_prince_matches_exponential_decay():
+    solver = DormandPrince45(lambda t, y: -y, 0.0, np.array([1.0]), 5.0, rtol=1e-10, atol=1e-12)
+    integrate(solver)
+    assert solver.t == 5.0
+    assert solver.y[0] == pytest.approx(math.exp(-5.0), rel=1e-8)
+
+
+@pytest.mark.parametrize('make_solver', [
+    lambda fun, y0: DormandPrince45(fun, 0.0, y0, 5.0, rtol=1e-10, atol=1e-12),
+    lambda fun, y0: ExplicitEuler(fun, 0.0, y0, 5.0, step=1e-3),
+])
+def test_event_is_located_inside_the_step(make_solver):
+    """Нуль функции события находится внутри шага, а не на его границе"""
+    solver = make_solver(lambda t, y: -y, np.array([1.0]))
+    event = Event('half', lambda t, y: y[0] - 0.5)
+    t_event, hit = integrate(solver, [event])
+
+    assert hit is event
+    assert solver.t_old < t_event <= solver.t
+    assert solver.dense_output()(t_event)[0] == pytest.approx(0.5, abs=1e-12)
+    if isinstance(solver, DormandPrince45):
+        assert t_event == pytest.approx(math.log(2.0), rel=1e-9)
+
+
+def test_rk45_agrees_with_euler(rk45_input, euler_input):
+    rk45 = SimulationEngine().run(rk45_input)
+    euler = SimulationEngine().run(euler_input)
+
+    assert len(rk45.time) < len(euler.time) / 10
+    assert rk45.final_velocity == pytest.approx(euler.final_velocity, rel=1e-3)
+    assert rk45.final_height == pytest.approx(euler.final_height, rel=1e-3)
+    assert rk45.flight_distance == pytest.approx(euler.flight_distance, rel=1e-4)
+    assert rk45.peak_deceleration == pytest.approx(euler.peak_deceleration, rel=1e-2)
+    assert rk45.thermal_load.energy_per_area == pytest.approx(euler.thermal_load.energy_per_area, rel=1e-3)
+    for name in PARACHUTE_EVENTS:
+        assert rk45.parachute_events[f'{name}_time'] == pytest.approx(
+            euler.parachute_events[f'{name}_time'], abs=0.1)
+
+
+@pytest.mark.parametrize('integrator', ['rk45', 'euler'])
+def test_parachute_events_hit_thresholds(integrator, rk45_input, euler_input):
+    input_data = rk45_input if integrator == 'rk45' else euler_input
+    output = SimulationEngine().run(input_data)
+    system = input_data.parachute_system
+    events = output.parachute_events
+    thresholds = {'brake_deploy': system.brake_deploy_velocity,
+                  'main_deploy': system.main_deploy_velocity,
+                  'brake_jettison': system.brake_jettison_velocity}
+
+    for name, threshold in thresholds.items():
+        assert events[f'{name}_velocity'] == pytest.approx(threshold, rel=1e-9)
+        # Точка события записана в траекторию
+        index = np.searchsorted(output.time, events[f'{name}_time'])
+        assert output.time[index] == events[f'{name}_time']
+        assert output.velocity_total[index] == pytest.approx(threshold, rel=1e-9)
+
+
+def test_ground_impact_ends_the_flight():
+    input_data = SimulationInput(integrator='rk45', simulation_time=5000.0)
+    output = SimulationEngine().run(input_data)
+
+    assert output.final_height == 0.0
+    assert output.height[-1] == 0.0 and output.height[-2] > 0.0
+    assert output.landing_velocity is not None and output.landing_velocity > 0
+    assert output.time[-1] < input_data.simulation_time
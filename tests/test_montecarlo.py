@@ -0,0 +1,81 @@
+"""Тесты анализа Монте-Карло"""
+import os
+
+import numpy as np
+import pytest
+
+from core.montecarlo import MonteCarloRunner, Uniform, sample_inputs
+from core.simulation import SimulationEngine, SimulationInput
+
+DISTRIBUTIONS = {'entry_angle': Uniform(8.0, 14.0)}
+FAILING_ABOVE = 12.0
+CRASHING_ABOVE = 13.5
+
+
+@pytest.fixture
+def base_input():
+    return SimulationInput(integrator='rk45', simulation_time=200.0)
+
+
+def sampled_angles(base_input, n_samples, seed, chunk_size):
+    """Углы входа в порядке номеров траекторий (те же потоки, что у MonteCarloRunner)"""
+    n_chunks = -(-n_samples // chunk_size)
+    angles = []
+    for i, chunk_seed in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        size = min(chunk_size, n_samples - i * chunk_size)
+        rng = np.random.default_rng(chunk_seed)
+        angles += [item.entry_angle for item in sample_inputs(base_input, DISTRIBUTIONS, rng, size)]
+    return angles
+
+
+def test_result_does_not_depend_on_worker_count(base_input):
+    single = MonteCarloRunner(base_input, DISTRIBUTIONS, 12, seed=5, max_workers=1, chunk_size=4).run()
+    pooled = MonteCarloRunner(base_input, DISTRIBUTIONS, 12, seed=5, max_workers=2, chunk_size=4).run()
+
+    assert single.summary() == pooled.summary()
+    assert single.metrics['flight_time'].moments.count == 12
+    assert single.failures == {}
+
+
+def test_failed_samples_are_reported_and_excluded(base_input, monkeypatch):
+    run = SimulationEngine.run
+
+    def failing_run(self, input_data, *args, **kwargs):
+        if input_data.entry_angle > FAILING_ABOVE:
+            raise RuntimeError('sample failed')
+        return run(self, input_data, *args, **kwargs)
+
+    monkeypatch.setattr(SimulationEngine, 'run', failing_run)
+    result = MonteCarloRunner(base_input, DISTRIBUTIONS, 20, seed=3, max_workers=1, chunk_size=6).run()
+
+    angles = sampled_angles(base_input, 20, 3, 6)
+    expected = [index for index, angle in enumerate(angles) if angle > FAILING_ABOVE]
+    assert expected and sorted(result.failures) == expected
+    assert result.n_failed == len(expected)
+    assert all('sample failed' in error for error in result.failures.values())
+    for accumulator in result.metrics.values():
+        # Упавшие траектории не входят ни в статистику, ни в пропуски
+        assert accumulator.moments.count + accumulator.missing == 20 - len(expected)
+    assert result.metrics['peak_deceleration'].moments.count == 20 - len(expected)
+
+
+def test_crashing_chunk_does_not_abort_the_run(base_input, monkeypatch):
+    run = SimulationEngine.run
+
+    def crashing_run(self, input_data, *args, **kwargs):
+        # Аварийное завершение рабочего процесса ломает весь пул
+        if input_data.entry_angle > CRASHING_ABOVE:
+            os._exit(1)
+        return run(self, input_data, *args, **kwargs)
+
+    monkeypatch.setattr(SimulationEngine, 'run', crashing_run)
+    result = MonteCarloRunner(base_input, DISTRIBUTIONS, 20, seed=3, max_workers=2, chunk_size=4).run()
+
+    # Неудачными отмечаются все траектории порций, роняющих процесс, и только они
+    angles = sampled_angles(base_input, 20, 3, 4)
+    crashing_chunks = {index // 4 for index, angle in enumerate(angles) if angle > CRASHING_ABOVE}
+    expected = [index for index in range(20) if index // 4 in crashing_chunks]
+    assert 0 < len(crashing_chunks) < 5
+    assert sorted(result.failures) == expected
+    assert all('BrokenProcessPool' in error for error in result.failures.values())
+    assert result.metrics['peak_deceleration'].moments.count == 20 - len(expected)
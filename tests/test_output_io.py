@@ -0,0 +1,75 @@
+"""Тесты сохранения и загрузки результатов"""
+import numpy as np
+import pytest
+
+from core.output_io import (ARRAY_FIELDS, dumps_output, load_output, load_outputs, loads_output,
+                            loads_outputs, save_output, save_outputs)
+from core.simulation import ParachuteSystem, SimulationEngine, SimulationInput, SimulationOutput, SimulationSummary
+
+SCALAR_FIELDS = ('flight_distance', 'flight_time', 'final_velocity', 'final_height', 'thermal_load',
+                 'parachute_events', 'vehicle_mass', 'max_heat_flux', 'landing_velocity',
+                 'peak_deceleration')
+
+
+@pytest.fixture(scope='module')
+def output():
+    return SimulationEngine().run(SimulationInput(
+        integrator='rk45', parachute_system=ParachuteSystem(use_parachutes=True)))
+
+
+def assert_same_output(actual, expected):
+    assert type(actual) is type(expected)
+    if isinstance(expected, SimulationOutput):
+        for name in ARRAY_FIELDS:
+            column = getattr(actual, name)
+            assert column.dtype == getattr(expected, name).dtype
+            np.testing.assert_array_equal(column, getattr(expected, name), err_msg=name)
+        assert actual.input_data == expected.input_data
+    for name in SCALAR_FIELDS:
+        assert getattr(actual, name) == getattr(expected, name), name
+
+
+def test_columnar_round_trip(output, tmp_path):
+    path = tmp_path / 'run.vsim'
+    save_output(output, path)
+    loaded = load_output(path)
+
+    assert_same_output(loaded, output)
+    # Ряды - представления на отображенный файл, производные ряды пересчитываются
+    assert not loaded.time.flags.writeable
+    np.testing.assert_allclose(loaded.heat_flux, output.heat_flux, rtol=1e-12)
+
+
+def test_columnar_round_trip_with_derived_columns(output, tmp_path):
+    path = tmp_path / 'run.vsim'
+    save_output(output, path, derived=('heat_flux', 'mach_number', 'theta', 'radius', 'velocity_theta',
+                                       'velocity_radial', 'latitude', 'longitude'))
+    loaded = load_output(path)
+
+    assert 'heat_flux' in loaded._cache and 'orbital' in loaded._cache
+    np.testing.assert_array_equal(loaded.mach_number, output.mach_number)
+    np.testing.assert_array_equal(loaded.latitude, output.latitude)
+
+
+def test_several_outputs_and_summary_in_one_file(output, tmp_path):
+    summary = SimulationEngine().run(output.input_data, metrics_only=True)
+    path = tmp_path / 'runs.vsim'
+    save_outputs([output, summary, output], path)
+
+    loaded = load_outputs(path)
+    assert [type(item) for item in loaded] == [SimulationOutput, SimulationSummary, SimulationOutput]
+    assert_same_output(loaded[0], output)
+    assert_same_output(loaded[1], summary)
+    assert_same_output(loaded[2], output)
+    assert_same_output(loads_outputs(path.read_bytes())[2], output)
+
+
+def test_npz_round_trip(output):
+    assert_same_output(loads_output(dumps_output(output)), output)
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'other.vsim'
+    path.write_bytes(b'not a result file' * 4)
+    with pytest.raises(ValueError):
+        load_output(path)
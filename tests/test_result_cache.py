@@ -0,0 +1,63 @@
+"""Дисковый кэш результатов: попадания, промахи и смена отпечатка модели"""
+import shutil
+from dataclasses import replace
+
+import pytest
+
+from core import result_cache
+from core.result_cache import ResultCache, model_fingerprint
+from core.simulation import SimulationEngine
+
+
+class CountingEngine(SimulationEngine):
+    def __init__(self):
+        super().__init__()
+        self.runs = 0
+
+    def run(self, *args, **kwargs):
+        self.runs += 1
+        return super().run(*args, **kwargs)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / 'cache', engine=CountingEngine())
+
+
+@pytest.fixture
+def package_copy(tmp_path, monkeypatch):
+    """Копия исходного кода пакета, по которой считается отпечаток модели"""
+    package_dir = tmp_path / 'core'
+    shutil.copytree(result_cache.PACKAGE_DIR, package_dir, ignore=shutil.ignore_patterns('__pycache__'))
+    monkeypatch.setattr(result_cache, 'PACKAGE_DIR', package_dir)
+    model_fingerprint.cache_clear()
+    yield package_dir
+    model_fingerprint.cache_clear()
+
+
+def test_hit_and_miss(cache, rk45_input):
+    first = cache.run(rk45_input)
+    second = cache.run(rk45_input)
+    assert cache.engine.runs == 1
+    assert second.flight_time == first.flight_time
+    assert second.final_velocity == first.final_velocity
+
+    # Другие входные данные и режим только итогов - отдельные записи
+    cache.run(rk45_input, metrics_only=True)
+    assert cache.engine.runs == 2
+    assert cache.get(replace(rk45_input, entry_angle=20.0)) is None
+
+
+def test_model_change_invalidates_results(cache, rk45_input, package_copy):
+    cache.run(rk45_input)
+    assert cache.get(rk45_input) is not None
+
+    # Изменение модуля, который расчет импортирует косвенно (simulation -> physics)
+    with open(package_copy / 'physics.py', 'a') as fh:
+        fh.write('\n# changed\n')
+    model_fingerprint.cache_clear()
+
+    assert cache.get(rk45_input) is None
+    cache.run(rk45_input)
+    assert cache.engine.runs == 2
+    assert cache.get(rk45_input) is not None
@@ -0,0 +1,67 @@
+"""Локальный сервис расчетов: очередь, отмена, переполнение, проверка входных данных"""
+import time
+
+import pytest
+
+from core.service import ServiceError, SimulationClient, SimulationService
+from core.simulation import SimulationEngine
+
+
+@pytest.fixture
+def service():
+    with SimulationService(port=0, workers=1, queue_size=1) as service:
+        service.start()
+        yield service
+
+
+@pytest.fixture
+def client(service):
+    return SimulationClient(service.url)
+
+
+def wait_for_status(client, job_id, status, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while client.status(job_id)['status'] != status:
+        assert time.monotonic() < deadline, client.status(job_id)
+        time.sleep(0.05)
+
+
+def test_submit_and_wait(client, rk45_input):
+    job_id = client.submit(rk45_input)
+    output = client.wait(job_id, poll_interval=0.05, timeout=60)
+
+    expected = SimulationEngine().run(rk45_input)
+    assert output.flight_time == expected.flight_time
+    assert output.peak_deceleration == pytest.approx(expected.peak_deceleration, rel=1e-12)
+    assert client.status(job_id)['summary']['flight_time'] == pytest.approx(expected.flight_time)
+
+
+def test_cancel_and_queue_overflow(client, parachute_input):
+    # Шаг 0.001 с: расчет идет несколько секунд, его успевают отменить
+    running = client.submit(parachute_input)
+    wait_for_status(client, running, 'running')
+    queued = client.submit(parachute_input)
+
+    with pytest.raises(ServiceError) as error:
+        client.submit(parachute_input)
+    assert error.value.status == 503
+
+    assert client.cancel(queued)['status'] == 'cancelled'
+    client.cancel(running)
+    wait_for_status(client, running, 'cancelled')
+    with pytest.raises(ServiceError) as error:
+        client.wait(running)
+    assert error.value.status == 409
+
+
+@pytest.mark.parametrize('input_data', [
+    {'entry_angle': 'abc'},
+    {'output_every': 2.5},
+    {'parachute_system': {'use_parachutes': 'yes'}},
+    {'no_such_field': 1.0},
+])
+def test_invalid_input_is_rejected(client, service, input_data):
+    with pytest.raises(ServiceError) as error:
+        client.submit(input_data)
+    assert error.value.status == 400
+    assert service.jobs() == []
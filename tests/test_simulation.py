@@ -0,0 +1,79 @@
+"""Тесты движка расчета"""
+from dataclasses import fields, replace
+
+import pytest
+
+from core.simulation import SimulationEngine, SimulationOutput, SimulationSummary
+
+SUMMARY_FIELDS = [item.name for item in fields(SimulationSummary) if item.name != 'n_samples']
+
+
+@pytest.mark.parametrize('integrator', ['rk45', 'euler'])
+def test_metrics_only_summary_equals_full_output(integrator, rk45_input, euler_input):
+    input_data = rk45_input if integrator == 'rk45' else euler_input
+    output = SimulationEngine().run(input_data)
+    summary = SimulationEngine().run(input_data, metrics_only=True)
+
+    assert isinstance(output, SimulationOutput)
+    assert isinstance(summary, SimulationSummary)
+    assert summary.n_samples == len(output.time)
+    for name in SUMMARY_FIELDS:
+        expected = getattr(output, name)
+        actual = getattr(summary, name)
+        if isinstance(expected, float):
+            assert actual == pytest.approx(expected, rel=1e-9, abs=1e-12), name
+        elif name == 'thermal_load':
+            for item in fields(expected):
+                assert getattr(actual, item.name) == pytest.approx(getattr(expected, item.name), rel=1e-9), item.name
+        else:
+            assert actual == expected, name
+
+
+@pytest.mark.parametrize('mode', ['every', 'interval', 'adaptive'])
+def test_decimated_output_keeps_full_resolution_metrics(mode, euler_input):
+    full = SimulationEngine().run(euler_input)
+    decimated = SimulationEngine().run(replace(euler_input, output_mode=mode))
+
+    assert len(decimated.time) < len(full.time)
+    assert decimated.time[-1] == full.time[-1]
+    assert decimated.max_heat_flux == pytest.approx(full.max_heat_flux, rel=1e-12)
+    assert decimated.peak_deceleration == pytest.approx(full.peak_deceleration, rel=1e-12)
+    assert decimated.flight_distance == pytest.approx(full.flight_distance, rel=1e-9)
+    assert decimated.thermal_load.ablated_mass == pytest.approx(full.thermal_load.ablated_mass, rel=1e-9)
+
+
+def test_thermal_only_change_reuses_trajectory(euler_input):
+    engine = SimulationEngine()
+    first = engine.run(euler_input)
+    thermal = replace(euler_input.thermal_properties, specific_heat=500.0)
+    second = engine.run(replace(euler_input, thermal_properties=thermal))
+
+    assert second.time is first.time
+    assert second.thermal_load != first.thermal_load
+    # Ряды, вычисленные по запросу одного результата, не попадают в другой
+    first.mach_number
+    assert 'mach_number' not in second._cache
+
+
+def test_cached_trajectory_is_read_only(rk45_input):
+    engine = SimulationEngine()
+    first = engine.run(rk45_input)
+    second = engine.run(rk45_input)
+    thermal = replace(rk45_input.thermal_properties, specific_heat=500.0)
+    third = engine.run(replace(rk45_input, thermal_properties=thermal))
+
+    assert second.height is first.height and third.height is first.height
+    for name in ('time', 'velocity_x', 'velocity_y', 'height', 'parachute_state_codes', 'heat_flux'):
+        with pytest.raises(ValueError):
+            getattr(first, name)[:] = 0
+    assert second.height[0] == rk45_input.entry_height
+    assert third.heat_flux.max() == first.max_heat_flux
+
+
+def test_without_stage_cache_outputs_are_independent(rk45_input):
+    engine = SimulationEngine(stage_cache_size=0)
+    first = engine.run(rk45_input)
+    second = engine.run(rk45_input)
+
+    first.height[:] = 0
+    assert second.height[0] == rk45_input.entry_height
@@ -0,0 +1,90 @@
+"""Тесты параметрических расчетов и изоляции ошибок случаев"""
+import os
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from core.simulation import SimulationInput, SimulationOutput
+from core.sweep import SweepCase, SweepRunner, run_cases
+
+FAILING_ANGLE = 11.0
+
+
+def final_velocity(output):
+    return output.final_velocity
+
+
+def raise_on_failing_angle(output):
+    if output.input_data.entry_angle == FAILING_ANGLE:
+        raise RuntimeError('reducer failed')
+    return output.final_velocity
+
+
+def crash_on_failing_angle(output):
+    # Аварийное завершение рабочего процесса ломает весь пул
+    if output.input_data.entry_angle == FAILING_ANGLE:
+        os._exit(1)
+    return output.final_velocity
+
+
+@pytest.fixture
+def base_input():
+    return SimulationInput(integrator='rk45', simulation_time=200.0)
+
+
+ANGLES = [9.0, 10.0, FAILING_ANGLE, 12.0, 13.0]
+
+
+@pytest.fixture(scope='module')
+def reference():
+    runner = SweepRunner(SimulationInput(integrator='rk45', simulation_time=200.0),
+                         {'entry_angle': ANGLES}, max_workers=1, reducer=final_velocity)
+    return [result.output for result in runner.run()]
+
+
+def test_sweep_in_process_and_in_pool_agree(base_input, reference):
+    results = SweepRunner(base_input, {'entry_angle': ANGLES}, max_workers=2).run()
+    assert all(result.ok for result in results)
+    assert [result.parameters['entry_angle'] for result in results] == ANGLES
+    assert isinstance(results[0].output, SimulationOutput)
+    assert [result.output.final_velocity for result in results] == reference
+    # Ряды из рабочих процессов - представления на общую память
+    assert not results[0].output.time.flags.writeable
+    assert np.all(np.diff(results[0].output.time) > 0)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_exception_fails_only_its_case(base_input, reference, max_workers):
+    results = SweepRunner(base_input, {'entry_angle': ANGLES}, max_workers=max_workers,
+                          reducer=raise_on_failing_angle).run()
+
+    failed = [result.index for result in results if not result.ok]
+    assert failed == [ANGLES.index(FAILING_ANGLE)]
+    assert 'reducer failed' in results[failed[0]].error
+    assert [result.output for result in results if result.ok] == \
+        [value for angle, value in zip(ANGLES, reference) if angle != FAILING_ANGLE]
+
+
+def test_worker_crash_fails_only_its_case(base_input, reference):
+    results = SweepRunner(base_input, {'entry_angle': ANGLES}, max_workers=2,
+                          reducer=crash_on_failing_angle).run()
+
+    failed = [result.index for result in results if not result.ok]
+    assert failed == [ANGLES.index(FAILING_ANGLE)]
+    assert 'BrokenProcessPool' in results[failed[0]].error
+    assert [result.output for result in results if result.ok] == \
+        [value for angle, value in zip(ANGLES, reference) if angle != FAILING_ANGLE]
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_case_index_is_only_a_label(base_input, reference, max_workers):
+    # Метки не совпадают с позициями в списке и повторяются
+    labels = [5, 5, 40, -1, 7]
+    cases = [SweepCase(label, {'entry_angle': angle}, replace(base_input, entry_angle=angle))
+             for label, angle in zip(labels, ANGLES)]
+    results = run_cases(cases, max_workers=max_workers, reducer=final_velocity)
+
+    assert [result.index for result in results] == labels
+    assert [result.parameters['entry_angle'] for result in results] == ANGLES
+    assert [result.output for result in results] == reference
@@ -0,0 +1,62 @@
+"""
+Рабочий узел распределенного расчета (venus-sim-worker)
+
+Подключается к координатору (venus-sim ... --listen) и считает выданные
+блоки случаев в локальном пуле процессов:
+    venus-sim-worker coordinator-host:8766 -j 8
+
+Протокол описан в core/distributed.py.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog='venus-sim-worker',
+        description='Рабочий узел распределенного расчета входа в атмосферу Венеры'
+    )
+    parser.add_argument('coordinator', metavar='[HOST:]PORT', help='Адрес координатора')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Число процессов (по умолчанию - число ядер)')
+    parser.add_argument('--heartbeat', type=float, default=3.0,
+                        help='Период сигналов присутствия, с (по умолчанию 3)')
+    parser.add_argument('--connect-timeout', type=float, default=30.0,
+                        help='Сколько секунд ждать координатор (по умолчанию 30)')
+    parser.add_argument('--name', default=None, help='Имя узла в журнале координатора')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Подробный журнал')
+    return parser
+
+
+def main(argv=None) -> int:
+    """Точка входа venus-sim-worker"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s %(name)s %(levelname)s: %(message)s'
+    )
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from cli import parse_address
+    from core.distributed import SweepWorker
+
+    try:
+        host, port = parse_address(args.coordinator)
+    except ValueError as e:
+        parser.error(str(e))
+    worker = SweepWorker(host, port, args.jobs, args.heartbeat, args.connect_timeout, args.name)
+    try:
+        chunks = worker.run()
+    except OSError as e:
+        print(f"venus-sim-worker: {e}", file=sys.stderr)
+        return 1
+    print(f"{chunks} chunks completed", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())